@@ -66,9 +66,10 @@ def loadShowsFromDB():
     myDB = db.DBConnection()
     sqlResults = myDB.select("SELECT * FROM tv_shows")
 
+    # build every show straight from its row, episodes are only created when something asks for them
     for sqlShow in sqlResults:
         try:
-            curShow = TVShow(int(sqlShow["tvdb_id"]))
+            curShow = TVShow(int(sqlShow["tvdb_id"]), sqlShow=sqlShow)
             sickbeard.showList.append(curShow)
         except Exception, e:
             logger.log(u"There was an error creating the show in " + sqlShow["location"] + ": " + str(e).decode('utf-8'), logger.ERROR)
@@ -77,6 +78,40 @@ def loadShowsFromDB():
         # TODO: update the existing shows if the showlist has something in it
 
 
+class StartupProfiler(object):
+    """
+    Records how long each phase of the startup takes, used by --profile-startup
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self.start_time = self.last_time = time.time()
+
+    def mark(self, phase):
+        """
+        Closes the current phase and names it
+        """
+        if not self.enabled:
+            return
+
+        now = time.time()
+        self.phases.append((phase, now - self.last_time))
+        self.last_time = now
+
+    def report(self):
+        """
+        Prints the phase-by-phase timing breakdown
+        """
+        if not self.enabled:
+            return
+
+        logger.log(u"Startup profile:")
+        for phase, duration in self.phases:
+            logger.log(u"    %-28s %8.1f ms" % (phase, duration * 1000))
+        logger.log(u"    %-28s %8.1f ms" % ("total", (self.last_time - self.start_time) * 1000))
+
+
 def daemonize():
     """
     Fork off as a daemon
@@ -158,6 +193,7 @@ def help_message():
     help_msg += "                                    to load configuration from \n"
     help_msg += "                                    Default: config.ini in " + sickbeard.PROG_DIR + " or --datadir location\n"
     help_msg += "                --noresize          Prevent resizing of the banner/posters even if PIL is installed\n"
+    help_msg += "                --profile-startup   Print a phase-by-phase timing breakdown of the startup\n"
 
     return help_msg
 
@@ -206,13 +242,14 @@ def main():
     threading.currentThread().name = "MAIN"
 
     try:
-        opts, args = getopt.getopt(sys.argv[1:], "hfqdp::", ['help', 'forceupdate', 'quiet', 'nolaunch', 'daemon', 'pidfile=', 'port=', 'datadir=', 'config=', 'noresize'])  # @UnusedVariable
+        opts, args = getopt.getopt(sys.argv[1:], "hfqdp::", ['help', 'forceupdate', 'quiet', 'nolaunch', 'daemon', 'pidfile=', 'port=', 'datadir=', 'config=', 'noresize', 'profile-startup'])  # @UnusedVariable
     except getopt.GetoptError:
         sys.exit(help_message())
 
     forceUpdate = False
     forcedPort = None
     noLaunch = False
+    profileStartup = False
 
     for o, a in opts:
 
@@ -272,6 +309,12 @@ def main():
         if o in ('--noresize',):
             sickbeard.NO_RESIZE = True
 
+        # Time the startup phases and print the breakdown once we're up
+        if o in ('--profile-startup',):
+            profileStartup = True
+
+    profiler = StartupProfiler(profileStartup)
+
     # The pidfile is only useful in daemon mode, make sure we can write the file properly
     if sickbeard.CREATEPID:
         if sickbeard.DAEMON:
@@ -316,11 +359,15 @@ def main():
         if not os.path.isfile(sickbeard.CONFIG_FILE):
             sys.stdout.write("Unable to find '" + sickbeard.CONFIG_FILE + "' , all settings will be default!" + "\n")
 
+    profiler.mark("preliminary checks")
+
     # Load the config and publish it to the sickbeard package
     sickbeard.CFG = ConfigObj(sickbeard.CONFIG_FILE)
+    profiler.mark("config load")
 
     # Initialize the config and our threads
     sickbeard.initialize(consoleLogging=consoleLogging)
+    profiler.mark("initialize")
 
     sickbeard.showList = []
 
@@ -371,17 +418,23 @@ def main():
             sickbeard.launchBrowser(startPort)
         sys.exit("Unable to start web server, is something else running on port: " + str(startPort))
 
+    profiler.mark("web server")
+
     # Build from the DB to start with
     logger.log(u"Loading initial show list")
     loadShowsFromDB()
+    profiler.mark("show list (%d shows)" % len(sickbeard.showList))
 
     # Fire up all our threads
     sickbeard.start()
+    profiler.mark("schedulers")
 
     # Launch browser if we're supposed to
     if sickbeard.LAUNCH_BROWSER and not noLaunch and not sickbeard.DAEMON:
         sickbeard.launchBrowser(startPort)
 
+    profiler.report()
+
     # Start an update if we're supposed to
     if forceUpdate:
         sickbeard.showUpdateScheduler.action.run(force=True)  # @UndefinedVariable
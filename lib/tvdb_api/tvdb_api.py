@@ -51,6 +51,22 @@ lastTimeout = None
 def log():
     return logging.getLogger("tvdb_api")
 
+def _iterparse(src, tag):
+    """Yields each tag element in the XML string src as soon as it's been
+    parsed, then removes it from the tree so the tree doesn't keep growing
+    """
+    parents = []
+    for event, elem in ElementTree.iterparse(StringIO.StringIO(src), events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if elem.tag == tag:
+            yield elem
+            if parents:
+                parents[-1].remove(elem)
+
 
 class ShowContainer(dict):
     """Simple dict that holds a series of Show instances
@@ -561,18 +577,43 @@ class Tvdb:
             try:
                 return ElementTree.fromstring(src.rstrip("\r"))
             except SyntaxError, exceptionmsg:
-                errormsg = "There was an error with the XML retrieved from thetvdb.com:\n%s" % (
-                    exceptionmsg
-                )
+                raise self._xmlError(exceptionmsg)
+
+    def _iteretsrc(self, url, tag, language=None):
+        """Loads a URL using caching, yields each tag element of the source
+        as soon as it's parsed instead of building the whole ElementTree.
+        Elements are removed from the tree once they've been yielded.
+        Change from SickBeard, keeps memory down for shows with thousands
+        of episodes
+        """
+        src = self._loadUrl(url, language=language)
+        try:
+            for elem in _iterparse(src.rstrip("\r"), tag):
+                yield elem
+        except SyntaxError:
+            # anything already yielded will just be set again
+            src = self._loadUrl(url, recache=True, language=language)
+            try:
+                for elem in _iterparse(src.rstrip("\r"), tag):
+                    yield elem
+            except SyntaxError, exceptionmsg:
+                raise self._xmlError(exceptionmsg)
+
+    def _xmlError(self, exceptionmsg):
+        """Returns the tvdb_error to raise when the XML can't be parsed
+        """
+        errormsg = "There was an error with the XML retrieved from thetvdb.com:\n%s" % (
+            exceptionmsg
+        )
 
-                if self.config['cache_enabled']:
-                    errormsg += "\nFirst try emptying the cache folder at..\n%s" % (
-                        self.config['cache_location']
-                    )
+        if self.config['cache_enabled']:
+            errormsg += "\nFirst try emptying the cache folder at..\n%s" % (
+                self.config['cache_location']
+            )
 
-                errormsg += "\nIf this does not resolve the issue, please try again later. If the error persists, report a bug on"
-                errormsg += "\nhttp://dbr.lighthouseapp.com/projects/13342-tvdb_api/overview\n"
-                raise tvdb_error(errormsg)
+        errormsg += "\nIf this does not resolve the issue, please try again later. If the error persists, report a bug on"
+        errormsg += "\nhttp://dbr.lighthouseapp.com/projects/13342-tvdb_api/overview\n"
+        return tvdb_error(errormsg)
 
     def _setItem(self, sid, seas, ep, attrib, value):
         """Creates a new episode, creating Show(), Season() and
@@ -806,9 +847,7 @@ class Tvdb:
         else:
             url = self.config['url_epInfo'] % (sid, language)
 
-        epsEt = self._getetsrc( url, language=language)
-
-        for cur_ep in epsEt.findall("Episode"):
+        for cur_ep in self._iteretsrc(url, "Episode", language=language):
 
             if self.config['dvdorder']:
                 log().debug('Using DVD ordering.')
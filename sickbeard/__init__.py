@@ -37,8 +37,8 @@ from sickbeard import providers, metadata
 from providers import ezrss, tvtorrents, torrentleech, btn, newznab, womble, omgwtfnzbs, hdbits
 from sickbeard.config import CheckSection, check_setting_int, check_setting_str, ConfigMigrator
 
-from sickbeard import searchCurrent, searchBacklog, showUpdater, versionChecker, properFinder, autoPostProcesser
-from sickbeard import helpers, db, exceptions, show_queue, search_queue, scheduler
+from sickbeard import searchCurrent, searchBacklog, showUpdater, versionChecker, properFinder, autoPostProcesser, downloadWatcher
+from sickbeard import helpers, db, exceptions, show_queue, search_queue, scheduler, http_pool, notifiers
 from sickbeard import logger
 from sickbeard import naming
 
@@ -52,6 +52,12 @@ invoked_command = None
 
 SOCKET_TIMEOUT = 30
 
+# how many idle connections to keep open to each host for reuse
+HTTP_MAX_CONNECTIONS_PER_HOST = 4
+
+# how many minutes to keep provider search results around for identical searches, 0 to turn it off
+SEARCH_CACHE_TTL = 15
+
 PID = None
 
 CFG = None
@@ -80,6 +86,8 @@ showQueueScheduler = None
 searchQueueScheduler = None
 properFinderScheduler = None
 autoPostProcesserScheduler = None
+downloadWatcherScheduler = None
+notifierQueueScheduler = None
 
 showList = None
 loadingShowList = None
@@ -98,6 +106,7 @@ started = False
 
 ACTUAL_LOG_DIR = None
 LOG_DIR = None
+DEBUG_LOGGING = True
 
 WEB_PORT = None
 WEB_LOG = None
@@ -187,6 +196,7 @@ CREATE_MISSING_SHOW_DIRS = None
 RENAME_EPISODES = False
 PROCESS_AUTOMATICALLY = False
 KEEP_PROCESSED_DIR = False
+PROCESS_METHOD = None
 MOVE_ASSOCIATED_FILES = False
 FILTER_ASSOCIATED_FILES = None
 TV_DOWNLOAD_DIR = None
@@ -346,7 +356,7 @@ def initialize(consoleLogging=True):
 
     with INIT_LOCK:
 
-        global ACTUAL_LOG_DIR, LOG_DIR, WEB_PORT, WEB_LOG, WEB_ROOT, WEB_USERNAME, WEB_PASSWORD, WEB_HOST, WEB_IPV6, USE_API, API_KEY, ENABLE_HTTPS, HTTPS_CERT, HTTPS_KEY, \
+        global ACTUAL_LOG_DIR, LOG_DIR, DEBUG_LOGGING, WEB_PORT, WEB_LOG, WEB_ROOT, WEB_USERNAME, WEB_PASSWORD, WEB_HOST, WEB_IPV6, USE_API, API_KEY, ENABLE_HTTPS, HTTPS_CERT, HTTPS_KEY, \
                 USE_NZBS, USE_TORRENTS, NZB_METHOD, NZB_DIR, DOWNLOAD_PROPERS, \
                 SAB_USERNAME, SAB_PASSWORD, SAB_APIKEY, SAB_CATEGORY, SAB_HOST, \
                 NZBGET_USERNAME, NZBGET_PASSWORD, NZBGET_CATEGORY, NZBGET_HOST, currentSearchScheduler, backlogSearchScheduler, \
@@ -357,7 +367,7 @@ def initialize(consoleLogging=True):
                 PLEX_SERVER_HOST, PLEX_HOST, PLEX_USERNAME, PLEX_PASSWORD, \
                 showUpdateScheduler, __INITIALIZED__, LAUNCH_BROWSER, showList, loadingShowList, \
                 NEWZNAB_DATA, NZBS, NZBS_UID, NZBS_HASH, EZRSS, HDBITS, HDBITS_USERNAME, HDBITS_PASSKEY, TVTORRENTS, TVTORRENTS_DIGEST, TVTORRENTS_HASH, BTN, BTN_API_KEY, TORRENTLEECH, TORRENTLEECH_KEY, \
-                TORRENT_DIR, USENET_RETENTION, SOCKET_TIMEOUT, \
+                TORRENT_DIR, USENET_RETENTION, SOCKET_TIMEOUT, HTTP_MAX_CONNECTIONS_PER_HOST, SEARCH_CACHE_TTL, \
                 SEARCH_FREQUENCY, DEFAULT_SEARCH_FREQUENCY, BACKLOG_SEARCH_FREQUENCY, \
                 POSTPROCESS_FREQUENCY, DEFAULT_POSTPROCESS_FREQUENCY, MIN_POSTPROCESS_FREQUENCY, \
                 QUALITY_DEFAULT, FLATTEN_FOLDERS_DEFAULT, STATUS_DEFAULT, \
@@ -369,10 +379,10 @@ def initialize(consoleLogging=True):
                 USE_PUSHBULLET, PUSHBULLET_NOTIFY_ONSNATCH, PUSHBULLET_NOTIFY_ONDOWNLOAD, PUSHBULLET_ACCESS_TOKEN, PUSHBULLET_DEVICE_IDEN, \
                 USE_SLACK, SLACK_NOTIFY_ONSNATCH, SLACK_NOTIFY_ONDOWNLOAD, SLACK_ACCESS_TOKEN, SLACK_CHANNEL, SLACK_BOT_NAME, SLACK_ICON_URL, \
                 versionCheckScheduler, VERSION_NOTIFY, PROCESS_AUTOMATICALLY, \
-                KEEP_PROCESSED_DIR, TV_DOWNLOAD_DIR, TVDB_BASE_URL, MIN_SEARCH_FREQUENCY, \
+                KEEP_PROCESSED_DIR, PROCESS_METHOD, TV_DOWNLOAD_DIR, TVDB_BASE_URL, MIN_SEARCH_FREQUENCY, \
                 showQueueScheduler, searchQueueScheduler, ROOT_DIRS, CACHE_DIR, ACTUAL_CACHE_DIR, TVDB_API_PARMS, \
                 NAMING_PATTERN, NAMING_MULTI_EP, NAMING_FORCE_FOLDERS, NAMING_ABD_PATTERN, NAMING_CUSTOM_ABD, \
-                RENAME_EPISODES, properFinderScheduler, PROVIDER_ORDER, autoPostProcesserScheduler, \
+                RENAME_EPISODES, properFinderScheduler, PROVIDER_ORDER, autoPostProcesserScheduler, downloadWatcherScheduler, notifierQueueScheduler, \
                 WOMBLE, OMGWTFNZBS, OMGWTFNZBS_USERNAME, OMGWTFNZBS_APIKEY, providerList, newznabProviderList, \
                 EXTRA_SCRIPTS, USE_TWITTER, TWITTER_USERNAME, TWITTER_PASSWORD, TWITTER_PREFIX, \
                 USE_BOXCAR2, BOXCAR2_ACCESS_TOKEN, BOXCAR2_NOTIFY_ONDOWNLOAD, BOXCAR2_NOTIFY_ONSNATCH, BOXCAR2_SOUND, \
@@ -398,6 +408,9 @@ def initialize(consoleLogging=True):
         if not helpers.makeDir(LOG_DIR):
             logger.log(u"!!! No log folder, logging to screen only!", logger.ERROR)
 
+        DEBUG_LOGGING = bool(check_setting_int(CFG, 'General', 'debug_logging', 1))
+        logger.set_level(logger.DEBUG if DEBUG_LOGGING else logger.MESSAGE)
+
         try:
             WEB_PORT = check_setting_int(CFG, 'General', 'web_port', 8081)
         except:
@@ -421,6 +434,10 @@ def initialize(consoleLogging=True):
 
         DISPLAY_ALL_SEASONS = check_setting_int(CFG, 'General', 'display_all_seasons', 1)
 
+        HTTP_MAX_CONNECTIONS_PER_HOST = check_setting_int(CFG, 'General', 'http_max_connections_per_host', 4)
+
+        SEARCH_CACHE_TTL = check_setting_int(CFG, 'General', 'search_cache_ttl', 15)
+
         USE_API = bool(check_setting_int(CFG, 'General', 'use_api', 0))
         API_KEY = check_setting_str(CFG, 'General', 'api_key', '')
 
@@ -491,6 +508,9 @@ def initialize(consoleLogging=True):
         PROCESS_AUTOMATICALLY = check_setting_int(CFG, 'General', 'process_automatically', 0)
         RENAME_EPISODES = check_setting_int(CFG, 'General', 'rename_episodes', 1)
         KEEP_PROCESSED_DIR = check_setting_int(CFG, 'General', 'keep_processed_dir', 1)
+        PROCESS_METHOD = check_setting_str(CFG, 'General', 'process_method', 'copy')
+        if PROCESS_METHOD not in ('copy', 'hardlink'):
+            PROCESS_METHOD = 'copy'
         MOVE_ASSOCIATED_FILES = check_setting_int(CFG, 'General', 'move_associated_files', 0)
         FILTER_ASSOCIATED_FILES = check_setting_str(CFG, 'General', 'filter_associated_files', '')
         CREATE_MISSING_SHOW_DIRS = check_setting_int(CFG, 'General', 'create_missing_show_dirs', 0)
@@ -743,9 +763,11 @@ def initialize(consoleLogging=True):
         # initialize schedulers
 
         # updaters
+        # the version check also refreshes the scene exceptions, neither is needed to serve the first page
         versionCheckScheduler = scheduler.Scheduler(versionChecker.CheckVersion(),
                                                     cycleTime=datetime.timedelta(hours=12),
-                                                    threadName="CHECKVERSION"
+                                                    threadName="CHECKVERSION",
+                                                    run_delay=datetime.timedelta(minutes=1)
                                                     )
 
         showQueueScheduler = scheduler.Scheduler(show_queue.ShowQueue(),
@@ -796,6 +818,19 @@ def initialize(consoleLogging=True):
         if not PROCESS_AUTOMATICALLY:
             autoPostProcesserScheduler.silent = True
 
+        downloadWatcherScheduler = scheduler.Scheduler(downloadWatcher.DownloadDirWatcher(),
+                                                       cycleTime=datetime.timedelta(seconds=5),
+                                                       threadName="DIRWATCHER",
+                                                       silent=True
+                                                       )
+
+        # notifiers
+        notifierQueueScheduler = scheduler.Scheduler(notifiers.notifier_queue,
+                                                     cycleTime=datetime.timedelta(seconds=1),
+                                                     threadName="NOTIFIERS",
+                                                     silent=True
+                                                     )
+
         showList = []
         loadingShowList = {}
 
@@ -807,8 +842,8 @@ def start():
 
     global __INITIALIZED__, currentSearchScheduler, backlogSearchScheduler, \
             showUpdateScheduler, versionCheckScheduler, showQueueScheduler, \
-            properFinderScheduler, autoPostProcesserScheduler, searchQueueScheduler, \
-            started
+            properFinderScheduler, autoPostProcesserScheduler, downloadWatcherScheduler, searchQueueScheduler, \
+            notifierQueueScheduler, started
 
     with INIT_LOCK:
 
@@ -838,14 +873,20 @@ def start():
             # start the proper finder
             autoPostProcesserScheduler.thread.start()
 
+            # start the download dir watcher
+            downloadWatcherScheduler.thread.start()
+
+            # start the notifier queue
+            notifierQueueScheduler.thread.start()
+
             started = True
 
 
 def halt():
 
     global __INITIALIZED__, currentSearchScheduler, backlogSearchScheduler, showUpdateScheduler, \
-            showQueueScheduler, properFinderScheduler, autoPostProcesserScheduler, searchQueueScheduler, \
-            started
+            showQueueScheduler, properFinderScheduler, autoPostProcesserScheduler, downloadWatcherScheduler, searchQueueScheduler, \
+            notifierQueueScheduler, started
 
     with INIT_LOCK:
 
@@ -904,6 +945,13 @@ def halt():
             except:
                 pass
 
+            downloadWatcherScheduler.abort = True
+            logger.log(u"Waiting for the DIRWATCHER thread to exit")
+            try:
+                downloadWatcherScheduler.thread.join(10)
+            except:
+                pass
+
             properFinderScheduler.abort = True
             logger.log(u"Waiting for the PROPERFINDER thread to exit")
             try:
@@ -911,6 +959,18 @@ def halt():
             except:
                 pass
 
+            notifierQueueScheduler.abort = True
+            logger.log(u"Waiting for the NOTIFIERS thread to exit")
+            try:
+                notifierQueueScheduler.thread.join(10)
+            except:
+                pass
+
+            # send anything that's still waiting
+            notifiers.notifier_queue.flush()
+
+            http_pool.close_all()
+
             __INITIALIZED__ = False
 
 
@@ -981,6 +1041,9 @@ def saveAndShutdown(restart=False):
             logger.close()
             subprocess.Popen(popen_list, cwd=os.getcwd())
 
+    # write out anything still waiting in the log queue
+    logger.close()
+
     os._exit(0)
 
 
@@ -1031,6 +1094,9 @@ def save_config():
     new_config['General']['web_password'] = WEB_PASSWORD
     new_config['General']['anon_redirect'] = ANON_REDIRECT
     new_config['General']['display_all_seasons'] = DISPLAY_ALL_SEASONS
+    new_config['General']['http_max_connections_per_host'] = int(HTTP_MAX_CONNECTIONS_PER_HOST)
+    new_config['General']['search_cache_ttl'] = int(SEARCH_CACHE_TTL)
+    new_config['General']['debug_logging'] = int(DEBUG_LOGGING)
     new_config['General']['use_api'] = int(USE_API)
     new_config['General']['api_key'] = API_KEY
     new_config['General']['enable_https'] = int(ENABLE_HTTPS)
@@ -1068,6 +1134,7 @@ def save_config():
     new_config['General']['root_dirs'] = ROOT_DIRS if ROOT_DIRS else ''
     new_config['General']['tv_download_dir'] = TV_DOWNLOAD_DIR
     new_config['General']['keep_processed_dir'] = int(KEEP_PROCESSED_DIR)
+    new_config['General']['process_method'] = PROCESS_METHOD
     new_config['General']['move_associated_files'] = int(MOVE_ASSOCIATED_FILES)
     new_config['General']['filter_associated_files'] = FILTER_ASSOCIATED_FILES
     new_config['General']['process_automatically'] = int(PROCESS_AUTOMATICALLY)
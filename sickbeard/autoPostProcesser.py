@@ -16,7 +16,10 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import os.path
+import threading
 
 import sickbeard
 
@@ -24,6 +27,9 @@ from sickbeard import logger
 from sickbeard import encodingKludge as ek
 from sickbeard import processTV
 
+# held while the download dir is being processed automatically so the scan and the download dir watcher take turns
+process_lock = threading.Lock()
+
 
 class PostProcesser():
 
@@ -39,4 +45,5 @@ class PostProcesser():
             logger.log(u"Automatic post-processing attempted but dir " + sickbeard.TV_DOWNLOAD_DIR + " is relative (and probably not what you really want to process)", logger.ERROR)
             return
 
-        processTV.processDir(sickbeard.TV_DOWNLOAD_DIR, method='Automatic')
+        with process_lock:
+            processTV.processDir(sickbeard.TV_DOWNLOAD_DIR, method='Automatic')
@@ -61,3 +61,21 @@ class AddSceneExceptionsProvider(AddSceneNameCache):
     def execute(self):
         if not self.hasColumn("scene_exceptions", "provider"):
             self.addColumn("scene_exceptions", "provider", data_type='TEXT', default='sb_tvdb_scene_exceptions')
+
+
+class AddShowFiles(AddSceneExceptionsProvider):
+    def test(self):
+        return self.hasTable("show_files")
+
+    def execute(self):
+        self.connection.action("CREATE TABLE show_files (showid INTEGER, path TEXT, size NUMERIC, mtime NUMERIC)")
+        self.connection.action("CREATE INDEX idx_show_files_showid ON show_files (showid)")
+
+
+class AddFeedState(AddShowFiles):
+    def test(self):
+        return self.hasTable("feed_state")
+
+    def execute(self):
+        self.connection.action("CREATE TABLE feed_state (provider TEXT, url TEXT, etag TEXT, last_modified TEXT, hash TEXT, size NUMERIC)")
+        self.connection.action("CREATE UNIQUE INDEX idx_feed_state ON feed_state (provider, url)")
@@ -27,7 +27,7 @@ from sickbeard import encodingKludge as ek
 from sickbeard.name_parser.parser import NameParser, InvalidNameException
 
 MIN_DB_VERSION = 9  # oldest db version we support migrating from
-MAX_DB_VERSION = 18
+MAX_DB_VERSION = 19
 
 
 class MainSanityCheck(db.DBSanityCheck):
@@ -605,3 +605,41 @@ class AddHistorySource(AddSkipNotifications):
             self.connection.mass_action(set_torrent_source)
 
         self.incDBVersion()
+
+
+class AddProcessedFiles(AddHistorySource):
+    """ Adding table processed_files to look up already processed files without searching history """
+
+    def test(self):
+        return self.checkDBVersion() >= 19
+
+    def execute(self):
+        backupDatabase(19)
+
+        logger.log(u"Adding table processed_files")
+        if not self.hasTable("processed_files"):
+            self.connection.action("CREATE TABLE processed_files (path TEXT, size NUMERIC, mtime NUMERIC, showid NUMERIC, date NUMERIC);")
+        if not self.hasTable("idx_processed_files"):
+            self.connection.action("CREATE UNIQUE INDEX idx_processed_files ON processed_files (path, size, mtime);")
+
+        logger.log(u"Adding the downloaded files from history that are still around to processed_files...")
+        sql_results = self.connection.select("SELECT history.resource, history.showid, history.date, tv_episodes.file_size FROM tv_episodes INNER JOIN history ON history.showid=tv_episodes.showid" +
+                                             " WHERE history.season=tv_episodes.season and history.episode=tv_episodes.episode" +
+                                             " and tv_episodes.status IN (" + ",".join([str(x) for x in common.Quality.DOWNLOADED]) + ")")
+        processed_files = []
+        for cur_result in sql_results:
+            file_path = cur_result["resource"]
+            if not file_path or not ek.ek(os.path.isfile, file_path):
+                continue
+
+            file_stat = ek.ek(os.stat, file_path)
+            if file_stat.st_size != cur_result["file_size"]:
+                continue
+
+            processed_files.append(["INSERT OR IGNORE INTO processed_files (path, size, mtime, showid, date) VALUES (?,?,?,?,?)",
+                                    [file_path, file_stat.st_size, int(file_stat.st_mtime), cur_result["showid"], cur_result["date"]]])
+
+        if len(processed_files) > 0:
+            self.connection.mass_action(processed_files)
+
+        self.incDBVersion()
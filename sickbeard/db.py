@@ -87,10 +87,10 @@ class DBConnection:
                             sqlResult.append(self.connection.execute(qu[0]))
                         elif len(qu) > 1:
                             if logTransaction:
-                                logger.log(qu[0] + " with args " + str(qu[1]), logger.DEBUG)
+                                logger.log(u"%s with args %s", logger.DEBUG, qu[0], qu[1])
                             sqlResult.append(self.connection.execute(qu[0], qu[1]))
                     self.connection.commit()
-                    logger.log(u"Transaction with " + str(len(querylist)) + u" query's executed", logger.DEBUG)
+                    logger.log(u"Transaction with %d query's executed", logger.DEBUG, len(querylist))
                     return sqlResult
                 except sqlite3.OperationalError, e:
                     sqlResult = []
@@ -125,10 +125,10 @@ class DBConnection:
             while attempt < 5:
                 try:
                     if args is None:
-                        logger.log(self.filename + ": " + query, logger.DEBUG)
+                        logger.log(u"%s: %s", logger.DEBUG, self.filename, query)
                         sqlResult = self.connection.execute(query)
                     else:
-                        logger.log(self.filename + ": " + query + " with args " + str(args), logger.DEBUG)
+                        logger.log(u"%s: %s with args %s", logger.DEBUG, self.filename, query, args)
                         sqlResult = self.connection.execute(query, args)
                     self.connection.commit()
                     # get out of the connection attempt loop since we were successful
@@ -0,0 +1,278 @@
+# Author: Nic Wolfe <nic@wolfeden.ca>
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import with_statement
+
+import ctypes
+import ctypes.util
+import datetime
+import errno
+import os
+import struct
+import sys
+import time
+
+import sickbeard
+
+from sickbeard import autoPostProcesser
+from sickbeard import logger
+from sickbeard import processTV
+from sickbeard import encodingKludge as ek
+from sickbeard.exceptions import ex
+
+# inotify flags and event masks, from sys/inotify.h
+IN_NONBLOCK = 0x800
+IN_CLOEXEC = 0x80000
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+
+# files that are still being written keep sending IN_MODIFY, so they don't look settled
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# struct inotify_event without the name
+EVENT_FORMAT = 'iIII'
+EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+
+# how long a folder has to be left alone before we process it
+SETTLE_TIME = 60
+
+# how often the full download dir scan still runs while the watcher is working (minutes)
+WATCHED_POSTPROCESS_FREQUENCY = 60
+
+
+class Inotify(object):
+    """
+    A small ctypes wrapper around the Linux inotify API
+    """
+
+    def __init__(self):
+
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            self._inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError), e:
+            raise OSError(errno.ENOSYS, "inotify isn't supported by this libc: " + ex(e))
+
+        self._inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self.fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        # watch descriptor -> watched path
+        self.watches = {}
+
+    def addWatch(self, path, mask=WATCH_MASK):
+        wd = ek.ek(self._inotify_add_watch, self.fd, path, mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        self.watches[wd] = path
+
+    def readEvents(self):
+        """
+        Reads all the events that are waiting, without blocking.
+
+        Returns: a list of (watched path, name, mask) tuples. The path is None for IN_Q_OVERFLOW.
+        """
+
+        events = []
+
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError, e:
+                if e.errno == errno.EAGAIN:
+                    break
+                raise
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, name_len = struct.unpack_from(EVENT_FORMAT, data, offset)  # @UnusedVariable
+                offset += EVENT_SIZE
+                name = ek.fixStupidEncodings(data[offset:offset + name_len].rstrip('\0'))
+                offset += name_len
+
+                # the watched dir is gone
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+
+                if mask & IN_Q_OVERFLOW:
+                    events.append((None, None, mask))
+                elif wd in self.watches and name is not None:
+                    events.append((self.watches[wd], name, mask))
+
+        return events
+
+    def close(self):
+        os.close(self.fd)
+        self.watches = {}
+
+
+class DownloadDirWatcher():
+    """
+    Watches TV_DOWNLOAD_DIR with inotify and post processes a download folder once nothing
+    has been written to it for SETTLE_TIME seconds. While this works the regular scan of the
+    whole download dir only runs every WATCHED_POSTPROCESS_FREQUENCY minutes as a safety net.
+    """
+
+    def __init__(self):
+        self.amActive = False
+
+        self.inotify = None
+        self.watched_dir = None
+
+        # top level folder -> time of the last event in it
+        self.pending = {}
+
+    def run(self):
+
+        self.amActive = True
+
+        download_dir = sickbeard.TV_DOWNLOAD_DIR
+
+        if not sickbeard.PROCESS_AUTOMATICALLY or not download_dir or not ek.ek(os.path.isdir, download_dir):
+            self._stop()
+        elif download_dir != self.watched_dir:
+            self._stop()
+            self._start(download_dir)
+
+        if self.inotify:
+            try:
+                self._handleEvents(self.inotify.readEvents())
+            except OSError, e:
+                logger.log(u"Unable to read download dir events, falling back to scanning it: " + ex(e), logger.WARNING)
+                self._stop()
+            else:
+                self._processSettled()
+
+        # put it back every time in case something else changed it (eg. the config being saved)
+        if self.inotify:
+            self._setScanFrequency(max(sickbeard.POSTPROCESS_FREQUENCY, WATCHED_POSTPROCESS_FREQUENCY))
+        else:
+            self._setScanFrequency(sickbeard.POSTPROCESS_FREQUENCY)
+
+        self.amActive = False
+
+    def _start(self, download_dir):
+
+        try:
+            self.inotify = Inotify()
+        except OSError, e:
+            logger.log(u"Not watching the download dir for changes: " + ex(e), logger.DEBUG)
+            return
+
+        self.watched_dir = download_dir
+        self._watchTree(download_dir)
+
+        logger.log(u"Watching " + download_dir + u" for finished downloads")
+
+    def _stop(self):
+
+        if not self.inotify:
+            return
+
+        self.inotify.close()
+        self.inotify = None
+        self.watched_dir = None
+        self.pending = {}
+
+    def _setScanFrequency(self, minutes):
+        cycle_time = datetime.timedelta(minutes=minutes)
+        if sickbeard.autoPostProcesserScheduler and sickbeard.autoPostProcesserScheduler.cycleTime != cycle_time:
+            sickbeard.autoPostProcesserScheduler.cycleTime = cycle_time
+
+    def _watchTree(self, path):
+        """
+        Adds watches for path and every folder below it, inotify doesn't do that by itself.
+        """
+
+        for (cur_path, dir_names, file_names) in ek.ek(os.walk, path):  # @UnusedVariable
+            try:
+                self.inotify.addWatch(cur_path)
+            except OSError, e:
+                # most likely out of watches (fs.inotify.max_user_watches), the full scan will pick up the rest
+                logger.log(u"Unable to watch " + cur_path + ": " + ex(e), logger.WARNING)
+                return
+
+    def _topFolder(self, path, name):
+        """
+        Returns the folder directly inside the download dir which path/name belongs to, or
+        the download dir itself for files that were put straight into it.
+        """
+
+        full_path = ek.ek(os.path.join, path, name)
+        rel_path = full_path[len(self.watched_dir):].lstrip(os.sep)
+
+        if os.sep not in rel_path and not ek.ek(os.path.isdir, full_path):
+            return self.watched_dir
+
+        return ek.ek(os.path.join, self.watched_dir, rel_path.split(os.sep)[0])
+
+    def _handleEvents(self, events):
+
+        now = time.time()
+
+        for (path, name, mask) in events:
+
+            # we missed events, look at the whole download dir
+            if mask & IN_Q_OVERFLOW:
+                self.pending[self.watched_dir] = now
+                continue
+
+            # new folders need their own watch
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watchTree(ek.ek(os.path.join, path, name))
+
+            top_folder = self._topFolder(path, name)
+
+            # the download client is still working on it
+            if ek.ek(os.path.basename, top_folder).upper().startswith('_UNPACK'):
+                continue
+
+            self.pending[top_folder] = now
+
+    def _processSettled(self):
+
+        now = time.time()
+
+        for cur_folder, last_event in self.pending.items():
+            if now - last_event < SETTLE_TIME:
+                continue
+
+            del self.pending[cur_folder]
+
+            if not ek.ek(os.path.isdir, cur_folder):
+                continue
+
+            logger.log(u"Download folder " + cur_folder + u" has settled, processing it")
+            with autoPostProcesser.process_lock:
+                processTV.processDir(cur_folder, method='Automatic')
@@ -128,5 +128,9 @@ class CantUpdateException(SickBeardException):
     "The show can't be updated right now"
 
 
+class FeedUnchangedException(SickBeardException):
+    "The feed hasn't changed since the last time it was loaded"
+
+
 class PostProcessingFailed(SickBeardException):
     "Post-processing the episode failed"
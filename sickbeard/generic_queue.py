@@ -55,6 +55,24 @@ class GenericQueue(object):
         
         return item
 
+    def sort_queue(self):
+
+        def sorter(x,y):
+            """
+            Sorts by priority descending then time ascending
+            """
+            if x.priority == y.priority:
+                if y.added == x.added:
+                    return 0
+                elif y.added < x.added:
+                    return 1
+                elif y.added > x.added:
+                    return -1
+            else:
+                return y.priority-x.priority
+
+        self.queue.sort(cmp=sorter)
+
     def run(self):
 
         # only start a new task if one isn't already going
@@ -69,21 +87,7 @@ class GenericQueue(object):
             if len(self.queue) > 0:
 
                 # sort by priority
-                def sorter(x,y):
-                    """
-                    Sorts by priority descending then time ascending
-                    """
-                    if x.priority == y.priority:
-                        if y.added == x.added:
-                            return 0
-                        elif y.added < x.added:
-                            return 1
-                        elif y.added > x.added:
-                            return -1
-                    else:
-                        return y.priority-x.priority
-
-                self.queue.sort(cmp=sorter)
+                self.sort_queue()
                 
                 queueItem = self.queue[0]
 
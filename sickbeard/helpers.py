@@ -25,7 +25,9 @@ import re
 import shutil
 import socket
 import stat
+import Queue
 import StringIO
+import threading
 import time
 import traceback
 import urllib2
@@ -42,6 +44,11 @@ try:
 except ImportError:
     from lib import simplejson as json
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 from xml.dom.minidom import Node
 
 try:
@@ -51,12 +58,19 @@ except ImportError:
 
 from sickbeard.exceptions import MultipleShowObjectsException, ex
 from sickbeard import logger
+from sickbeard import http_pool
 from sickbeard.common import USER_AGENT, mediaExtensions
 
 from sickbeard import db
 from sickbeard import encodingKludge as ek
 from sickbeard.notifiers import synoindex_notifier
 
+# ioctl from linux/fs.h which makes a file share the data blocks of another one
+FICLONE = 0x40049409
+
+# chunk size used when a file has to be copied the slow way
+COPY_BUFFER_SIZE = 1024 * 1024
+
 # workaround for broken urllib2 in python 2.6.5: wrong credentials lead to an infinite recursion
 if sys.version_info >= (2, 6, 5) and sys.version_info < (2, 6, 6):
     class HTTPBasicAuthHandler(urllib2.HTTPBasicAuthHandler):
@@ -190,6 +204,8 @@ def getURLFileLike(url, validate=False, cookies = cookielib.CookieJar(), passwor
     It allows for the use of cookies, multipart/form-data, https without certificate validation and both basic
     and digest HTTP authentication. In addition, the user-agent is set to the sickbeard default and accepts
     gzip and deflate encoding (which can be automatically handled when using readURL() to retrieve the contents)
+
+    Connections are kept open and reused for the next request to the same host once the returned object is closed.
     
     @param url: can be either a string or a Request object.
     @param validate: defines if SSL certificates should be validated on HTTPS connections
@@ -198,11 +214,17 @@ def getURLFileLike(url, validate=False, cookies = cookielib.CookieJar(), passwor
     @param throw_exc: throw the exception that was caught instead of None
     @return: the file-like object retrieved from the URL or None (or the exception) if it could not be retrieved
     """
+    # the log messages need the address even when we're given a Request
+    request = url
+    if isinstance(url, urllib2.Request):
+        url = url.get_full_url()
+
     # configure the OpenerDirector appropriately
     if not validate and sys.version_info >= (2, 7, 9):
             opener = urllib2.build_opener(urllib2.HTTPCookieProcessor(cookies),
                                           MultipartPostHandler.MultipartPostHandler,
-                                          urllib2.HTTPSHandler(context=ssl._create_unverified_context()),
+                                          http_pool.PooledHTTPHandler(),
+                                          http_pool.PooledHTTPSHandler(context=http_pool.UNVERIFIED_CONTEXT),
                                           urllib2.HTTPDigestAuthHandler(password_mgr),
                                           urllib2.HTTPBasicAuthHandler(password_mgr))
     else:
@@ -213,6 +235,8 @@ def getURLFileLike(url, validate=False, cookies = cookielib.CookieJar(), passwor
 
         opener = urllib2.build_opener(urllib2.HTTPCookieProcessor(cookies),
                                       MultipartPostHandler.MultipartPostHandler,
+                                      http_pool.PooledHTTPHandler(),
+                                      http_pool.PooledHTTPSHandler(),
                                       urllib2.HTTPDigestAuthHandler(password_mgr),
                                       urllib2.HTTPBasicAuthHandler(password_mgr))
 
@@ -221,13 +245,17 @@ def getURLFileLike(url, validate=False, cookies = cookielib.CookieJar(), passwor
                          ('Accept-Encoding', 'gzip,deflate')]
         
     try:
-        return opener.open(url)
+        return opener.open(request)
 
     except urllib2.HTTPError, e:
-        logger.log(u"HTTP error " + str(e.code) + " while loading URL " + url, logger.WARNING)
+        # urllib2 treats 304 Not Modified as an error but it's the expected answer to a conditional request
+        if e.code != 304:
+            logger.log(u"HTTP error " + str(e.code) + " while loading URL " + url, logger.WARNING)
         if throw_exc:
             raise 
         else:
+            # let the connection go back to the pool
+            e.close()
             return None
 
     except urllib2.URLError, e:
@@ -288,6 +316,51 @@ def readURLFileLike(urlFileLike):
     
     return result;
 
+
+class DecodedURLFileLike:
+    """
+    Wraps a file like object returned by getURLFileLike() and decompresses the data as it's read, for when the
+    contents are too big to read all at once with readURLFileLike().
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, urlFileLike):
+        self.urlFileLike = urlFileLike
+
+        encoding = urlFileLike.info().get("Content-Encoding")
+
+        if encoding in ('gzip', 'x-gzip'):
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self._decompressor = zlib.decompressobj()
+        else:
+            self._decompressor = None
+
+        self._buffer = ''
+
+    def read(self, size=-1):
+
+        if not self._decompressor:
+            return self.urlFileLike.read(size)
+
+        while size < 0 or len(self._buffer) < size:
+            data = self.urlFileLike.read(self.CHUNK_SIZE)
+            if not data:
+                self._buffer += self._decompressor.flush()
+                break
+            self._buffer += self._decompressor.decompress(data)
+
+        if size < 0:
+            result, self._buffer = self._buffer, ''
+        else:
+            result, self._buffer = self._buffer[:size], self._buffer[size:]
+
+        return result
+
+    def close(self):
+        self.urlFileLike.close()
+
 def is_hidden_folder(folder):
     """
     Returns True if folder is hidden.
@@ -326,13 +399,67 @@ def findCertainTVRageShow(showList, tvrid):
         return results[0]
 
 
-def list_associated_files(file_path, base_name_only=False, filter_ext=""):
+class FolderListing(object):
+    """
+    Remembers the contents of folders so repeated associated file lookups in the same folder only list it once.
+    Files that are moved or deleted while the listing is in use should be reported with added()/removed().
+    """
+
+    def __init__(self):
+        # folder -> set of names in it
+        self._listings = {}
+
+    def names(self, folder):
+        """
+        Returns the names of everything in folder, listing it the first time it's asked for
+        """
+
+        if folder not in self._listings:
+            try:
+                self._listings[folder] = set(ek.ek(os.listdir, folder))
+            except OSError:
+                self._listings[folder] = set()
+
+        return self._listings[folder]
+
+    def mightExist(self, file_path):
+        """
+        Returns False if nothing in the folder has file_path's name, even ignoring case (for case insensitive
+        filesystems). True only means it's worth checking the disk, it might be a folder or differ in case.
+        """
+
+        folder, name = ek.ek(os.path.split, file_path)
+        names = self.names(folder)
+
+        if name in names:
+            return True
+
+        name = name.lower()
+        for cur_name in names:
+            if cur_name.lower() == name:
+                return True
+
+        return False
+
+    def added(self, file_path):
+        folder, name = ek.ek(os.path.split, file_path)
+        if folder in self._listings:
+            self._listings[folder].add(name)
+
+    def removed(self, file_path):
+        folder, name = ek.ek(os.path.split, file_path)
+        if folder in self._listings:
+            self._listings[folder].discard(name)
+
+
+def list_associated_files(file_path, base_name_only=False, filter_ext="", folder_listing=None):
     """
     For a given file path searches for files with the same name but different extension and returns their absolute paths
 
     file_path: The file to check for associated files
     base_name_only: False add extra '.' (conservative search) to file_path minus extension
     filter_ext: A comma separated string with extensions to include or empty string to include all matches
+    folder_listing: A FolderListing to look the files up in instead of globbing the folder again (optional)
     Returns: A list containing all files which are associated to the given file
     """
 
@@ -349,14 +476,21 @@ def list_associated_files(file_path, base_name_only=False, filter_ext=""):
     if not base_name:
         return []
 
-    # don't confuse glob with chars we didn't mean to use
-    base_name = re.sub(r'[\[\]\*\?]', r'[\g<0>]', base_name)
-
     if filter_ext:
         # convert to tuple of extensions to restrict to
         filter_ext = tuple(x.lower().strip() for x in filter_ext.split(','))
 
-    for associated_file_path in ek.ek(glob.glob, base_name + '*'):
+    if folder_listing is not None:
+        # same matches as the glob below, without listing the folder again
+        folder, name_prefix = ek.ek(os.path.split, base_name)
+        name_prefix = ek.ek(os.path.normcase, name_prefix)
+        candidates = [ek.ek(os.path.join, folder, x) for x in folder_listing.names(folder)
+                      if ek.ek(os.path.normcase, x).startswith(name_prefix) and (name_prefix.startswith('.') or not x.startswith('.'))]
+    else:
+        # don't confuse glob with chars we didn't mean to use
+        candidates = ek.ek(glob.glob, re.sub(r'[\[\]\*\?]', r'[\g<0>]', base_name) + '*')
+
+    for associated_file_path in candidates:
         # only add associated to list
         if associated_file_path == file_path:
             continue
@@ -456,10 +590,49 @@ def listMediaFiles(path):
     return files
 
 
+def _cloneFile(srcFileObj, destFileObj):
+    """
+    Tries to make the destination share the data of the source file instead of copying it (reflink), which only
+    some filesystems (btrfs, xfs) can do.
+
+    Returns: True if the file was cloned, False if it still needs to be copied
+    """
+
+    if not fcntl or not sys.platform.startswith('linux'):
+        return False
+
+    try:
+        fcntl.ioctl(destFileObj.fileno(), FICLONE, srcFileObj.fileno())
+    except (IOError, OSError):
+        return False
+
+    return True
+
+
 def copyFile(srcFile, destFile):
-    ek.ek(shutil.copyfile, srcFile, destFile)
+    """
+    Copies srcFile to destFile, cloning it when the filesystem supports that and
+    otherwise copying it in large chunks.
+    """
+
+    # os.path.samefile doesn't exist on windows
+    if hasattr(os.path, 'samefile') and ek.ek(os.path.exists, destFile) and ek.ek(os.path.samefile, srcFile, destFile):
+        raise shutil.Error("`%s` and `%s` are the same file" % (srcFile, destFile))
+
+    srcFileObj = ek.ek(open, srcFile, 'rb')
+    try:
+        destFileObj = ek.ek(open, destFile, 'wb')
+        try:
+            if not _cloneFile(srcFileObj, destFileObj):
+                shutil.copyfileobj(srcFileObj, destFileObj, COPY_BUFFER_SIZE)
+        finally:
+            destFileObj.close()
+    finally:
+        srcFileObj.close()
+
+    # keep the permissions and times, same as when the file is moved
     try:
-        ek.ek(shutil.copymode, srcFile, destFile)
+        ek.ek(shutil.copystat, srcFile, destFile)
     except OSError:
         pass
 
@@ -473,6 +646,19 @@ def moveFile(srcFile, destFile):
         ek.ek(os.unlink, srcFile)
 
 
+def hardlinkFile(srcFile, destFile):
+    """
+    Hard links destFile to srcFile, so the file exists in both places without using any extra space.
+    Falls back to copying when the files are on different drives or the OS doesn't support links.
+    """
+    try:
+        ek.ek(os.link, srcFile, destFile)
+        fixSetGroupID(destFile)
+    except (OSError, AttributeError), e:
+        logger.log(u"Unable to link " + srcFile + " to " + destFile + ", copying it instead: " + ex(e), logger.DEBUG)
+        copyFile(srcFile, destFile)
+
+
 def make_dirs(path):
     """
     Creates any folders that are missing and assigns them the permissions of their
@@ -777,6 +963,42 @@ def parse_xml(data, del_xmlns=False):
     return parsedXML
 
 
+def iterparse_xml(data, tags, del_xmlns=False):
+    """
+    Parses data one element at a time instead of building the whole tree first. The root element is
+    yielded as soon as it starts (without its children) so the caller can check what kind of document
+    it is, then each element whose tag is in tags is yielded as soon as it's been parsed.
+
+    Yielded elements are removed from the tree afterwards so the memory used doesn't grow with the size
+    of the document. Namespaces are ignored when matching tags.
+
+    data: data string containing xml
+    tags: tag names of the elements to yield
+    del_xmlns: if True, removes xmlns namesspace from data before parsing
+
+    Raises SyntaxError if data isn't valid xml
+    """
+
+    if del_xmlns:
+        data = re.sub(' xmlns="[^"]+"', '', data)
+
+    parents = []
+
+    for event, element in etree.iterparse(StringIO.StringIO(data), events=('start', 'end')):
+
+        if event == 'start':
+            if not parents:
+                yield element
+            parents.append(element)
+            continue
+
+        parents.pop()
+
+        if parents and element.tag.split('}', 1)[-1] in tags:
+            yield element
+            parents[-1].remove(element)
+
+
 def get_xml_text(element, mini_dom=False):
     """
     Get all text inside a xml element
@@ -830,3 +1052,79 @@ def backupVersionedFile(old_file, version):
             return False
 
     return True
+
+
+def map_in_threads(func, items, max_threads, thread_name=None):
+    """
+    Calls func for every item using up to max_threads threads, for work that spends its time waiting on disk or network.
+
+    func: The function to call with each item
+    items: A list of the items to call func with
+    max_threads: The most threads to use at the same time
+    thread_name: The prefix for the worker thread names (optional, defaults to the current thread's name)
+
+    Returns: a list of the results in the same order as items. If func raised an exception for any item
+    then the first one is raised again once all the threads are done.
+    """
+
+    num_threads = min(max_threads, len(items))
+
+    if num_threads <= 1:
+        return [func(x) for x in items]
+
+    results = [None] * len(items)
+    errors = []
+
+    work_queue = Queue.Queue()
+    for cur_work in enumerate(items):
+        work_queue.put(cur_work)
+
+    def worker():
+        while True:
+            try:
+                (i, cur_item) = work_queue.get_nowait()
+            except Queue.Empty:
+                return
+
+            try:
+                results[i] = func(cur_item)
+            except Exception:
+                errors.append(sys.exc_info())
+
+    if not thread_name:
+        thread_name = threading.currentThread().getName()
+
+    threads = [threading.Thread(None, worker, thread_name + "-" + str(x + 1)) for x in range(num_threads)]
+
+    for cur_thread in threads:
+        cur_thread.start()
+    for cur_thread in threads:
+        cur_thread.join()
+
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+
+    return results
+
+
+class RateLimiter:
+    """
+    Spaces things out: every call to wait() returns at least min_interval seconds after the previous one,
+    no matter which thread made it.
+    """
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+
+        self._next_time = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+
+        with self._lock:
+            now = time.time()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.min_interval
+
+        if delay > 0:
+            time.sleep(delay)
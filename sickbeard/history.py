@@ -18,8 +18,10 @@
 
 import db
 import datetime
+import os
 
 from sickbeard.common import SNATCHED, Quality
+from sickbeard import encodingKludge as ek
 
 dateFormat = "%Y%m%d%H%M%S"
 
@@ -75,3 +77,33 @@ def logDownload(episode, filename, new_ep_quality, release_group=None, source=""
     action = episode.status
 
     _logHistoryItem(action, showid, season, epNum, quality, filename, provider, source)
+
+
+def logProcessedFile(file_path, file_stat, showid):
+    """
+    Remembers that a file was post processed so automatic post processing can skip it next time.
+
+    file_path: The path of the file that was processed
+    file_stat: The os.stat result for the file, taken before it was moved or copied
+    showid: The tvdb id of the show the file belonged to
+    """
+
+    logDate = datetime.datetime.today().strftime(dateFormat)
+
+    myDB = db.DBConnection()
+    myDB.action("INSERT OR REPLACE INTO processed_files (path, size, mtime, showid, date) VALUES (?,?,?,?,?)",
+                [file_path, file_stat.st_size, int(file_stat.st_mtime), showid, logDate])
+
+
+def wasProcessed(file_path):
+    """
+    Returns True if the file was post processed before and hasn't changed since then.
+    """
+
+    file_stat = ek.ek(os.stat, file_path)
+
+    myDB = db.DBConnection()
+    sql_results = myDB.select("SELECT 1 FROM processed_files WHERE path = ? AND size = ? AND mtime = ? LIMIT 1",
+                              [file_path, file_stat.st_size, int(file_stat.st_mtime)])
+
+    return len(sql_results) > 0
@@ -0,0 +1,261 @@
+# Author: Nic Wolfe <nic@wolfeden.ca>
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+urllib2 handlers which keep HTTP/HTTPS connections open after a request and reuse them for the next request to
+the same host instead of connecting (and doing the TLS handshake) all over again.
+"""
+
+from __future__ import with_statement
+
+import httplib
+import socket
+import threading
+import time
+import urllib
+import urllib2
+
+try:
+    import ssl
+except ImportError:
+    ssl = None
+
+import sickbeard
+
+from sickbeard import logger
+
+# connections that have been idle for longer than this are closed instead of reused, in seconds
+IDLE_TIMEOUT = 30
+
+# requests which can safely be sent again if a pooled connection turns out to be closed, anything else
+# (eg. a POST uploading an NZB) always gets a new connection so it's never sent twice
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE')
+
+# python 2.5's httplib can't set a timeout per connection, it just gets the regular urllib2 handlers
+POOLING_SUPPORTED = hasattr(socket, '_GLOBAL_DEFAULT_TIMEOUT')
+
+# one context for every connection which doesn't validate certificates so they can all be pooled together
+if ssl and hasattr(ssl, '_create_unverified_context'):
+    UNVERIFIED_CONTEXT = ssl._create_unverified_context()
+else:
+    UNVERIFIED_CONTEXT = None
+
+# (scheme, host, ssl context) -> list of (connection, time it went idle)
+_idle_connections = {}
+
+# host -> dict of request counters, see get_host_stats()
+_host_stats = {}
+
+_pool_lock = threading.Lock()
+
+
+def _get_connection(key, connection_class, timeout, reuse=True, **conn_args):
+    """
+    Returns an idle connection for key if there is one (and reuse is True), otherwise a new one.
+    The second value returned is True if the connection was reused.
+    """
+
+    now = time.time()
+
+    with _pool_lock:
+        idle = _idle_connections.get(key, [])
+        while idle and reuse:
+            conn, idle_since = idle.pop()
+
+            if now - idle_since > IDLE_TIMEOUT:
+                conn.close()
+                continue
+
+            conn.timeout = timeout
+            if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+                timeout = socket.getdefaulttimeout()
+            conn.sock.settimeout(timeout)
+
+            return (conn, True)
+
+    return (connection_class(key[1], timeout=timeout, **conn_args), False)
+
+
+def _release_connection(key, conn):
+    """
+    Puts conn back in the pool for the next request to its host, or closes it if the pool is full
+    """
+
+    with _pool_lock:
+        idle = _idle_connections.setdefault(key, [])
+
+        # the server might have closed it already
+        if conn.sock and len(idle) < sickbeard.HTTP_MAX_CONNECTIONS_PER_HOST:
+            idle.append((conn, time.time()))
+            return
+
+    conn.close()
+
+
+def _count_request(host, reused, duration, failed=False):
+    with _pool_lock:
+        if host not in _host_stats:
+            _host_stats[host] = {'requests': 0, 'reused': 0, 'failed': 0, 'time': 0.0}
+        stats = _host_stats[host]
+
+        stats['requests'] += 1
+        stats['time'] += duration
+        if reused:
+            stats['reused'] += 1
+        if failed:
+            stats['failed'] += 1
+
+
+def get_host_stats():
+    """
+    Returns a dict of host -> dict with the number of 'requests' made to the host, how many of them 'reused'
+    a pooled connection, how many 'failed' and the total 'time' in seconds spent waiting for the responses.
+    """
+
+    with _pool_lock:
+        return dict((host, dict(stats)) for (host, stats) in _host_stats.items())
+
+
+def close_all():
+    """
+    Closes all the idle connections in the pool
+    """
+
+    with _pool_lock:
+        for idle in _idle_connections.values():
+            for conn, idle_since in idle:
+                conn.close()
+        _idle_connections.clear()
+
+
+class _PooledResponse(urllib.addinfourl):
+    """
+    Response returned by the pooled handlers. Closing it gives the connection back to the pool.
+    """
+
+    def __init__(self, fp, headers, url, response, release):
+        urllib.addinfourl.__init__(self, fp, headers, url)
+        self._response = response
+        self._release = release
+
+    def close(self):
+        if self._release:
+            release = self._release
+            self._release = None
+
+            # httplib closes the response once it's read all of it off the socket, if there's anything left
+            # the connection can't be used for another request
+            fully_read = self._response.isclosed() or (not self._response.chunked and self._response.length == 0)
+
+            urllib.addinfourl.close(self)
+            release(fully_read)
+
+        else:
+            urllib.addinfourl.close(self)
+
+
+class _PooledHandlerMixin:
+
+    def _pooled_open(self, connection_class, req, **conn_args):
+        """
+        Same as urllib2.AbstractHTTPHandler.do_open() but takes the connection from the pool and asks the
+        server to keep it open afterwards.
+        """
+
+        host = req.get_host()
+        if not host:
+            raise urllib2.URLError('no host given')
+
+        # connections tunneled through a proxy aren't pooled
+        if not POOLING_SUPPORTED or getattr(req, '_tunnel_host', None):
+            return self.do_open(connection_class, req, **conn_args)
+
+        key = (req.get_type(), host, conn_args.get('context'))
+        method = req.get_method()
+        timeout = getattr(req, 'timeout', socket._GLOBAL_DEFAULT_TIMEOUT)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict((k, v) for k, v in req.headers.items() if k not in headers))
+        headers["Connection"] = "keep-alive"
+        headers = dict((name.title(), val) for name, val in headers.items())
+
+        while True:
+            conn, reused = _get_connection(key, connection_class, timeout, method in IDEMPOTENT_METHODS, **conn_args)
+            conn.set_debuglevel(self._debuglevel)
+
+            start_time = time.time()
+
+            try:
+                try:
+                    conn.request(method, req.get_selector(), req.data, headers)
+                except socket.error, e:
+                    conn.close()
+                    raise urllib2.URLError(e)
+
+                # buffering is new in python 2.7
+                try:
+                    r = conn.getresponse(buffering=True)
+                except TypeError:
+                    r = conn.getresponse()
+
+            except (urllib2.URLError, socket.error, httplib.HTTPException), e:
+                conn.close()
+
+                # the server can close a pooled connection whenever it likes, if it did just try a new one
+                if reused and not isinstance(e, socket.timeout) and not isinstance(getattr(e, 'reason', None), socket.timeout):
+                    logger.log(u"Pooled connection to " + host + " was closed, reconnecting", logger.DEBUG)
+                    continue
+
+                _count_request(host, reused, time.time() - start_time, failed=True)
+                raise
+
+            _count_request(host, reused, time.time() - start_time)
+            break
+
+        def release(fully_read):
+            if not fully_read:
+                conn.close()
+            _release_connection(key, conn)
+
+        # same wrapping as urllib2 does so the response has readline() etc
+        r.recv = r.read
+        fp = socket._fileobject(r, close=True)
+
+        resp = _PooledResponse(fp, r.msg, req.get_full_url(), r, release)
+        resp.code = r.status
+        resp.msg = r.reason
+        return resp
+
+
+class PooledHTTPHandler(_PooledHandlerMixin, urllib2.HTTPHandler):
+
+    def http_open(self, req):
+        return self._pooled_open(httplib.HTTPConnection, req)
+
+
+class PooledHTTPSHandler(_PooledHandlerMixin, urllib2.HTTPSHandler):
+
+    def __init__(self, context=None):
+        urllib2.HTTPSHandler.__init__(self)
+        self._pool_context = context
+
+    def https_open(self, req):
+        if self._pool_context is None:
+            return self._pooled_open(httplib.HTTPSConnection, req)
+        else:
+            return self._pooled_open(httplib.HTTPSConnection, req, context=self._pool_context)
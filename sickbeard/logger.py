@@ -19,8 +19,10 @@
 from __future__ import with_statement
 
 import os
+import re
 import sys
 import threading
+import Queue
 
 import logging
 
@@ -35,6 +37,15 @@ NUM_LOGS = 3
 # log size in bytes
 LOG_SIZE = 10000000  # 10 megs
 
+# number of messages that can wait for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = 10000
+
+# most messages the writer thread writes before flushing the file
+LOG_BATCH_SIZE = 500
+
+# how much of the log file is read at a time when reading it backwards
+LOG_READ_BLOCK_SIZE = 64 * 1024
+
 ERROR = logging.ERROR
 WARNING = logging.WARNING
 MESSAGE = logging.INFO
@@ -45,6 +56,34 @@ reverseNames = {u'ERROR': ERROR,
                 u'INFO': MESSAGE,
                 u'DEBUG': DEBUG}
 
+log_line_regex = re.compile("^(\d\d\d\d)\-(\d\d)\-(\d\d)\s*(\d\d)\:(\d\d):(\d\d)\s*([A-Z]+)\s*(.+?)\s*\:\:\s*(.*)$")
+
+
+class BatchedFileHandler(logging.FileHandler):
+    """
+    A file handler that only flushes when told to and keeps track of the file size as it goes,
+    so the writer thread can flush once per batch and rotate without stat-ing the file.
+    """
+
+    def __init__(self, filename, encoding=None):
+        logging.FileHandler.__init__(self, filename, encoding=encoding)
+        self.bytes_written = os.path.getsize(filename)
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        """
+        Flushes everything written since the last commit to disk
+        """
+        logging.StreamHandler.flush(self)
+        if self.stream:
+            self.bytes_written = self.stream.tell()
+
+    def close(self):
+        self.commit()
+        logging.FileHandler.close(self)
+
 
 class SBRotatingLogHandler(object):
 
@@ -56,20 +95,31 @@ class SBRotatingLogHandler(object):
         self.log_file_path = log_file
         self.cur_handler = None
 
-        self.writes_since_check = 0
+        # log records wait here for the writer thread, the lock guards the handlers it writes to
+        self.log_queue = Queue.Queue(LOG_QUEUE_SIZE)
+        self.writer_thread = None
+        self.writer_lock = threading.RLock()
+        self.dropped = 0
 
         self.log_lock = threading.Lock()
+
+        # the process the writer thread belongs to, a forked child (eg. --daemon) has to start its own
+        self.writer_pid = os.getpid()
         self.console_logging = False
 
+        # anything below this level is dropped before the message is even formatted
+        self.log_level = DEBUG
+
     def close_log(self, handler=None):
         if not handler:
             handler = self.cur_handler
 
         if handler:
-            sb_logger = logging.getLogger('sickbeard')
-            sb_logger.removeHandler(handler)
-            handler.flush()
-            handler.close()
+            with self.writer_lock:
+                sb_logger = logging.getLogger('sickbeard')
+                sb_logger.removeHandler(handler)
+                handler.flush()
+                handler.close()
 
     def initLogging(self, consoleLogging=False):
 
@@ -95,10 +145,11 @@ class SBRotatingLogHandler(object):
                 # add the handler to the root logger
                 logging.getLogger('sickbeard').addHandler(console)
 
-        self.log_file_path = os.path.join(sickbeard.LOG_DIR, self.log_file)
-        self.cur_handler = self._config_handler()
-        logging.getLogger('sickbeard').addHandler(self.cur_handler)
-        logging.getLogger('sickbeard').setLevel(logging.DEBUG)
+        with self.writer_lock:
+            self.log_file_path = os.path.join(sickbeard.LOG_DIR, self.log_file)
+            self.cur_handler = self._config_handler()
+            logging.getLogger('sickbeard').addHandler(self.cur_handler)
+            logging.getLogger('sickbeard').setLevel(logging.DEBUG)
 
         # already logging in new log folder, close the old handler
         if old_handler:
@@ -108,7 +159,7 @@ class SBRotatingLogHandler(object):
         """
         Configure a file handler to log at file_name and return it.
         """
-        file_handler = logging.FileHandler(self.log_file_path, encoding='utf-8')
+        file_handler = BatchedFileHandler(self.log_file_path, encoding='utf-8')
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-8s %(message)s', '%Y-%m-%d %H:%M:%S'))
         return file_handler
@@ -159,44 +210,157 @@ class SBRotatingLogHandler(object):
 
         sb_logger.addHandler(new_file_handler)
 
-    def log(self, toLog, logLevel=MESSAGE):
+    def setLevel(self, logLevel):
+        """
+        Changes the lowest level that gets logged, takes effect immediately
+        """
+        self.log_level = logLevel
 
-        with self.log_lock:
+    def isEnabledFor(self, logLevel):
+        return logLevel >= self.log_level
 
-            # check the size and see if we need to rotate
-            if self.writes_since_check >= 10:
-                if os.path.isfile(self.log_file_path) and os.path.getsize(self.log_file_path) >= LOG_SIZE:
-                    self._rotate_logs()
-                self.writes_since_check = 0
-            else:
-                self.writes_since_check += 1
+    def log(self, toLog, logLevel=MESSAGE, *args):
+        """
+        Logs toLog at logLevel. If args are given toLog is used as a format string and is only
+        filled in if the message is actually going to be logged, eg.
+
+            log(u"Found %s at %s", DEBUG, title, url)
+
+        The message is handed to the writer thread so this never waits on the disk. If the writer
+        can't keep up the message is dropped and counted instead.
+
+        toLog: the message or format string
+        logLevel: one of ERROR, WARNING, MESSAGE or DEBUG
+        args: values for the format string
+        """
+
+        if logLevel < self.log_level:
+            return
+
+        if args:
+            toLog = toLog % args
 
-            meThread = threading.currentThread().getName()
-            message = meThread + u" :: " + toLog
+        meThread = threading.currentThread().getName()
+        message = meThread + u" :: " + toLog
 
-            out_line = message
+        # add errors to the UI logger
+        if logLevel == ERROR:
+            classes.ErrorViewer.add(classes.UIError(message))
 
-            sb_logger = logging.getLogger('sickbeard')
+        # make the record here so it gets the time the message was logged, not written
+        record = logging.getLogger('sickbeard').makeRecord('sickbeard', logLevel, '(unknown file)', 0, message, None, None)
 
+        if self.writer_pid != os.getpid():
+            self._after_fork()
+
+        if not self.writer_thread or not self.writer_thread.isAlive():
+            self._start_writer()
+
+        try:
+            self.log_queue.put_nowait(record)
+        except Queue.Full:
+            with self.log_lock:
+                self.dropped += 1
+
+    def _after_fork(self):
+        """
+        Threads don't survive a fork, so the child gets new locks and a new queue (keeping whatever
+        the parent hadn't written yet) and starts its own writer thread the next time something is logged.
+        """
+
+        pending = list(self.log_queue.queue)
+
+        self.log_queue = Queue.Queue(LOG_QUEUE_SIZE)
+        for record in pending:
+            self.log_queue.put_nowait(record)
+
+        self.writer_lock = threading.RLock()
+        self.log_lock = threading.Lock()
+        self.writer_thread = None
+        self.writer_pid = os.getpid()
+
+        if self.cur_handler:
+            self.cur_handler.createLock()
+
+    def _start_writer(self):
+
+        with self.log_lock:
+            if self.writer_thread and self.writer_thread.isAlive():
+                return
+
+            self.writer_thread = threading.Thread(None, self._write_records, "LOGWRITER")
+            self.writer_thread.setDaemon(True)
+            self.writer_thread.start()
+
+    def _write_records(self):
+        """
+        Runs in the writer thread, writes the queued records in batches until it gets a None
+        """
+
+        sb_logger = logging.getLogger('sickbeard')
+
+        while True:
+            batch = [self.log_queue.get()]
             try:
-                if logLevel == DEBUG:
-                    sb_logger.debug(out_line)
-                elif logLevel == MESSAGE:
-                    sb_logger.info(out_line)
-                elif logLevel == WARNING:
-                    sb_logger.warning(out_line)
-                elif logLevel == ERROR:
-                    sb_logger.error(out_line)
-
-                    # add errors to the UI logger
-                    classes.ErrorViewer.add(classes.UIError(message))
-                else:
-                    sb_logger.log(logLevel, out_line)
-            except ValueError:
+                while len(batch) < LOG_BATCH_SIZE and batch[-1] is not None:
+                    batch.append(self.log_queue.get_nowait())
+            except Queue.Empty:
                 pass
 
+            with self.writer_lock:
+
+                with self.log_lock:
+                    dropped = self.dropped
+                    self.dropped = 0
+
+                if dropped:
+                    sb_logger.handle(sb_logger.makeRecord('sickbeard', WARNING, '(unknown file)', 0,
+                                                          u"LOGWRITER :: Log queue was full, dropped " + str(dropped) + u" messages", None, None))
+
+                for record in batch:
+                    if record is None:
+                        continue
+                    try:
+                        sb_logger.handle(record)
+                    except ValueError:
+                        pass
+
+                if self.cur_handler:
+                    self.cur_handler.commit()
+
+                    # check the size and see if we need to rotate
+                    if self.cur_handler.bytes_written >= LOG_SIZE:
+                        self._rotate_logs()
+
+            for record in batch:
+                self.log_queue.task_done()
+
+            if batch[-1] is None:
+                return
+
+    def flush(self):
+        """
+        Waits until everything logged so far has been written
+        """
+        if self.writer_thread:
+            self.log_queue.join()
+
+    def stop_writer(self):
+        """
+        Writes out whatever is still queued and stops the writer thread
+        """
+
+        with self.log_lock:
+            writer_thread = self.writer_thread
+            self.writer_thread = None
+
+        if writer_thread:
+            self.log_queue.put(None)
+            writer_thread.join(10)
+
     def log_error_and_exit(self, error_msg):
         log(error_msg, ERROR)
+        self.stop_writer()
 
         if not self.console_logging:
             sys.exit(error_msg.encode(sickbeard.SYS_ENCODING, 'xmlcharrefreplace'))
@@ -207,13 +371,128 @@ class SBRotatingLogHandler(object):
 sb_log_instance = SBRotatingLogHandler('sickbeard.log', NUM_LOGS, LOG_SIZE)
 
 
+def reverse_readlines(file_path, end_offset=None, block_size=LOG_READ_BLOCK_SIZE):
+    """
+    Reads a file backwards a block at a time and yields its lines last to first, so only as much
+    of the file is read as the caller actually consumes.
+
+    file_path: the file to read
+    end_offset: byte offset to start reading backwards from, None for the end of the file
+    block_size: how many bytes to read at a time
+
+    Yields: (offset, line) tuples, offset being where the line starts in the file and line being
+            the undecoded line including its line break
+    """
+
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        if end_offset is not None:
+            pos = max(0, min(pos, end_offset))
+
+        # the unterminated start of the lowest line read so far
+        remainder = ''
+        at_end = True
+
+        while pos > 0:
+            read_size = min(block_size, pos)
+            pos -= read_size
+            f.seek(pos)
+            block = f.read(read_size) + remainder
+
+            lines = block.split('\n')
+            remainder = lines.pop(0)
+            line_end = pos + len(block)
+
+            # there's no line after the last line break
+            if at_end and lines and not lines[-1]:
+                lines.pop()
+                line_end -= 1
+            at_end = False
+
+            for line in reversed(lines):
+                line_start = line_end - len(line)
+                yield line_start, line + '\n'
+                line_end = line_start - 1
+
+        if remainder:
+            yield 0, remainder + '\n'
+
+
+def read_log_lines(minLevel=MESSAGE, maxLines=500, offset=None):
+    """
+    Gets the newest log lines at or above minLevel, stopping as soon as maxLines have been found.
+    Lines that aren't log messages (eg. tracebacks) are kept if the message next to them is.
+
+    minLevel: lowest level to include
+    maxLines: most lines to return
+    offset: byte offset to continue from, as returned by an earlier call
+
+    Returns: a tuple of the lines (newest first, decoded) and the offset to pass in to get the
+             lines before them, None if the start of the log was reached
+    """
+
+    finalData = []
+    next_offset = None
+
+    log_file_path = sb_log_instance.log_file_path
+    if not os.path.isfile(log_file_path) or maxLines <= 0:
+        return finalData, next_offset
+
+    lastLine = False
+
+    for line_start, x in reverse_readlines(log_file_path, offset):
+
+        x = x.decode('utf-8')
+        match = log_line_regex.match(x)
+
+        if match:
+            level = match.group(7)
+            if level not in reverseNames:
+                lastLine = False
+                continue
+
+            if reverseNames[level] >= minLevel:
+                lastLine = True
+                finalData.append(x)
+            else:
+                lastLine = False
+                continue
+
+        elif lastLine:
+            finalData.append("AA" + x)
+
+        if len(finalData) >= maxLines:
+            next_offset = line_start
+            break
+
+    # nothing left before the last line we looked at
+    if next_offset == 0:
+        next_offset = None
+
+    return finalData, next_offset
+
+
 def close():
+    sb_log_instance.stop_writer()
     sb_log_instance.close_log()
 
 
+def flush():
+    sb_log_instance.flush()
+
+
 def log_error_and_exit(error_msg):
     sb_log_instance.log_error_and_exit(error_msg)
 
 
-def log(toLog, logLevel=MESSAGE):
-    sb_log_instance.log(toLog, logLevel)
+def log(toLog, logLevel=MESSAGE, *args):
+    sb_log_instance.log(toLog, logLevel, *args)
+
+
+def set_level(logLevel):
+    sb_log_instance.setLevel(logLevel)
+
+
+def is_enabled_for(logLevel):
+    return sb_log_instance.isEnabledFor(logLevel)
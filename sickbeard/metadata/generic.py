@@ -19,6 +19,7 @@
 from __future__ import with_statement
 
 import os.path
+import threading
 
 try:
     import xml.etree.cElementTree as etree
@@ -37,6 +38,48 @@ from sickbeard.exceptions import ex
 
 from lib.tvdb_api import tvdb_api, tvdb_exceptions
 
+# the FolderListing (if any) the metadata providers should check for files in on each thread
+_folder_listing = threading.local()
+
+
+def use_folder_listing(folder_listing):
+    """
+    Makes the metadata providers on this thread look up their files in folder_listing (a helpers.FolderListing)
+    instead of checking the disk for each one. Pass None to go back to checking the disk.
+
+    Returns the listing that was in use before so it can be put back afterwards.
+    """
+
+    old_listing = getattr(_folder_listing, 'listing', None)
+    _folder_listing.listing = folder_listing
+
+    return old_listing
+
+
+def file_exists(file_path):
+    """
+    Checks if a metadata file exists, same as os.path.isfile. If use_folder_listing gave the thread a folder
+    listing then files it doesn't have are known to be missing without checking the disk.
+    """
+
+    folder_listing = getattr(_folder_listing, 'listing', None)
+
+    if folder_listing is not None and not folder_listing.mightExist(file_path):
+        return False
+
+    return ek.ek(os.path.isfile, file_path)
+
+
+def file_written(file_path):
+    """
+    Lets the thread's folder listing (if any) know that a metadata file was just written
+    """
+
+    folder_listing = getattr(_folder_listing, 'listing', None)
+
+    if folder_listing is not None:
+        folder_listing.added(file_path)
+
 
 class GenericMetadata():
     """
@@ -116,58 +159,58 @@ class GenericMetadata():
         self.season_all_banner = config_list[9]
 
     def _has_show_metadata(self, show_obj):
-        result = ek.ek(os.path.isfile, self.get_show_file_path(show_obj))
+        result = file_exists(self.get_show_file_path(show_obj))
         logger.log(u"Checking if " + self.get_show_file_path(show_obj) + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_episode_metadata(self, ep_obj):
-        result = ek.ek(os.path.isfile, self.get_episode_file_path(ep_obj))
+        result = file_exists(self.get_episode_file_path(ep_obj))
         logger.log(u"Checking if " + self.get_episode_file_path(ep_obj) + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_fanart(self, show_obj):
-        result = ek.ek(os.path.isfile, self.get_fanart_path(show_obj))
+        result = file_exists(self.get_fanart_path(show_obj))
         logger.log(u"Checking if " + self.get_fanart_path(show_obj) + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_poster(self, show_obj):
-        result = ek.ek(os.path.isfile, self.get_poster_path(show_obj))
+        result = file_exists(self.get_poster_path(show_obj))
         logger.log(u"Checking if " + self.get_poster_path(show_obj) + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_banner(self, show_obj):
-        result = ek.ek(os.path.isfile, self.get_banner_path(show_obj))
+        result = file_exists(self.get_banner_path(show_obj))
         logger.log(u"Checking if " + self.get_banner_path(show_obj) + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_episode_thumb(self, ep_obj):
         location = self.get_episode_thumb_path(ep_obj)
-        result = location is not None and ek.ek(os.path.isfile, location)
+        result = location is not None and file_exists(location)
         if location:
             logger.log(u"Checking if " + location + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_season_poster(self, show_obj, season):
         location = self.get_season_poster_path(show_obj, season)
-        result = location is not None and ek.ek(os.path.isfile, location)
+        result = location is not None and file_exists(location)
         if location:
             logger.log(u"Checking if " + location + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_season_banner(self, show_obj, season):
         location = self.get_season_banner_path(show_obj, season)
-        result = location is not None and ek.ek(os.path.isfile, location)
+        result = location is not None and file_exists(location)
         if location:
             logger.log(u"Checking if " + location + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_season_all_poster(self, show_obj):
-        result = ek.ek(os.path.isfile, self.get_season_all_poster_path(show_obj))
+        result = file_exists(self.get_season_all_poster_path(show_obj))
         logger.log(u"Checking if " + self.get_season_all_poster_path(show_obj) + " exists: " + str(result), logger.DEBUG)
         return result
 
     def _has_season_all_banner(self, show_obj):
-        result = ek.ek(os.path.isfile, self.get_season_all_banner_path(show_obj))
+        result = file_exists(self.get_season_all_banner_path(show_obj))
         logger.log(u"Checking if " + self.get_season_all_banner_path(show_obj) + " exists: " + str(result), logger.DEBUG)
         return result
 
@@ -191,7 +234,7 @@ class GenericMetadata():
         Returns the path where the episode thumbnail should be stored.
         ep_obj: a TVEpisode instance for which to create the thumbnail
         """
-        if ek.ek(os.path.isfile, ep_obj.location):
+        if file_exists(ep_obj.location):
 
             tbn_filename = ep_obj.location.rpartition(".")
 
@@ -406,6 +449,7 @@ class GenericMetadata():
             data.write(nfo_file, encoding="utf-8")
             nfo_file.close()
             helpers.chmodAsParent(nfo_file_path)
+            file_written(nfo_file_path)
         except IOError, e:
             logger.log(u"Unable to write file to " + nfo_file_path + " - are you sure the folder is writable? " + ex(e), logger.ERROR)
             return False
@@ -451,6 +495,7 @@ class GenericMetadata():
             data.write(nfo_file, encoding="utf-8")
             nfo_file.close()
             helpers.chmodAsParent(nfo_file_path)
+            file_written(nfo_file_path)
         except IOError, e:
             logger.log(u"Unable to write file to " + nfo_file_path + " - are you sure the folder is writable? " + ex(e), logger.ERROR)
             return False
@@ -676,7 +721,7 @@ class GenericMetadata():
         """
 
         # don't bother overwriting it
-        if ek.ek(os.path.isfile, image_path):
+        if file_exists(image_path):
             logger.log(u"Image already exists, not downloading", logger.DEBUG)
             return False
 
@@ -696,6 +741,7 @@ class GenericMetadata():
             outFile.write(image_data)
             outFile.close()
             helpers.chmodAsParent(image_path)
+            file_written(image_path)
         except IOError, e:
             logger.log(u"Unable to write image to " + image_path + " - are you sure the show folder is writable? " + ex(e), logger.ERROR)
             return False
@@ -113,7 +113,7 @@ class PS3Metadata(generic.GenericMetadata):
 
         ep_obj: a TVEpisode instance for which to create the thumbnail
         """
-        if ek.ek(os.path.isfile, ep_obj.location):
+        if generic.file_exists(ep_obj.location):
             tbn_filename = ep_obj.location + ".cover.jpg"
         else:
             return None
@@ -16,6 +16,7 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+import generic
 import xbmc_12plus
 
 import os
@@ -96,7 +97,7 @@ class XBMCMetadata(xbmc_12plus.XBMC_12PlusMetadata):
 
         ep_obj: a TVEpisode instance for which to create the thumbnail
         """
-        if ek.ek(os.path.isfile, ep_obj.location):
+        if generic.file_exists(ep_obj.location):
             tbn_filename = helpers.replaceExtension(ep_obj.location, 'tbn')
         else:
             return None
@@ -367,11 +367,11 @@ class NameParserCache(object):
         self._previous_parsed_list.append(name)
         while len(self._previous_parsed_list) > self._cache_size:
             del_me = self._previous_parsed_list.pop(0)
-            self._previous_parsed.pop(del_me)
+            self._previous_parsed.pop(del_me, None)
 
     def get(self, name):
         if name in self._previous_parsed:
-            logger.log(u"Using cached parse result for: " + name, logger.DEBUG)
+            logger.log(u"Using cached parse result for: %s", logger.DEBUG, name)
             return self._previous_parsed[name]
         else:
             return None
@@ -16,6 +16,11 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
+import threading
+import time
+
 import sickbeard
 
 import xbmc
@@ -84,25 +89,184 @@ notifiers = [
 ]
 
 
-def notify_download(ep_name):
-    for n in notifiers:
+# how many notifiers can be sending something at the same time
+MAX_NOTIFIER_THREADS = 4
+
+# how long a notifier can take before we stop waiting for it, in seconds
+NOTIFIER_TIMEOUT = 60
+
+# library updates for a show are held back this long in case more of its episodes come along, in seconds
+LIBRARY_UPDATE_DELAY = 15
+
+# but never for longer than this in total, in seconds
+LIBRARY_UPDATE_MAX_DELAY = 120
+
+
+class NotifierJob:
+    """
+    A call to one notifier, waiting to be made by the NotifierQueue
+    """
+
+    def __init__(self, notifier, method, args=(), kwargs={}, delay=0):
+        self.notifier = notifier
+        self.method = method
+        self.args = args
+        self.kwargs = dict(kwargs)
+
+        self.added = time.time()
+        self.due = self.added + delay
+
+    def execute(self):
         try:
-            n.notify_download(ep_name)
+            getattr(self.notifier, self.method)(*self.args, **self.kwargs)
         except Exception, e:
-            logger.log(n.__class__.__name__ + ": " + ex(e), logger.ERROR)
+            logger.log(self.notifier.__class__.__name__ + ": " + ex(e), logger.ERROR)
+
+
+class NotifierQueue:
+    """
+    Calls the notifiers in the background so post processing and searching don't have to wait for them.
+
+    Up to MAX_NOTIFIER_THREADS different notifiers are called at the same time, calls to the same notifier are
+    made one at a time in the order they were queued. Notifiers that update the library for a whole show at
+    once (coalesce_library_updates) only get one update per show for all the episodes that come in together.
+    A notifier that stops responding only holds up its own calls.
+    """
+
+    def __init__(self):
+        self.amActive = False
+
+        self.queue = []
+
+        # (thread, job, start time) for every job that's running right now
+        self.running = []
+
+        # (thread, job) for jobs that took too long, their notifiers get nothing else until they're done
+        self.abandoned = []
+
+        self.lock = threading.Lock()
+
+    def add_job(self, job):
+        with self.lock:
+            self.queue.append(job)
+
+    def add_library_update(self, notifier, ep_obj):
+
+        with self.lock:
+            now = time.time()
+
+            for cur_job in self.queue:
+                if cur_job.notifier is notifier and cur_job.method == 'update_library' and cur_job.kwargs['ep_obj'].show is ep_obj.show:
+                    logger.log(u"Combining the " + notifier.__class__.__name__ + " library update for " + ep_obj.prettyName() + " with the one that's already waiting", logger.DEBUG)
+                    cur_job.kwargs['ep_obj'] = ep_obj
+                    cur_job.due = min(now + LIBRARY_UPDATE_DELAY, cur_job.added + LIBRARY_UPDATE_MAX_DELAY)
+                    return
+
+            self.queue.append(NotifierJob(notifier, 'update_library', kwargs={'ep_obj': ep_obj}, delay=LIBRARY_UPDATE_DELAY))
+
+    def run(self, flush=False):
+        """
+        Starts the jobs that are due. If flush is True jobs are started as soon as their notifier is free,
+        no matter when they're due or how many threads are running.
+        """
+
+        self.amActive = True
+
+        with self.lock:
+            now = time.time()
+
+            for cur_thread, cur_job, cur_start in self.running[:]:
+                if not cur_thread.isAlive():
+                    self.running.remove((cur_thread, cur_job, cur_start))
+
+                # it can't be stopped but it doesn't have to hold up the other notifiers
+                elif now - cur_start > NOTIFIER_TIMEOUT:
+                    logger.log(cur_job.notifier.__class__.__name__ + u" is taking more than " + str(NOTIFIER_TIMEOUT) + " seconds, not waiting for it anymore", logger.WARNING)
+                    self.running.remove((cur_thread, cur_job, cur_start))
+                    self.abandoned.append((cur_thread, cur_job))
+
+            self.abandoned = [x for x in self.abandoned if x[0].isAlive()]
+
+            # a notifier stays busy until its call returns, even one we've stopped waiting for
+            busy_notifiers = [x[1].notifier for x in self.running + self.abandoned]
+
+            for cur_job in self.queue[:]:
+
+                if cur_job.notifier in busy_notifiers:
+                    continue
+
+                if not flush:
+                    if len(self.running) >= MAX_NOTIFIER_THREADS:
+                        break
+
+                    if cur_job.due > now:
+                        continue
+
+                busy_notifiers.append(cur_job.notifier)
+
+                cur_thread = threading.Thread(None, cur_job.execute, "NOTIFIERS-" + cur_job.notifier.__class__.__name__)
+                cur_thread.setDaemon(True)
+                cur_thread.start()
+
+                self.running.append((cur_thread, cur_job, now))
+                self.queue.remove(cur_job)
+
+        self.amActive = False
+
+    def flush(self, timeout=10):
+        """
+        Runs everything that's waiting and gives it up to timeout seconds to finish, for shutting down.
+        """
+
+        end_time = time.time() + timeout
+
+        while time.time() < end_time:
+            self.run(flush=True)
+
+            with self.lock:
+                running = [x[0] for x in self.running]
+                if not running and not self.queue:
+                    break
+
+                # what's left might be waiting for a notifier that's stuck
+                running += [x[0] for x in self.abandoned]
+
+            for cur_thread in running:
+                cur_thread.join(max(0, end_time - time.time()))
+
+
+notifier_queue = NotifierQueue()
+
+
+def _queue_running():
+    return sickbeard.notifierQueueScheduler is not None and sickbeard.notifierQueueScheduler.thread is not None \
+        and sickbeard.notifierQueueScheduler.thread.isAlive()
+
+
+def _notify(notifier, method, *args, **kwargs):
+
+    job = NotifierJob(notifier, method, args, kwargs)
+
+    # until the queue is running (or after it's been stopped) the notifiers are called right away
+    if _queue_running():
+        notifier_queue.add_job(job)
+    else:
+        job.execute()
+
+
+def notify_download(ep_name):
+    for n in notifiers:
+        _notify(n, 'notify_download', ep_name)
 
 
 def notify_snatch(ep_name):
     for n in notifiers:
-        try:
-            n.notify_snatch(ep_name)
-        except Exception, e:
-            logger.log(n.__class__.__name__ + ": " + ex(e), logger.ERROR)
+        _notify(n, 'notify_snatch', ep_name)
 
 
 def update_library(ep_obj):
     for n in notifiers:
-        try:
-            n.update_library(ep_obj=ep_obj)
-        except Exception, e:
-            logger.log(n.__class__.__name__ + ": " + ex(e), logger.ERROR)
+        if _queue_running() and getattr(n, 'coalesce_library_updates', False):
+            notifier_queue.add_library_update(n, ep_obj)
+        else:
+            _notify(n, 'update_library', ep_obj=ep_obj)
@@ -32,6 +32,10 @@ except ImportError:
 
 
 class NMJNotifier:
+
+    # the whole library gets scanned, one update is enough for several episodes in a row
+    coalesce_library_updates = True
+
     def notify_settings(self, host):
         """
         Retrieves the settings from a NMJ/Popcorn Hour
@@ -32,6 +32,9 @@ except ImportError:
 
 class NMJv2Notifier:
 
+    # the whole library gets scanned, one update is enough for several episodes in a row
+    coalesce_library_updates = True
+
     def notify_settings(self, host, dbloc, instance):
         """
         Retrieves the NMJv2 database location from Popcorn Hour
@@ -33,6 +33,9 @@ except ImportError:
 
 class PLEXNotifier:
 
+    # the whole library gets scanned, one update is enough for several episodes in a row
+    coalesce_library_updates = True
+
     def _send_to_plex(self, command, host, username=None, password=None):
         """Handles communication to Plex hosts via HTTP API
 
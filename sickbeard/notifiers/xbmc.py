@@ -38,11 +38,21 @@ try:
 except ImportError:
     from lib import simplejson as json
 
+# how long (in seconds) the detected API version of a host is remembered
+XBMC_VERSION_CACHE_TIME = 3600
+
 
 class XBMCNotifier:
 
     sb_logo_url = "http://www.sickbeard.com/notify.png"
 
+    # XBMC scans the whole show folder, one update is enough for several episodes in a row
+    coalesce_library_updates = True
+
+    def __init__(self):
+        # (host, username) -> (API version, time it was detected)
+        self._versions = {}
+
     def _get_xbmc_version(self, host, username, password):
         """Returns XBMC JSON-RPC API version (odd # = dev, even # = stable)
 
@@ -70,6 +80,12 @@ class XBMCNotifier:
 
         """
 
+        cacheKey = (host, username)
+        if cacheKey in self._versions:
+            version, detected = self._versions[cacheKey]
+            if time.time() - detected < XBMC_VERSION_CACHE_TIME:
+                return version
+
         # since we need to maintain python 2.5 compatibility we can not pass a timeout delay to urllib2 directly (python 2.6+)
         # override socket timeout to reduce delay for this call alone
         socket.setdefaulttimeout(10)
@@ -81,17 +97,22 @@ class XBMCNotifier:
         socket.setdefaulttimeout(sickbeard.SOCKET_TIMEOUT)
 
         if result:
-            return result["result"]["version"]
+            version = result["result"]["version"]
         else:
             # fallback to legacy HTTPAPI method
             testCommand = {'command': 'Help'}
             request = self._send_to_xbmc(testCommand, host, username, password)
             if request:
                 # return a fake version number, so it uses the legacy method
-                return 1
+                version = 1
             else:
+                # don't remember unreachable hosts, they might just be turned off
+                self._versions.pop(cacheKey, None)
                 return False
 
+        self._versions[cacheKey] = (version, time.time())
+        return version
+
     def _notify(self, message, title="Sick Beard", host=None, username=None, password=None, force=False):
         """Internal wrapper for the notify_snatch and notify_download functions
 
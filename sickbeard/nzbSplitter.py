@@ -20,6 +20,7 @@ from __future__ import with_statement
 
 import xml.etree.cElementTree as etree
 import xml.etree
+import cStringIO
 import re
 
 from name_parser.parser import NameParser, InvalidNameException
@@ -30,17 +31,24 @@ from sickbeard import encodingKludge as ek
 from sickbeard.exceptions import ex
 
 
-def getSeasonNZBs(name, urlData, season):
+def getSeasonNZBs(name, nzbFile, season):
+    """
+    Splits the files in a season NZB up by episode.
 
-    try:
-        showXML = etree.ElementTree(etree.XML(urlData))
-    except SyntaxError:
-        logger.log(u"Unable to parse the XML of " + name + ", not splitting it", logger.ERROR)
-        return ({}, '')
+    The NZB is parsed as it's read and every <file> is written to the NZB of its episode as soon as it's
+    complete, then thrown away. The whole season is never in memory as a tree.
 
-    filename = name.replace(".nzb", "")
+    name: The name of the season NZB
+    nzbFile: A file-like object (or string) to read the NZB from
+    season: The season number
+
+    Returns a tuple of a dict of episode name -> NZB data and the xmlns of the NZB
+    """
+
+    if isinstance(nzbFile, basestring):
+        nzbFile = cStringIO.StringIO(nzbFile)
 
-    nzbElement = showXML.getroot()
+    filename = name.replace(".nzb", "")
 
     regex = '([\w\._\ ]+)[\. ]S%02d[\. ]([\w\._\-\ ]+)[\- ]([\w_\-\ ]+?)' % season
 
@@ -57,35 +65,65 @@ def getSeasonNZBs(name, urlData, season):
     epFiles = {}
     xmlns = None
 
-    for curFile in nzbElement.getchildren():
-        xmlnsMatch = re.match("\{(http:\/\/[A-Za-z0-9_\.\/]+\/nzb)\}file", curFile.tag)
-        if not xmlnsMatch:
-            continue
-        else:
-            xmlns = xmlnsMatch.group(1)
-        match = re.search(regex, curFile.get("subject"), re.I)
-        if not match:
-            #print curFile.get("subject"), "doesn't match", regex
-            continue
-        curEp = match.group(1)
-        if curEp not in epFiles:
-            epFiles[curEp] = [curFile]
-        else:
-            epFiles[curEp].append(curFile)
+    root = None
+    depth = 0
 
-    return (epFiles, xmlns)
+    try:
+        for event, curElement in etree.iterparse(nzbFile, events=('start', 'end')):
+
+            if event == 'start':
+                if root is None:
+                    root = curElement
+                depth += 1
+                continue
+
+            depth -= 1
+
+            # only the direct children of <nzb> are files, anything deeper is part of one
+            if depth != 1:
+                continue
+
+            # it's complete, we don't need it in the tree anymore
+            root.remove(curElement)
+
+            xmlnsMatch = re.match("\{(http:\/\/[A-Za-z0-9_\.\/]+\/nzb)\}file", curElement.tag)
+            if not xmlnsMatch:
+                continue
+            else:
+                xmlns = xmlnsMatch.group(1)
+            match = re.search(regex, curElement.get("subject"), re.I)
+            if not match:
+                #print curElement.get("subject"), "doesn't match", regex
+                continue
+            curEp = match.group(1)
+            if curEp not in epFiles:
+                epFiles[curEp] = cStringIO.StringIO()
+
+            # whatever comes after the file might not have been parsed yet, leave it out so the result is always the same
+            curElement.tail = None
+            epFiles[curEp].write(xml.etree.ElementTree.tostring(stripNS(curElement, xmlns), 'utf-8'))
+
+    except SyntaxError:
+        logger.log(u"Unable to parse the XML of " + name + ", not splitting it", logger.ERROR)
+        return ({}, '')
 
+    epNZBs = {}
+    for curEp in epFiles:
+        epNZBs[curEp] = createNZBString(epFiles[curEp].getvalue(), xmlns)
+        epFiles[curEp].close()
 
-def createNZBString(fileElements, xmlns):
+    return (epNZBs, xmlns)
 
-    rootElement = etree.Element("nzb")
-    if xmlns:
-        rootElement.set("xmlns", xmlns)
 
-    for curFile in fileElements:
-        rootElement.append(stripNS(curFile, xmlns))
+def createNZBString(fileData, xmlns):
+    """
+    Wraps the XML of some <file> elements in an <nzb> element
+    """
 
-    return xml.etree.ElementTree.tostring(rootElement, 'utf-8')
+    if xmlns:
+        return '<nzb xmlns="' + xmlns + '">' + fileData + '</nzb>'
+    else:
+        return '<nzb>' + fileData + '</nzb>'
 
 
 def saveNZB(nzbName, nzbString):
@@ -108,12 +146,6 @@ def stripNS(element, ns):
 
 def splitResult(result):
 
-    urlData = helpers.getURL(result.url)
-
-    if urlData is None:
-        logger.log(u"Unable to load url " + result.url + ", can't download season NZB", logger.ERROR)
-        return False
-
     # parse the season ep name
     try:
         np = NameParser(False)
@@ -122,10 +154,22 @@ def splitResult(result):
         logger.log(u"Unable to parse the filename " + result.name + " into a valid episode", logger.WARNING)
         return False
 
-    # bust it up
+    urlFileLike = helpers.getURLFileLike(result.url)
+
+    if urlFileLike is None:
+        logger.log(u"Unable to load url " + result.url + ", can't download season NZB", logger.ERROR)
+        return False
+
+    # bust it up as it downloads
     season = parse_result.season_number if parse_result.season_number != None else 1
 
-    separateNZBs, xmlns = getSeasonNZBs(result.name, urlData, season)
+    try:
+        separateNZBs, xmlns = getSeasonNZBs(result.name, helpers.DecodedURLFileLike(urlFileLike), season)  # @UnusedVariable
+    except Exception, e:
+        logger.log(u"Error while downloading " + result.url + ": " + ex(e), logger.ERROR)
+        return False
+    finally:
+        urlFileLike.close()
 
     resultList = []
 
@@ -168,7 +212,7 @@ def splitResult(result):
         curResult.name = newNZB
         curResult.provider = result.provider
         curResult.quality = result.quality
-        curResult.extraInfo = [createNZBString(separateNZBs[newNZB], xmlns)]
+        curResult.extraInfo = [separateNZBs[newNZB]]
 
         resultList.append(curResult)
 
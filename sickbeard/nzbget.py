@@ -17,8 +17,11 @@
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
 
+from __future__ import with_statement
+
 import httplib
 import datetime
+import threading
 import urllib
 import urlparse
 
@@ -30,12 +33,36 @@ import xmlrpclib
 from sickbeard.exceptions import ex
 from sickbeard.providers.generic import GenericProvider
 from sickbeard import config
+from sickbeard import helpers
 from sickbeard import logger
 from common import Quality
 
+# how long to wait between sending two NZBs to NZBGet, in seconds
+SEND_INTERVAL = 1
+
+_send_limiter = helpers.RateLimiter(SEND_INTERVAL)
+
+# url -> ServerProxy, they keep their connection to NZBGet open between NZBs but can only be used by one thread at a time
+_rpc_proxies = {}
+_rpc_lock = threading.Lock()
+
+
+def _getRPC(url):
+    if url not in _rpc_proxies:
+        _rpc_proxies[url] = xmlrpclib.ServerProxy(url)
+    return _rpc_proxies[url]
+
 
 def sendNZB(nzb):
 
+    _send_limiter.wait()
+
+    with _rpc_lock:
+        return _sendNZB(nzb)
+
+
+def _sendNZB(nzb):
+
     if not sickbeard.NZBGET_HOST:
         logger.log(u"No NZBGet host found in configuration. Please configure it.", logger.ERROR)
         return False
@@ -55,7 +82,7 @@ def sendNZB(nzb):
         logger.log(u"Sending NZB to NZBGet: %s" % nzb.name)
         logger.log(u"NZBGet URL: " + url, logger.DEBUG)
 
-        nzbGetRPC = xmlrpclib.ServerProxy(url.encode("utf-8", 'ignore'))
+        nzbGetRPC = _getRPC(url.encode("utf-8", 'ignore'))
 
         if nzbGetRPC.writelog("INFO", "SickBeard connected to drop off " + nzb_filename + " any moment now."):
             logger.log(u"Successful connected to NZBGet", logger.DEBUG)
@@ -21,6 +21,8 @@ from __future__ import with_statement
 import os
 import re
 import subprocess
+import threading
+import time
 
 import sickbeard
 
@@ -42,6 +44,20 @@ from sickbeard.name_parser.parser import NameParser, InvalidNameException
 
 from lib.tvdb_api import tvdb_api, tvdb_exceptions
 
+# tvdb_id -> lock held while a file is being moved into that show
+show_locks = {}
+show_locks_lock = threading.Lock()
+
+
+def get_show_lock(tvdb_id):
+    """
+    Returns the lock which makes sure only one file at a time is post processed into the given show
+    """
+    with show_locks_lock:
+        if tvdb_id not in show_locks:
+            show_locks[tvdb_id] = threading.Lock()
+        return show_locks[tvdb_id]
+
 
 class PostProcessor(object):
     """
@@ -89,6 +105,9 @@ class PostProcessor(object):
 
         self.is_proper = False
 
+        # folder contents shared by all the associated file lookups of this run
+        self.folder_listing = helpers.FolderListing()
+
         self.log = ''
 
     def _log(self, message, level=logger.MESSAGE):
@@ -153,7 +172,7 @@ class PostProcessor(object):
         # figure out which files we want to delete
         file_list = [file_path]
         if associated_files:
-            file_list = file_list + helpers.list_associated_files(file_path, base_name_only=True)
+            file_list = file_list + helpers.list_associated_files(file_path, base_name_only=True, folder_listing=self.folder_listing)
 
         if not file_list:
             self._log(u"There were no files associated with " + file_path + ", not deleting anything", logger.DEBUG)
@@ -164,6 +183,7 @@ class PostProcessor(object):
             if ek.ek(os.path.isfile, cur_file):
                 self._log(u"Deleting file " + cur_file, logger.DEBUG)
                 ek.ek(os.remove, cur_file)
+                self.folder_listing.removed(cur_file)
                 # do the library update for synoindex
                 notifiers.synoindex_notifier.deleteFile(cur_file)
 
@@ -185,7 +205,7 @@ class PostProcessor(object):
 
         file_list = [file_path]
         if associated_files:
-            file_list = file_list + helpers.list_associated_files(file_path, filter_ext=sickbeard.FILTER_ASSOCIATED_FILES)
+            file_list = file_list + helpers.list_associated_files(file_path, filter_ext=sickbeard.FILTER_ASSOCIATED_FILES, folder_listing=self.folder_listing)
 
         if not file_list:
             self._log(u"There were no files associated with " + file_path + ", not moving anything", logger.DEBUG)
@@ -214,7 +234,29 @@ class PostProcessor(object):
 
             new_file_path = ek.ek(os.path.join, new_path, new_file_name)
 
+            cur_file_size = ek.ek(os.path.getsize, cur_file_path)
+            start_time = time.time()
+
             action(cur_file_path, new_file_path)
+            self.folder_listing.added(new_file_path)
+
+            self._log_transfer(cur_file_size, time.time() - start_time)
+
+    def _log_transfer(self, file_size, duration):
+        """
+        Logs how long a file operation took and how fast it was.
+
+        file_size: The size of the file in bytes
+        duration: How long the operation took in seconds
+        """
+
+        size_mb = file_size / 1048576.0
+        if duration > 0:
+            speed = u"%.1f MB/s" % (size_mb / duration)
+        else:
+            speed = u"instant"
+
+        self._log(u"Transferred %.1f MB in %.2f seconds (%s)" % (size_mb, duration, speed), logger.DEBUG)
 
     def _move(self, file_path, new_path, new_base_name, associated_files=False):
         """
@@ -230,6 +272,7 @@ class PostProcessor(object):
             try:
                 helpers.moveFile(cur_file_path, new_file_path)
                 helpers.chmodAsParent(new_file_path)
+                self.folder_listing.removed(cur_file_path)
             except (IOError, OSError), e:
                 self._log(u"Unable to move file " + cur_file_path + " to " + new_file_path + ": " + ex(e), logger.ERROR)
                 raise e
@@ -256,6 +299,26 @@ class PostProcessor(object):
 
         self._combined_file_operation(file_path, new_path, new_base_name, associated_files, action=_int_copy)
 
+    def _hardlink(self, file_path, new_path, new_base_name, associated_files=False):
+        """
+        file_path: The full path of the media file to link
+        new_path: Destination path where we want to link the file to
+        new_base_name: The base filename (no extension) to use for the link. Use None to keep the same name.
+        associated_files: Boolean, whether we should link similarly-named files too
+        """
+
+        def _int_hardlink(cur_file_path, new_file_path):
+
+            self._log(u"Hard linking file from " + cur_file_path + " to " + new_file_path, logger.DEBUG)
+            try:
+                helpers.hardlinkFile(cur_file_path, new_file_path)
+                helpers.chmodAsParent(new_file_path)
+            except (IOError, OSError), e:
+                self._log(u"Unable to link file " + cur_file_path + " to " + new_file_path + ": " + ex(e), logger.ERROR)
+                raise e
+
+        self._combined_file_operation(file_path, new_path, new_base_name, associated_files, action=_int_hardlink)
+
     def _history_lookup(self):
         """
         Look up the NZB name in the history and see if it contains a record for self.nzb_name
@@ -732,6 +795,20 @@ class PostProcessor(object):
             self._log(u"Quitting post-processing", logger.DEBUG)
             return False
 
+        # other files may be processed at the same time, don't let two of them work on the same show dir and episodes
+        with get_show_lock(tvdb_id):
+            return self._process_episode(tvdb_id, season, episodes, quality)
+
+    def _process_episode(self, tvdb_id, season, episodes, quality):
+        """
+        Replaces the existing episode(s) with the file being processed. The caller must hold the show's lock.
+
+        tvdb_id: The TVDBID of the show (int)
+        season: The season of the episode (int)
+        episodes: A list of episodes to find (list of ints)
+        quality: The quality from the snatch history, None if unknown
+        """
+
         # retrieve/create the corresponding TVEpisode objects
         ep_obj = self._get_ep_obj(tvdb_id, season, episodes)
 
@@ -806,6 +883,9 @@ class PostProcessor(object):
         if not helpers.make_dirs(dest_path):
             raise exceptions.PostProcessingFailed(u"Unable to create destination folder: " + dest_path)
 
+        # remember what the file looked like before we move it
+        file_stat = ek.ek(os.stat, self.file_path)
+
         # figure out the base name of the resulting episode file
         if sickbeard.RENAME_EPISODES:
             orig_extension = self.file_name.rpartition('.')[-1]
@@ -819,7 +899,9 @@ class PostProcessor(object):
 
         try:
             # move the episode and associated files to the show dir
-            if sickbeard.KEEP_PROCESSED_DIR:
+            if sickbeard.KEEP_PROCESSED_DIR and sickbeard.PROCESS_METHOD == 'hardlink':
+                self._hardlink(self.file_path, dest_path, new_base_name, sickbeard.MOVE_ASSOCIATED_FILES)
+            elif sickbeard.KEEP_PROCESSED_DIR:
                 self._copy(self.file_path, dest_path, new_base_name, sickbeard.MOVE_ASSOCIATED_FILES)
             else:
                 self._move(self.file_path, dest_path, new_base_name, sickbeard.MOVE_ASSOCIATED_FILES)
@@ -834,6 +916,7 @@ class PostProcessor(object):
 
         # log it to history
         history.logDownload(ep_obj, self.file_path, new_ep_quality, self.release_group)
+        history.logProcessedFile(self.file_path, file_stat, ep_obj.show.tvdbid)
 
         # send notifiers download notification
         if not ep_obj.show.skip_notices:
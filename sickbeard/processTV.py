@@ -23,16 +23,21 @@ import shutil
 import time
 
 import sickbeard
-from sickbeard import common
+from sickbeard import history
 from sickbeard import postProcessor
+from sickbeard import show_location_cache
 
-from sickbeard import db, helpers, exceptions
+from sickbeard import helpers, exceptions
 
 from sickbeard import encodingKludge as ek
 from sickbeard.exceptions import ex
+from sickbeard.name_parser.parser import NameParser, InvalidNameException
 
 from sickbeard import logger
 
+# how many files from a single folder are post processed at the same time
+MAX_PROCESS_THREADS = 4
+
 
 def delete_folder(folder, check_empty=True):
 
@@ -67,6 +72,81 @@ def logHelper(logMessage, logLevel=logger.MESSAGE):
     return logMessage + u"\n"
 
 
+def _process_file(file_path, nzbName=None, pp_options={}):
+    """
+    Runs the post processor on a single file.
+
+    Returns a (success, fail message, processor log) tuple.
+    """
+
+    try:
+        processor = postProcessor.PostProcessor(file_path, nzb_name=nzbName, pp_options=pp_options)
+        process_result = processor.process()
+        process_fail_message = ""
+
+    except exceptions.PostProcessingFailed, e:
+        process_result = False
+        process_fail_message = ex(e)
+
+    except Exception, e:
+        process_result = False
+        process_fail_message = "Post Processor returned unhandled exception: " + ex(e)
+
+    return (process_result, process_fail_message, processor.log)
+
+
+def _show_key(file_path):
+    """
+    Returns the show name the file name seems to be for, or None if it can't be parsed. Files with
+    the same key are processed one after another.
+    """
+
+    name = helpers.remove_non_release_groups(helpers.remove_extension(ek.ek(os.path.basename, file_path)))
+
+    try:
+        parse_result = NameParser(False).parse(name)
+    except InvalidNameException:
+        return None
+
+    if not parse_result.series_name:
+        return None
+
+    return helpers.sanitizeSceneName(parse_result.series_name).lower()
+
+
+def _process_files(file_paths, nzbName=None, pp_options={}):
+    """
+    Post processes the given files using up to MAX_PROCESS_THREADS threads.
+
+    Files of different shows are processed at the same time. Files of the same show (and all the ones
+    whose names can't be parsed, they might be identified by the folder name) are processed one after
+    another in the order they were given in, so when two files are the same episode the first one
+    (the biggest, see processDir) always wins.
+
+    Returns a list of _process_file results in the same order as file_paths.
+    """
+
+    groups = []
+    group_for_key = {}
+
+    for i, cur_file_path in enumerate(file_paths):
+        key = _show_key(cur_file_path)
+        if key not in group_for_key:
+            group_for_key[key] = []
+            groups.append(group_for_key[key])
+        group_for_key[key].append((i, cur_file_path))
+
+    def process_group(group):
+        return [(i, _process_file(cur_file_path, nzbName, pp_options)) for (i, cur_file_path) in group]
+
+    results = [None] * len(file_paths)
+    for group_results in helpers.map_in_threads(process_group, groups, MAX_PROCESS_THREADS):
+        for (i, cur_result) in group_results:
+            results[i] = cur_result
+
+    return results
+
+
 def processDir(dirName, nzbName=None, method=None, recurse=False, pp_options={}):
     """
     Scans through the files in dirName and processes whatever media files it finds
@@ -108,13 +188,10 @@ def processDir(dirName, nzbName=None, method=None, recurse=False, pp_options={})
         return returnStr
 
     # make sure the dir isn't inside a show dir
-    myDB = db.DBConnection()
-    sqlResults = myDB.select("SELECT * FROM tv_shows")
-    for sqlShow in sqlResults:
-        if dirName.lower().startswith(ek.ek(os.path.realpath, sqlShow["location"]).lower() + os.sep) or dirName.lower() == ek.ek(os.path.realpath, sqlShow["location"]).lower():
-            returnStr += logHelper(u"You're trying to post process an existing show directory: " + dirName, logger.ERROR)
-            returnStr += u"\n"
-            return returnStr
+    if show_location_cache.findShowDir(dirName):
+        returnStr += logHelper(u"You're trying to post process an existing show directory: " + dirName, logger.ERROR)
+        returnStr += u"\n"
+        return returnStr
 
     fileList = ek.ek(os.listdir, dirName)
 
@@ -162,41 +239,32 @@ def processDir(dirName, nzbName=None, method=None, recurse=False, pp_options={})
     if num_videoFiles >= 2:
         nzbName = None
 
-    # process any files in the dir
+    # find the files that still need processing, keeping the order so the output reads the same as when they were done one by one
+    file_list = []
     for cur_video_file in videoFiles:
 
         cur_video_file_path = ek.ek(os.path.join, dirName, cur_video_file)
 
-        if method == 'Automatic':
-            # check if we processed this video file before
-            cur_video_file_path_size = ek.ek(os.path.getsize, cur_video_file_path)
+        # check if we processed this video file before
+        if method == 'Automatic' and history.wasProcessed(cur_video_file_path):
+            file_list.append((cur_video_file, cur_video_file_path, u"Ignoring file: " + cur_video_file_path + " looks like it's been processed already"))
+            continue
 
-            myDB = db.DBConnection()
-            search_sql = "SELECT tv_episodes.tvdbid, history.resource FROM tv_episodes INNER JOIN history ON history.showid=tv_episodes.showid"
-            search_sql += " WHERE history.season=tv_episodes.season and history.episode=tv_episodes.episode"
-            search_sql += " and tv_episodes.status IN (" + ",".join([str(x) for x in common.Quality.DOWNLOADED]) + ")"
-            search_sql += " and history.resource LIKE ? and tv_episodes.file_size = ?"
-            sql_results = myDB.select(search_sql, [cur_video_file_path, cur_video_file_path_size])
+        file_list.append((cur_video_file, cur_video_file_path, None))
 
-            if len(sql_results):
-                returnStr += logHelper(u"Ignoring file: " + cur_video_file_path + " looks like it's been processed already", logger.DEBUG)
-                continue
+    # process any files in the dir
+    results = iter(_process_files([x[1] for x in file_list if not x[2]], nzbName, pp_options))
 
-        try:
-            returnStr += u"\n"
-            processor = postProcessor.PostProcessor(cur_video_file_path, nzb_name=nzbName, pp_options=pp_options)
-            process_result = processor.process()
-            process_fail_message = ""
+    for (cur_video_file, cur_video_file_path, ignore_message) in file_list:
 
-        except exceptions.PostProcessingFailed, e:
-            process_result = False
-            process_fail_message = ex(e)
+        if ignore_message:
+            returnStr += logHelper(ignore_message, logger.DEBUG)
+            continue
 
-        except Exception, e:
-            process_result = False
-            process_fail_message = "Post Processor returned unhandled exception: " + ex(e)
+        (process_result, process_fail_message, process_log) = results.next()
 
-        returnStr += processor.log
+        returnStr += u"\n"
+        returnStr += process_log
 
         # as long as the postprocessing was successful delete the old folder unless the config wants us not to
         if process_result:
@@ -54,11 +54,15 @@ class ProperFinder():
         propers = {}
 
         # for each provider get a list of the propers
-        for curProvider in providers.sortedProviderList():
+        for curProvider in providers.sortedProviderList(by_health=True):
 
             if not curProvider.isActive():
                 continue
 
+            if not curProvider.health.available():
+                logger.log(u"Skipping " + curProvider.name + " because it hasn't been responding", logger.DEBUG)
+                continue
+
             search_date = datetime.datetime.today() - datetime.timedelta(days=2)
 
             logger.log(u"Searching for any new PROPER releases from " + curProvider.name)
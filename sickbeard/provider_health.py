@@ -0,0 +1,154 @@
+# Author: Nic Wolfe <nic@wolfeden.ca>
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Keeps track of how well each provider has been responding. After too many failed requests in a row the
+provider is left alone (the circuit is opened) for a while instead of waiting out the timeout on every request.
+"""
+
+from __future__ import with_statement
+
+import threading
+import time
+
+from sickbeard import logger
+
+# how many failed requests in a row it takes to stop using a provider
+FAILURE_THRESHOLD = 3
+
+# how long a provider is left alone the first time, this doubles every time it still fails afterwards, in seconds
+MIN_BACKOFF = 5 * 60
+MAX_BACKOFF = 60 * 60
+
+# how much the latest request counts towards the average latency and error rate
+EWMA_WEIGHT = 0.3
+
+
+class ProviderHealth:
+    """
+    The health of a single provider. Every request to it should be reported with success() or failure()
+    and none should be made while available() is False.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+
+        self.requests = 0
+        self.failures = 0
+        self.consecutiveFailures = 0
+
+        # moving averages, latency in seconds
+        self.latency = None
+        self.errorRate = 0.0
+
+        self.backoff = 0
+        self.openUntil = 0
+
+        self._lock = threading.Lock()
+
+    def available(self):
+        """
+        Returns False while the circuit is open. Once the backoff is over requests are let through again to
+        see if the provider is back, if the first one fails it's left alone for twice as long.
+        """
+
+        return time.time() >= self.openUntil
+
+    def success(self, duration):
+
+        with self._lock:
+            self._count(duration, False)
+
+            if self.backoff:
+                logger.log(self.provider.name + u" is responding again", logger.MESSAGE)
+
+            self.consecutiveFailures = 0
+            self.backoff = 0
+            self.openUntil = 0
+
+    def failure(self, duration):
+
+        with self._lock:
+            self._count(duration, True)
+
+            self.failures += 1
+            self.consecutiveFailures += 1
+
+            # requests which were already running when the circuit opened don't count towards the next backoff
+            if self.backoff and time.time() >= self.openUntil:
+                self._open(min(self.backoff * 2, MAX_BACKOFF))
+
+            elif not self.backoff and self.consecutiveFailures >= FAILURE_THRESHOLD:
+                self._open(MIN_BACKOFF)
+
+    def _count(self, duration, failed):
+
+        self.requests += 1
+
+        if self.latency is None:
+            self.latency = duration
+        else:
+            self.latency = EWMA_WEIGHT * duration + (1 - EWMA_WEIGHT) * self.latency
+
+        self.errorRate = EWMA_WEIGHT * int(failed) + (1 - EWMA_WEIGHT) * self.errorRate
+
+    def _open(self, backoff):
+
+        self.backoff = backoff
+        self.openUntil = time.time() + backoff
+
+        logger.log(self.provider.name + u" failed " + str(self.consecutiveFailures) + " times in a row, not using it for the next " + str(backoff / 60) + " minutes", logger.WARNING)
+
+    def rank(self):
+        """
+        Returns 0 for a provider that's working, 1 for one that's been failing and 2 for one that isn't being used at the moment.
+        """
+
+        if not self.available():
+            return 2
+        elif self.consecutiveFailures:
+            return 1
+        else:
+            return 0
+
+    def getStats(self):
+
+        with self._lock:
+            return {'requests': self.requests,
+                    'failures': self.failures,
+                    'consecutive_failures': self.consecutiveFailures,
+                    'latency': int(self.latency * 1000) if self.latency is not None else None,
+                    'error_rate': round(self.errorRate, 2),
+                    'available': self.available(),
+                    'retry_in': max(0, int(self.openUntil - time.time()))
+                    }
+
+    def summary(self):
+        """
+        A short description of the provider's health for the config page.
+        """
+
+        stats = self.getStats()
+
+        if not stats['requests']:
+            return u"no requests yet"
+
+        if not stats['available']:
+            return u"not responding, trying again in " + str(stats['retry_in'] / 60 + 1) + " min"
+
+        return str(stats['latency']) + u" ms, " + str(int(stats['error_rate'] * 100)) + u"% errors"
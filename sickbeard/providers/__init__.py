@@ -31,7 +31,11 @@ from sickbeard import logger
 from os import sys
 
 
-def sortedProviderList():
+def sortedProviderList(by_health=False):
+    """
+    Returns all the providers in the order the user put them in. If by_health is True providers that have
+    been failing are moved after the ones that work, and the ones that aren't responding at all go last.
+    """
 
     initialList = sickbeard.providerList + sickbeard.newznabProviderList
     providerDict = dict(zip([x.getID() for x in initialList], initialList))
@@ -48,6 +52,10 @@ def sortedProviderList():
         if providerDict[curModule] not in newList:
             newList.append(providerDict[curModule])
 
+    # the sort is stable so the user's order still counts between providers that are just as healthy
+    if by_health:
+        newList.sort(key=lambda x: x.health.rank())
+
     return newList
 
 
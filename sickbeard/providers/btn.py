@@ -21,6 +21,7 @@ import sickbeard
 import generic
 
 from sickbeard import classes
+from sickbeard import helpers
 from sickbeard import scene_exceptions
 from sickbeard import logger
 from sickbeard import tvcache
@@ -44,6 +45,9 @@ class BTNProvider(generic.TorrentProvider):
         self.supportsBacklog = True
         self.cache = BTNCache(self)
 
+        # the extra result pages are loaded at the same time, without going over the hourly api limit any faster
+        self.max_concurrent_requests = 3
+
         self.url = "http://broadcasthe.net"
 
     def isEnabled(self):
@@ -109,8 +113,10 @@ class BTNProvider(generic.TorrentProvider):
                     pages_needed = max_pages
 
                 # +1 because range(1,4) = 1, 2, 3
-                for page in range(1, pages_needed + 1):
-                    parsedJSON = self._api_call(apikey, params, results_per_page, page * results_per_page)
+                offsets = [page * results_per_page for page in range(1, pages_needed + 1)]
+                pages = helpers.map_in_threads(lambda offset: self._api_call(apikey, params, results_per_page, offset), offsets, self.max_concurrent_requests)
+
+                for parsedJSON in pages:
                     # Note that this these are individual requests and might time out individually. This would result in 'gaps'
                     # in the results. There is no way to fix this though.
                     if 'torrents' in parsedJSON:
@@ -130,30 +136,44 @@ class BTNProvider(generic.TorrentProvider):
 
     def _api_call(self, apikey, params={}, results_per_page=1000, offset=0):
 
+        if not self.health.available():
+            logger.log(u"" + self.name + " isn't responding at the moment, not using the API", logger.DEBUG)
+            return {}
+
         server = jsonrpclib.Server('http://api.btnapps.net')
         parsedJSON = {}
 
+        start_time = time.time()
+
         try:
             parsedJSON = server.getTorrents(apikey, params, int(results_per_page), int(offset))
 
         except jsonrpclib.jsonrpc.ProtocolError, error:
+            # the server answered, it just didn't like the request
+            self.health.success(time.time() - start_time)
             logger.log(u"JSON-RPC protocol error while accessing " + self.name + ": " + ex(error), logger.ERROR)
             parsedJSON = {'api-error': ex(error)}
             return parsedJSON
 
         except socket.timeout:
+            self.health.failure(time.time() - start_time)
             logger.log(u"Timeout while accessing " + self.name, logger.WARNING)
 
         except socket.error, error:
             # Note that sometimes timeouts are thrown as socket errors
+            self.health.failure(time.time() - start_time)
             logger.log(u"Socket error while accessing " + self.name + ": " + error[1], logger.ERROR)
 
         except Exception, error:
+            self.health.failure(time.time() - start_time)
             errorstring = str(error)
             if(errorstring.startswith('<') and errorstring.endswith('>')):
                 errorstring = errorstring[1:-1]
             logger.log(u"Unknown error while accessing " + self.name + ": " + errorstring, logger.ERROR)
 
+        else:
+            self.health.success(time.time() - start_time)
+
         return parsedJSON
 
     def _get_title_and_url(self, parsedJSON):
@@ -175,7 +175,7 @@ class EZRSSCache(tvcache.TVCache):
         rss_url = self.provider.url + 'ezrss.xml'
         logger.log(self.provider.name + " cache update URL: " + rss_url, logger.DEBUG)
 
-        data = self.provider.getURL(rss_url)
+        data = self._getFeed(rss_url)
 
         if not data:
             logger.log(u"No data returned from " + rss_url, logger.ERROR)
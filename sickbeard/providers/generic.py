@@ -21,6 +21,8 @@ from __future__ import with_statement
 import datetime
 import os
 import re
+import threading
+import time
 import urllib2
 
 import sickbeard
@@ -29,6 +31,7 @@ from sickbeard import helpers, classes, logger, db
 
 from sickbeard.common import Quality, MULTI_EP_RESULT, SEASON_RESULT
 from sickbeard import tvcache
+from sickbeard import provider_health
 from sickbeard import encodingKludge as ek
 from sickbeard.exceptions import ex
 
@@ -36,6 +39,9 @@ from lib.hachoir_parser import createParser
 
 from sickbeard.name_parser.parser import NameParser, InvalidNameException
 
+# most searches each provider keeps the results of, the oldest ones are forgotten first
+SEARCH_CACHE_SIZE = 100
+
 
 class GenericProvider:
 
@@ -51,8 +57,21 @@ class GenericProvider:
 
         self.supportsBacklog = False
 
+        # how many requests can be made to the provider at the same time during one search
+        self.max_concurrent_requests = 1
+
         self.cache = tvcache.TVCache(self)
 
+        self.health = provider_health.ProviderHealth(self)
+
+        # parsed results of recent searches, see _cachedSearch()
+        self._searchCache = {}
+        self._searchCacheLock = threading.Lock()
+        self._searchesInProgress = {}
+
+        self.searchCacheHits = 0
+        self.searchCacheMisses = 0
+
     def getID(self):
         return GenericProvider.makeID(self.name)
 
@@ -111,10 +130,33 @@ class GenericProvider:
                 req = urllib2.Request(url, headers=heads);
             else:
                 req = urllib2.Request(url);
-        response = helpers.getURL(req)
 
-        if response is None:
+        if not self.health.available():
+            logger.log(u"" + self.name + " isn't responding at the moment, not loading " + url, logger.DEBUG)
+            return None
+
+        start_time = time.time()
+
+        try:
+            response = helpers.readURLFileLike(helpers.getURLFileLike(req, throw_exc=True))
+
+        except urllib2.HTTPError, e:
+            # a 4xx means the provider answered, it just didn't like the request (eg. a wrong API key or a
+            # missing NZB), a 5xx means it's down
+            e.close()
+            if e.code >= 500:
+                self.health.failure(time.time() - start_time)
+            else:
+                self.health.success(time.time() - start_time)
+            logger.log(u"Error loading " + self.name + " URL: " + url, logger.ERROR)
+            return None
+
+        except Exception:
+            self.health.failure(time.time() - start_time)
             logger.log(u"Error loading " + self.name + " URL: " + url, logger.ERROR)
+            return None
+
+        self.health.success(time.time() - start_time)
 
         return response
 
@@ -199,6 +241,75 @@ class GenericProvider:
     def _doSearch(self):
         return []
 
+    def _cachedSearch(self, *args, **kwargs):
+        """
+        Calls _doSearch with the given arguments unless the same search was done in the last
+        SEARCH_CACHE_TTL minutes, in which case its results are used again. If another thread is
+        doing the same search right now this waits for it and uses its results too. Only the last
+        SEARCH_CACHE_SIZE searches are kept.
+        """
+
+        ttl = sickbeard.SEARCH_CACHE_TTL * 60
+
+        if ttl <= 0:
+            return self._doSearch(*args, **kwargs)
+
+        key = (_makeSearchKey(args), _makeSearchKey(kwargs))
+
+        while True:
+            with self._searchCacheLock:
+
+                # forget anything that's too old
+                now = time.time()
+                for cur_key, (cur_time, cur_results) in self._searchCache.items():  # @UnusedVariable
+                    if now - cur_time > ttl:
+                        del self._searchCache[cur_key]
+
+                if key in self._searchCache:
+                    self.searchCacheHits += 1
+                    self._logSearchCacheHit(key)
+                    return list(self._searchCache[key][1])
+
+                in_progress = self._searchesInProgress.get(key)
+                if not in_progress:
+                    # nobody's doing this search yet so it's our job, anybody else who wants it can wait for us
+                    in_progress = self._searchesInProgress[key] = [threading.Event(), None]
+                    self.searchCacheMisses += 1
+                    break
+
+            # someone else is already asking the provider, if it worked use their results
+            in_progress[0].wait()
+            if in_progress[1] is not None:
+                with self._searchCacheLock:
+                    self.searchCacheHits += 1
+                    self._logSearchCacheHit(key)
+                return list(in_progress[1])
+
+        results = None
+
+        try:
+            results = self._doSearch(*args, **kwargs)
+        finally:
+            with self._searchCacheLock:
+                del self._searchesInProgress[key]
+
+                # a failed search looks the same as one with no results so only keep the ones that found something
+                if results:
+                    self._searchCache[key] = (time.time(), results)
+
+                    while len(self._searchCache) > SEARCH_CACHE_SIZE:
+                        oldest_key = min(self._searchCache, key=lambda x: self._searchCache[x][0])
+                        del self._searchCache[oldest_key]
+
+            in_progress[1] = results
+            in_progress[0].set()
+
+        return list(results)
+
+    def _logSearchCacheHit(self, key):
+        total = self.searchCacheHits + self.searchCacheMisses
+        logger.log(u"Using cached " + self.name + " results for search " + repr(key) + " (" + str(self.searchCacheHits) + " of " + str(total) + " searches were cached)", logger.DEBUG)
+
     def _get_season_search_strings(self, show, season, episode=None):
         return []
 
@@ -224,6 +335,13 @@ class GenericProvider:
         return (title, url)
 
     def findEpisode(self, episode, manualSearch=False):
+        return list(self.iterEpisodeResults(episode, manualSearch))
+
+    def iterEpisodeResults(self, episode, manualSearch=False):
+        """
+        Yields the results for the given episode as they're found. The provider is searched one search
+        string at a time, so if the caller stops early the remaining searches are never done.
+        """
 
         logger.log(u"Searching " + self.name + " for " + episode.prettyName())
 
@@ -231,18 +349,16 @@ class GenericProvider:
         results = self.cache.searchCache(episode, manualSearch)
         logger.log(u"Cache results: " + str(results), logger.DEBUG)
 
+        for result in results:
+            yield result
+
         # if we got some results then use them no matter what.
         # OR
         # return anyway unless we're doing a manual search
         if results or not manualSearch:
-            return results
+            return
 
-        itemList = []
-
-        for cur_search_string in self._get_episode_search_strings(episode):
-            itemList += self._doSearch(cur_search_string, show=episode.show)
-
-        for item in itemList:
+        for item in self._iterEpisodeSearchItems(episode):
 
             (title, url) = self._get_title_and_url(item)
 
@@ -277,9 +393,12 @@ class GenericProvider:
             result.name = title
             result.quality = quality
 
-            results.append(result)
+            yield result
 
-        return results
+    def _iterEpisodeSearchItems(self, episode):
+        for cur_search_string in self._get_episode_search_strings(episode):
+            for item in self._cachedSearch(cur_search_string, show=episode.show):
+                yield item
 
     def findSeasonResults(self, show, season):
 
@@ -287,7 +406,7 @@ class GenericProvider:
         results = {}
 
         for cur_string in self._get_season_search_strings(show, season):
-            itemList += self._doSearch(cur_string)
+            itemList += self._cachedSearch(cur_string)
 
         for item in itemList:
 
@@ -375,6 +494,27 @@ class GenericProvider:
         return [classes.Proper(x['name'], x['url'], datetime.datetime.fromtimestamp(x['time'])) for x in results]
 
 
+def _makeSearchKey(value):
+    """
+    Turns the arguments of a search into something hashable which is the same for equivalent searches.
+    """
+
+    if isinstance(value, dict):
+        return tuple(sorted([(cur_name, _makeSearchKey(cur_value)) for (cur_name, cur_value) in value.items()]))
+
+    if isinstance(value, (list, tuple)):
+        return tuple([_makeSearchKey(x) for x in value])
+
+    if isinstance(value, basestring):
+        return value.strip()
+
+    # shows are compared by id, two objects for the same show make the same search
+    if hasattr(value, 'tvdbid'):
+        return ('show', value.tvdbid)
+
+    return value
+
+
 class NZBProvider(GenericProvider):
 
     def __init__(self, name):
@@ -21,7 +21,6 @@ import email.utils
 import datetime
 import re
 import os
-import time
 
 try:
     import xml.etree.cElementTree as etree
@@ -68,6 +67,9 @@ class NewznabProvider(generic.NZBProvider):
         self.enabled = True
         self.supportsBacklog = True
 
+        # result pages after the first one are loaded at the same time
+        self.max_concurrent_requests = 3
+
         self.default = False
 
     def configStr(self):
@@ -81,70 +83,21 @@ class NewznabProvider(generic.NZBProvider):
     def isEnabled(self):
         return self.enabled
 
-    def findEpisode(self, episode, manualSearch=False):
-
-        logger.log(u"Searching " + self.name + " for " + episode.prettyName())
-
-        self.cache.updateCache()
-        results = self.cache.searchCache(episode, manualSearch)
-        logger.log(u"Cache results: " + str(results), logger.DEBUG)
-
-        # if we got some results then use them no matter what.
-        # OR
-        # return anyway unless we're doing a manual search
-        if results or not manualSearch:
-            return results
+    def _iterEpisodeSearchItems(self, episode):
 
-        itemList = []
+        found_items = False
 
-        for cur_search_string in self._get_episode_search_strings(episode):
-            itemList += self._doSearch(cur_search_string, show=episode.show)
+        for item in generic.NZBProvider._iterEpisodeSearchItems(self, episode):
+            found_items = True
+            yield item
 
         # check if shows that we have a tvrage id for returned 0 results
         # if so, fall back to just searching by query
-        if itemList == [] and episode.show.tvrid != 0:
+        if not found_items and episode.show.tvrid != 0:
             logger.log(u"Unable to find a result on " + self.name + " using tvrage id (" + str(episode.show.tvrid) + "), trying to search by string...", logger.WARNING)
             for cur_search_string in self._get_episode_search_strings(episode, ignore_tvr=True):
-                itemList += self._doSearch(cur_search_string, show=episode.show)
-
-        for item in itemList:
-
-            (title, url) = self._get_title_and_url(item)
-
-            # parse the file name
-            try:
-                myParser = NameParser()
-                parse_result = myParser.parse(title)
-            except InvalidNameException:
-                logger.log(u"Unable to parse the filename " + title + " into a valid episode", logger.WARNING)
-                continue
-
-            if episode.show.air_by_date:
-                if parse_result.air_date != episode.airdate:
-
-                    logger.log(u"Episode " + title + " didn't air on " + str(episode.airdate) + ", skipping it", logger.DEBUG)
-                    continue
-
-            elif parse_result.season_number != episode.season or episode.episode not in parse_result.episode_numbers:
-                logger.log(u"Episode " + title + " isn't " + str(episode.season) + "x" + str(episode.episode) + ", skipping it", logger.DEBUG)
-                continue
-
-            quality = self.getQuality(item)
-
-            if not episode.show.wantEpisode(episode.season, episode.episode, quality, manualSearch):
-                logger.log(u"Ignoring result " + title + " because we don't want an episode that is " + Quality.qualityStrings[quality], logger.DEBUG)
-                continue
-
-            logger.log(u"Found result " + title + " at " + url, logger.DEBUG)
-
-            result = self.getResult([episode])
-            result.url = url
-            result.name = title
-            result.quality = quality
-
-            results.append(result)
-
-        return results
+                for item in self._cachedSearch(cur_search_string, show=episode.show):
+                    yield item
 
     def findSeasonResults(self, show, season):
 
@@ -152,14 +105,14 @@ class NewznabProvider(generic.NZBProvider):
         results = {}
 
         for cur_string in self._get_season_search_strings(show, season):
-            itemList += self._doSearch(cur_string)
+            itemList += self._cachedSearch(cur_string)
 
         # check if shows that we have a tvrage id for returned 0 results
         # if so, fall back to just searching by query
         if itemList == [] and show.tvrid != 0:
             logger.log(u"Unable to find a result on " + self.name + " using tvrage id (" + str(show.tvrid) + "), trying to search by string...", logger.WARNING)
             for cur_string in self._get_season_search_strings(show, season, ignore_tvr=True):
-                itemList += self._doSearch(cur_string)
+                itemList += self._cachedSearch(cur_string)
 
         for item in itemList:
 
@@ -373,91 +326,128 @@ class NewznabProvider(generic.NZBProvider):
             params['apikey'] = self.key
 
         results = []
-        offset = total = hits = 0
 
-        # hardcoded to stop after a max of 4 hits (400 items) per query
-        while (hits < 4) and (offset == 0 or offset < total):
-            if hits > 0:
-                # sleep for a few seconds to not hammer the site and let cpu rest
-                time.sleep(2)
+        # the first page says how many results there are in total
+        first_page = self._getSearchPage(params, 0)
 
-            params['offset'] = offset
+        if first_page is None:
+            return results
 
-            search_url = self.url + 'api?' + urllib.urlencode(params)
+        (page_results, total) = first_page
+        results.extend(page_results)
 
-            logger.log(u"Search url: " + search_url, logger.DEBUG)
+        if not total:
+            return results
 
-            data = self.getURL(search_url)
+        # hardcoded to stop after a max of 4 pages (400 items) per query, the rest of them are loaded at the same time
+        offsets = range(100, min(total, 400), 100)
+        pages = helpers.map_in_threads(lambda offset: self._getSearchPage(params, offset), offsets, self.max_concurrent_requests)
 
-            if not data:
-                logger.log(u"No data returned from " + search_url, logger.ERROR)
-                return results
+        # add them in order and stop at the first bad one, same as if they'd been loaded one after the other
+        for cur_page in pages:
+            if cur_page is None:
+                break
 
-            # hack this in until it's fixed server side
-            if not data.startswith('<?xml'):
-                data = '<?xml version="1.0" encoding="ISO-8859-1" ?>' + data
+            (page_results, total) = cur_page
+            results.extend(page_results)
 
-            parsedXML = helpers.parse_xml(data)
+            if total is None:
+                break
 
-            if parsedXML is None:
-                logger.log(u"Error trying to load " + self.name + " XML data", logger.ERROR)
-                return results
-
-            if self._checkAuthFromData(parsedXML):
-
-                if parsedXML.tag == 'rss':
-                    items = []
-                    response_nodes = []
-                    for node in parsedXML.getiterator():
-                        # Collect all items for result parsing
-                        if node.tag == "item":
-                            items.append(node)
-                        # Find response nodes but ignore XML namespacing to
-                        # accomodate providers with alternative definitions
-                        elif node.tag.split("}", 1)[-1] == "response":
-                            response_nodes.append(node)
-                    # Verify that one and only one node matches and use it,
-                    # return otherwise
-                    if len(response_nodes) != 1:
-                        logger.log(u"No valid, unique response node was found in the API response",
-                            logger.ERROR)
-                        return results
-                    response = response_nodes[0]
-
-                else:
-                    logger.log(u"Resulting XML from " + self.name + " isn't RSS, not parsing it", logger.ERROR)
-                    return results
-
-                # process the items that we have
-                for curItem in items:
-                    (title, url) = self._get_title_and_url(curItem)
+        return results
+
+    def _getSearchPage(self, params, offset):
+        """
+        Loads and parses one page of search results.
+
+        params: The search parameters to use
+        offset: The offset of the first result on the page
+
+        Returns: a tuple of the usable items on the page and the total number of results the provider says there are,
+        the total is None if the page doesn't look right and no more pages should be loaded. Returns None if the page
+        couldn't be loaded at all.
+        """
+
+        params = dict(params, offset=offset)
+
+        search_url = self.url + 'api?' + urllib.urlencode(params)
+
+        logger.log(u"Search url: " + search_url, logger.DEBUG)
+
+        data = self.getURL(search_url)
+
+        if not data:
+            logger.log(u"No data returned from " + search_url, logger.ERROR)
+            return None
+
+        # hack this in until it's fixed server side
+        if not data.startswith('<?xml'):
+            data = '<?xml version="1.0" encoding="ISO-8859-1" ?>' + data
+
+        # parse the items one at a time instead of building the whole tree for a page of 100
+        page_results = []
+        response_nodes = []
+        parsedXML = None
+
+        try:
+            for node in helpers.iterparse_xml(data, ('item', 'response')):
+
+                # the root comes first, if it's an error there's nothing else to go through
+                if parsedXML is None:
+                    parsedXML = node
+                    if parsedXML.tag != 'rss':
+                        break
+
+                elif node.tag == "item":
+                    (title, url) = self._get_title_and_url(node)
 
                     if title and url:
                         # commenting this out for performance reasons, we see the results when they are added to cache anyways
                         # logger.log(u"Adding item from RSS to results: " + title, logger.DEBUG)
-                        results.append(curItem)
+                        page_results.append(node)
                     else:
                         logger.log(u"The XML returned from the " + self.name + " RSS feed is incomplete, this result is unusable", logger.DEBUG)
 
-                # check to see if our offset matches what was returned, otherwise dont trust their values and just use what we have
-                if offset != int(response.get('offset') or 0):
-                    logger.log(u"Newznab provider returned invalid api data, report this to your provider! Aborting fetching further results.", logger.WARNING)
-                    return results
+                # Find response nodes but ignore XML namespacing to
+                # accomodate providers with alternative definitions
+                else:
+                    response_nodes.append(node)
 
-                try:
-                    total = int(response.get('total') or 0)
-                except AttributeError:
-                    logger.log(u"Newznab provider provided invalid total.", logger.WARNING)
-                    break
+        except SyntaxError, e:
+            logger.log(u"Error trying to parse xml data. Error: " + ex(e), logger.DEBUG)
+            parsedXML = None
 
-            # if we have 0 results, just break out otherwise increment and continue
-            if total == 0:
-                break
-            else:
-                offset += 100
-                hits += 1
+        if parsedXML is None:
+            logger.log(u"Error trying to load " + self.name + " XML data", logger.ERROR)
+            return None
 
-        return results
+        if not self._checkAuthFromData(parsedXML):
+            return None
+
+        if parsedXML.tag != 'rss':
+            logger.log(u"Resulting XML from " + self.name + " isn't RSS, not parsing it", logger.ERROR)
+            return None
+
+        # Verify that one and only one node matches and use it,
+        # return otherwise
+        if len(response_nodes) != 1:
+            logger.log(u"No valid, unique response node was found in the API response",
+                logger.ERROR)
+            return None
+        response = response_nodes[0]
+
+        # check to see if our offset matches what was returned, otherwise dont trust their values and just use what we have
+        if offset != int(response.get('offset') or 0):
+            logger.log(u"Newznab provider returned invalid api data, report this to your provider! Aborting fetching further results.", logger.WARNING)
+            return (page_results, None)
+
+        try:
+            total = int(response.get('total') or 0)
+        except AttributeError:
+            logger.log(u"Newznab provider provided invalid total.", logger.WARNING)
+            return (page_results, None)
+
+        return (page_results, total)
 
     def findPropers(self, search_date=None):
 
@@ -517,7 +507,7 @@ class NewznabCache(tvcache.TVCache):
 
         logger.log(self.provider.name + " cache update URL: " + rss_url, logger.DEBUG)
 
-        data = self.provider.getURL(rss_url)
+        data = self._getFeed(rss_url)
 
         if not data:
             logger.log(u"No data returned from " + rss_url, logger.ERROR)
@@ -78,7 +78,7 @@ class TorrentLeechCache(tvcache.TVCache):
         rss_url = 'http://rss.torrentleech.org/' + sickbeard.TORRENTLEECH_KEY
         logger.log(self.provider.name + u" cache update URL: " + rss_url, logger.DEBUG)
 
-        data = self.provider.getURL(rss_url)
+        data = self._getFeed(rss_url)
 
         if not data:
             logger.log(u"No data returned from " + rss_url, logger.ERROR)
@@ -22,6 +22,7 @@ import generic
 from sickbeard import helpers
 from sickbeard import logger
 from sickbeard import tvcache
+from sickbeard.exceptions import FeedUnchangedException
 
 try:
     import xml.etree.cElementTree as etree
@@ -52,10 +53,25 @@ class WombleCache(tvcache.TVCache):
         RSS_data = None
         xml_element_tree = None
 
-        for url in [self.provider.url + 'rss/?sec=tv-x264&fr=false', self.provider.url + 'rss/?sec=tv-dvd&fr=false']:
+        urls = [self.provider.url + 'rss/?sec=tv-x264&fr=false', self.provider.url + 'rss/?sec=tv-dvd&fr=false']
+
+        feeds = []
+        unchanged_urls = []
+        for url in urls:
             logger.log(u"Womble's Index cache update URL: " + url, logger.DEBUG)
-            data = self.provider.getURL(url)
+            try:
+                feeds.append(self._getFeed(url))
+            except FeedUnchangedException:
+                unchanged_urls.append(url)
+
+        if len(unchanged_urls) == len(urls):
+            raise FeedUnchangedException(u"None of the feeds have changed")
+
+        # the cache is rebuilt from both feeds so if only one changed we still need the other one
+        for url in unchanged_urls:
+            feeds.append(self._getFeed(url, conditional=False))
 
+        for data in feeds:
             if data:
                 parsedXML = helpers.parse_xml(data)
                 if parsedXML:
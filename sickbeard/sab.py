@@ -30,6 +30,11 @@ except ImportError:
 from sickbeard import logger, helpers
 from sickbeard.exceptions import ex
 
+# how long to wait between sending two NZBs to SAB, in seconds
+SEND_INTERVAL = 1
+
+_send_limiter = helpers.RateLimiter(SEND_INTERVAL)
+
 
 def sendNZB(nzb):
     """
@@ -69,6 +74,8 @@ def sendNZB(nzb):
     logger.log(u"Sending NZB to SABnzbd: %s" % nzb.name)
     logger.log(u"SABnzbd URL: " + url, logger.DEBUG)
 
+    _send_limiter.wait()
+
     try:
         # if we have the URL to an NZB then we've built up the SAB API URL already so just call it
         if nzb.resultType == "nzb":
@@ -39,6 +39,9 @@ from sickbeard import providers
 from sickbeard.exceptions import ex
 from sickbeard.providers.generic import GenericProvider
 
+# how many results can be sent to the downloader at the same time
+MAX_SNATCH_THREADS = 3
+
 
 def _downloadResult(result):
     """
@@ -103,6 +106,49 @@ def snatchEpisode(result, endStatus=SNATCHED):
     endStatus: the episode status that should be used for the episode object once it's snatched.
     """
 
+    if not _sendResult(result):
+        return False
+
+    _snatched(result, endStatus)
+
+    return True
+
+
+def snatchEpisodes(results, endStatus=SNATCHED):
+    """
+    Snatches all the given results, sending up to MAX_SNATCH_THREADS of them to the downloader at the same time.
+
+    Returns a list of bools representing the success of each result.
+
+    results: list of SearchResult instances to be snatched.
+    endStatus: the episode status that should be used for the episode objects once they're snatched.
+    """
+
+    def send(result):
+        try:
+            return _sendResult(result)
+        except Exception, e:
+            logger.log(u"Error while sending " + result.name + " to the downloader: " + ex(e), logger.ERROR)
+            logger.log(traceback.format_exc(), logger.DEBUG)
+            return False
+
+    sentResults = helpers.map_in_threads(send, results, MAX_SNATCH_THREADS, 'SNATCH')
+
+    # history, statuses and notifications are done one at a time like they used to be
+    for result, sent in zip(results, sentResults):
+        if sent:
+            _snatched(result, endStatus)
+
+    return sentResults
+
+
+def _sendResult(result):
+    """
+    Sends the result to the downloader or black hole.
+
+    Returns a bool representing success.
+    """
+
     # NZBs can be sent straight to downloader or saved to disk
     if result.resultType in ("nzb", "nzbdata"):
         if sickbeard.NZB_METHOD == "blackhole":
@@ -122,8 +168,13 @@ def snatchEpisode(result, endStatus=SNATCHED):
         logger.log(u"Unknown result type, unable to download it", logger.ERROR)
         dlResult = False
 
-    if dlResult == False:
-        return False
+    return dlResult != False
+
+
+def _snatched(result, endStatus):
+    """
+    Records a result that was sent successfully in the history and on its episodes and lets the user know about it.
+    """
 
     ui.notifications.message('Episode snatched', result.name)
 
@@ -138,8 +189,6 @@ def snatchEpisode(result, endStatus=SNATCHED):
         if not curEpObj.show.skip_notices and curEpObj.status not in Quality.DOWNLOADED:
             notifiers.notify_snatch(curEpObj.prettyName())
 
-    return True
-
 
 def searchForNeededEpisodes():
 
@@ -150,11 +199,15 @@ def searchForNeededEpisodes():
     didSearch = False
 
     # ask all providers for any episodes it finds
-    for curProvider in providers.sortedProviderList():
+    for curProvider in providers.sortedProviderList(by_health=True):
 
         if not curProvider.isActive():
             continue
 
+        if not curProvider.health.available():
+            logger.log(u"Skipping " + curProvider.name + " because it hasn't been responding", logger.DEBUG)
+            continue
+
         curFoundResults = {}
 
         try:
@@ -224,23 +277,24 @@ def filter_release_name(name, filter_words):
 
 def pickBestResult(results, show, quality_list=None):
 
-    logger.log(u"Picking the best result out of " + str([x.name for x in results]), logger.DEBUG)
+    if logger.is_enabled_for(logger.DEBUG):
+        logger.log(u"Picking the best result out of %s", logger.DEBUG, [x.name for x in results])
 
     # find the best result for the current episode
     bestResult = None
     for cur_result in results:
-        logger.log(u"Quality of " + cur_result.name + " is " + Quality.qualityStrings[cur_result.quality])
+        logger.log(u"Quality of %s is %s", logger.MESSAGE, cur_result.name, Quality.qualityStrings[cur_result.quality])
 
         if quality_list and cur_result.quality not in quality_list:
-            logger.log(cur_result.name + " is a quality we know we don't want, rejecting it", logger.DEBUG)
+            logger.log(u"%s is a quality we know we don't want, rejecting it", logger.DEBUG, cur_result.name)
             continue
 
         if show.rls_ignore_words and filter_release_name(cur_result.name, show.rls_ignore_words):
-            logger.log(u"Ignoring " + cur_result.name + " based on ignored words filter: " + show.rls_ignore_words, logger.MESSAGE)
+            logger.log(u"Ignoring %s based on ignored words filter: %s", logger.MESSAGE, cur_result.name, show.rls_ignore_words)
             continue
 
         if show.rls_require_words and not filter_release_name(cur_result.name, show.rls_require_words):
-            logger.log(u"Ignoring " + cur_result.name + " based on required words filter: " + show.rls_require_words, logger.MESSAGE)
+            logger.log(u"Ignoring %s based on required words filter: %s", logger.MESSAGE, cur_result.name, show.rls_require_words)
             continue
 
         if not bestResult or bestResult.quality < cur_result.quality and cur_result.quality != Quality.UNKNOWN:
@@ -306,13 +360,34 @@ def findEpisode(episode, manualSearch=False):
 
     didSearch = False
 
-    for curProvider in providers.sortedProviderList():
+    for curProvider in providers.sortedProviderList(by_health=True):
 
         if not curProvider.isActive():
             continue
 
+        if not curProvider.health.available():
+            logger.log(u"Skipping " + curProvider.name + " because it hasn't been responding", logger.DEBUG)
+            continue
+
+        curFoundResults = []
+        done_searching = False
+
+        # go through the results as the provider finds them, once one of them is good enough
+        # we stop and the provider doesn't do the rest of its searches
         try:
-            curFoundResults = curProvider.findEpisode(episode, manualSearch=manualSearch)
+            for cur_result in curProvider.iterEpisodeResults(episode, manualSearch=manualSearch):
+
+                # skip non-tv crap
+                if not show_name_helpers.filterBadReleases(cur_result.name) or not show_name_helpers.isGoodResult(cur_result.name, episode.show):
+                    continue
+
+                curFoundResults.append(cur_result)
+
+                done_searching = isFinalResult(cur_result)
+                logger.log(u"Should we stop searching after finding " + cur_result.name + ": " + str(done_searching), logger.DEBUG)
+                if done_searching:
+                    break
+
         except exceptions.AuthException, e:
             logger.log(u"Authentication error: " + ex(e), logger.ERROR)
             continue
@@ -323,17 +398,6 @@ def findEpisode(episode, manualSearch=False):
 
         didSearch = True
 
-        # skip non-tv crap
-        curFoundResults = filter(lambda x: show_name_helpers.filterBadReleases(x.name) and show_name_helpers.isGoodResult(x.name, episode.show), curFoundResults)
-
-        # loop all results and see if any of them are good enough that we can stop searching
-        done_searching = False
-        for cur_result in curFoundResults:
-            done_searching = isFinalResult(cur_result)
-            logger.log(u"Should we stop searching after finding " + cur_result.name + ": " + str(done_searching), logger.DEBUG)
-            if done_searching:
-                break
-
         foundResults += curFoundResults
 
         # if we did find a result that's good enough to stop then don't continue
@@ -356,11 +420,15 @@ def findSeason(show, season):
 
     didSearch = False
 
-    for curProvider in providers.sortedProviderList():
+    for curProvider in providers.sortedProviderList(by_health=True):
 
         if not curProvider.isActive():
             continue
 
+        if not curProvider.health.available():
+            logger.log(u"Skipping " + curProvider.name + " because it hasn't been responding", logger.DEBUG)
+            continue
+
         try:
             curResults = curProvider.findSeasonResults(show, season)
 
@@ -19,7 +19,6 @@
 from __future__ import with_statement
 
 import datetime
-import time
 
 import sickbeard
 from sickbeard import db, logger, common, exceptions, helpers
@@ -135,9 +134,7 @@ class RSSSearchQueueItem(generic_queue.QueueItem):
         if not len(foundResults):
             logger.log(u"No needed episodes found on the RSS feeds")
         else:
-            for curResult in foundResults:
-                search.snatchEpisode(curResult)
-                time.sleep(2)
+            search.snatchEpisodes(foundResults)
 
         generic_queue.QueueItem.finish(self)
 
@@ -210,10 +207,7 @@ class BacklogQueueItem(generic_queue.QueueItem):
         results = search.findSeason(self.show, self.segment)
 
         # download whatever we find
-        for curResult in results:
-            if curResult:
-                search.snatchEpisode(curResult)
-                time.sleep(5)
+        search.snatchEpisodes([x for x in results if x])
 
         logger.log(u"Finished searching for episodes from " + self.show.name + " season " + str(self.segment))
         self.finish()
@@ -82,10 +82,10 @@ class ShowUpdater():
             try:
                 # if should_update returns True (not 'Ended') or show is selected stale 'Ended' then update, otherwise just refresh
                 if curShow.should_update(update_date=update_date) or curShow.tvdbid in stale_should_update:
-                    curQueueItem = sickbeard.showQueueScheduler.action.updateShow(curShow, True)  # @UndefinedVariable
+                    curQueueItem = sickbeard.showQueueScheduler.action.updateShow(curShow, True, scheduled=True)  # @UndefinedVariable
                 else:
                     logger.log(u"Not updating episodes for show " + curShow.name + " because it's marked as ended and last/next episode is not within the grace period.", logger.DEBUG)
-                    curQueueItem = sickbeard.showQueueScheduler.action.refreshShow(curShow, True)  # @UndefinedVariable
+                    curQueueItem = sickbeard.showQueueScheduler.action.refreshShow(curShow, True, scheduled=True)  # @UndefinedVariable
 
                 piList.append(curQueueItem)
 
@@ -0,0 +1,94 @@
+# Author: Nic Wolfe <nic@wolfeden.ca>
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import with_statement
+
+import os
+import threading
+
+from sickbeard import db
+from sickbeard import encodingKludge as ek
+
+# path component -> child node, the None key holds the location of a show ending at that node
+_location_trie = None
+_location_lock = threading.Lock()
+
+
+def _split_path(path):
+    """
+    Breaks a path up into its lowercase components, the same way the show dir check always compared them
+    """
+    return [x for x in path.lower().split(os.sep) if x]
+
+
+def _build_trie():
+
+    trie = {}
+
+    myDB = db.DBConnection()
+    for sqlShow in myDB.select("SELECT location FROM tv_shows"):
+        if not sqlShow["location"]:
+            continue
+
+        location = ek.ek(os.path.realpath, sqlShow["location"])
+
+        node = trie
+        for cur_part in _split_path(location):
+            node = node.setdefault(cur_part, {})
+        node[None] = location
+
+    return trie
+
+
+def clearCache():
+    """
+    Forgets the show locations, they'll be read from the DB again the next time they're needed.
+    Call this whenever a show is added, moved or deleted.
+    """
+    global _location_trie
+
+    with _location_lock:
+        _location_trie = None
+
+
+def findShowDir(path):
+    """
+    Checks if the given path is a show dir or somewhere inside one.
+
+    path: The real path to check
+
+    Returns: the show location that contains path or None if it isn't inside any show dir
+    """
+    global _location_trie
+
+    with _location_lock:
+        if _location_trie is None:
+            _location_trie = _build_trie()
+        node = _location_trie
+
+    if None in node:
+        return node[None]
+
+    for cur_part in _split_path(path):
+        node = node.get(cur_part)
+        if node is None:
+            return None
+        if None in node:
+            return node[None]
+
+    return None
@@ -18,6 +18,7 @@
 
 from __future__ import with_statement
 
+import threading
 import traceback
 
 import sickbeard
@@ -27,11 +28,15 @@ from lib.tvdb_api import tvdb_exceptions, tvdb_api
 from sickbeard.common import SKIPPED, WANTED
 
 from sickbeard.tv import TVShow
-from sickbeard import exceptions, logger, ui, db
+from sickbeard import exceptions, logger, ui, db, helpers
 from sickbeard import generic_queue
 from sickbeard import name_cache
+from sickbeard.metadata import generic as metadata_generic
 from sickbeard.exceptions import ex
 
+# how many queue items (each for a different show) can run at the same time
+MAX_SHOW_QUEUE_THREADS = 4
+
 
 class ShowQueue(generic_queue.GenericQueue):
 
@@ -39,12 +44,21 @@ class ShowQueue(generic_queue.GenericQueue):
         generic_queue.GenericQueue.__init__(self)
         self.queue_name = "SHOWQUEUE"
 
+        # (thread, item) for every item that's running right now
+        self.running = []
+
+        self.lock = threading.Lock()
+
+    def _getCurrentItems(self):
+        return [x[1] for x in self.running]
+
+    currentItems = property(_getCurrentItems)
+
     def _isInQueue(self, show, actions):
         return show in [x.show for x in self.queue if x.action_id in actions]
 
     def _isBeingSomethinged(self, show, actions):
-        return self.currentItem is not None and show == self.currentItem.show and \
-                self.currentItem.action_id in actions
+        return show in [x.show for x in self.currentItems if x.action_id in actions]
 
     def isInUpdateQueue(self, show):
         return self._isInQueue(show, (ShowQueueActions.UPDATE, ShowQueueActions.FORCEUPDATE))
@@ -68,11 +82,53 @@ class ShowQueue(generic_queue.GenericQueue):
         return self._isBeingSomethinged(show, (ShowQueueActions.RENAME,))
 
     def _getLoadingShowList(self):
-        return [x for x in self.queue + [self.currentItem] if x is not None and x.isLoading]
+        return [x for x in self.queue + self.currentItems if x.isLoading]
 
     loadingShowList = property(_getLoadingShowList)
 
-    def updateShow(self, show, force=False):
+    def add_item(self, item):
+        with self.lock:
+            return generic_queue.GenericQueue.add_item(self, item)
+
+    def run(self):
+        """
+        Runs up to MAX_SHOW_QUEUE_THREADS items at once. Only one item per show runs
+        at a time and items for the same show start in the order they're queued.
+        """
+
+        # finish off any items whose threads are done
+        for cur_thread, cur_item in self.running[:]:
+            if not cur_thread.isAlive():
+                cur_item.finish()
+                self.running.remove((cur_thread, cur_item))
+
+        with self.lock:
+
+            self.sort_queue()
+
+            busy_shows = set([x.show_id for x in self.currentItems])
+
+            for cur_item in self.queue[:]:
+
+                if len(self.running) >= MAX_SHOW_QUEUE_THREADS:
+                    break
+
+                if cur_item.priority < self.min_priority:
+                    break
+
+                # anything after the first item for a show has to wait for it
+                if cur_item.show_id in busy_shows:
+                    continue
+                busy_shows.add(cur_item.show_id)
+
+                threadName = self.queue_name + '-' + cur_item.get_thread_name()
+                cur_thread = threading.Thread(None, cur_item.execute, threadName)
+                cur_thread.start()
+
+                self.running.append((cur_thread, cur_item))
+                self.queue.remove(cur_item)
+
+    def updateShow(self, show, force=False, scheduled=False):
 
         if self.isBeingAdded(show):
             raise exceptions.CantUpdateException("Show is still being added, wait until it is finished before you update.")
@@ -88,11 +144,15 @@ class ShowQueue(generic_queue.GenericQueue):
         else:
             queueItemObj = QueueItemForceUpdate(show)
 
+        # user requested actions go ahead of the daily update
+        if scheduled:
+            queueItemObj.priority = generic_queue.QueuePriorities.LOW
+
         self.add_item(queueItemObj)
 
         return queueItemObj
 
-    def refreshShow(self, show, force=False):
+    def refreshShow(self, show, force=False, full_scan=False, scheduled=False):
 
         if self.isBeingRefreshed(show) and not force:
             raise exceptions.CantRefreshException("This show is already being refreshed, not refreshing again.")
@@ -101,7 +161,10 @@ class ShowQueue(generic_queue.GenericQueue):
             logger.log(u"A refresh was attempted but there is already an update queued or in progress. Since updates do a refresh at the end anyway I'm skipping this request.", logger.DEBUG)
             return
 
-        queueItemObj = QueueItemRefresh(show)
+        queueItemObj = QueueItemRefresh(show, full_scan)
+
+        if scheduled:
+            queueItemObj.priority = generic_queue.QueuePriorities.LOW
 
         self.add_item(queueItemObj)
 
@@ -154,16 +217,21 @@ class ShowQueueItem(generic_queue.QueueItem):
         self.show = show
 
     def isInQueue(self):
-        return self in sickbeard.showQueueScheduler.action.queue + [sickbeard.showQueueScheduler.action.currentItem]  # @UndefinedVariable
+        return self in sickbeard.showQueueScheduler.action.queue + sickbeard.showQueueScheduler.action.currentItems  # @UndefinedVariable
 
     def _getName(self):
         return str(self.show.tvdbid)
 
+    def _getShowId(self):
+        return self.show.tvdbid
+
     def _isLoading(self):
         return False
 
     show_name = property(_getName)
 
+    show_id = property(_getShowId)
+
     isLoading = property(_isLoading)
 
 
@@ -193,6 +261,12 @@ class QueueItemAdd(ShowQueueItem):
 
     show_name = property(_getName)
 
+    def _getShowId(self):
+        # the show object doesn't exist until the add is underway
+        return self.tvdb_id
+
+    show_id = property(_getShowId)
+
     def _isLoading(self):
         """
         Returns True if we've gotten far enough to have a show object, or False
@@ -340,20 +414,29 @@ class QueueItemAdd(ShowQueueItem):
 
 
 class QueueItemRefresh(ShowQueueItem):
-    def __init__(self, show=None):
+    def __init__(self, show=None, full_scan=False):
         ShowQueueItem.__init__(self, ShowQueueActions.REFRESH, show)
 
         # do refreshes first because they're quick
         self.priority = generic_queue.QueuePriorities.HIGH
 
+        # look at every file again, not just the new or changed ones
+        self.full_scan = full_scan
+
     def execute(self):
 
         ShowQueueItem.execute(self)
 
         logger.log(u"Performing refresh on " + self.show.name)
 
-        self.show.refreshDir()
-        self.show.writeMetadata()
+        # let all the metadata providers share one listing of each folder instead of each checking every file
+        old_listing = metadata_generic.use_folder_listing(helpers.FolderListing())
+        try:
+            self.show.refreshDir(self.full_scan)
+            self.show.writeMetadata()
+        finally:
+            metadata_generic.use_folder_listing(old_listing)
+
         self.show.populateCache()
 
         self.inProgress = False
@@ -23,6 +23,7 @@ import datetime
 import threading
 import re
 import glob
+import weakref
 
 import sickbeard
 
@@ -37,6 +38,7 @@ from sickbeard import helpers, exceptions, logger
 from sickbeard.exceptions import ex
 from sickbeard import tvrage
 from sickbeard import image_cache
+from sickbeard import show_location_cache
 
 from sickbeard import encodingKludge as ek
 
@@ -44,10 +46,139 @@ from common import Quality, Overview, statusStrings
 from common import DOWNLOADED, SNATCHED, SNATCHED_PROPER, ARCHIVED, IGNORED, UNAIRED, WANTED, SKIPPED, UNKNOWN
 from common import NAMING_DUPLICATE, NAMING_EXTEND, NAMING_LIMITED_EXTEND, NAMING_SEPARATED_REPEAT, NAMING_LIMITED_EXTEND_E_PREFIXED
 
+# how many recently used episode objects are kept alive across all shows
+EPISODE_CACHE_SIZE = 10000
+
+
+class RecentEpisodes(object):
+    """
+    Keeps strong references to the max_size most recently used episode objects. Older ones are let go
+    once they're clean (not dirty and not locked) so they can be collected. max_size None keeps them all.
+    """
+
+    def __init__(self, max_size=EPISODE_CACHE_SIZE):
+        self.max_size = max_size
+
+        # TVEpisode -> last use
+        self._recent = {}
+        self._tick = 0
+
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._recent)
+
+    def touch(self, ep):
+
+        with self._lock:
+            self._tick += 1
+            self._recent[ep] = self._tick
+
+            if self.max_size is not None and len(self._recent) > self.max_size:
+                self._evict()
+
+    def forget(self, ep):
+
+        with self._lock:
+            if ep in self._recent:
+                del self._recent[ep]
+
+    def _evict(self):
+        """
+        Drops the least recently used clean episodes until we're a tenth below max_size so that
+        the sort isn't repeated on every new episode.
+        """
+
+        target = int(self.max_size * 0.9)
+
+        for ep, tick in sorted(self._recent.items(), key=lambda x: x[1]):  # @UnusedVariable
+            if len(self._recent) <= target:
+                break
+
+            if ep.dirty or ep.lock.locked():
+                continue
+
+            del self._recent[ep]
+
+recent_episodes = RecentEpisodes()
+
+
+class EpisodeCache(object):
+    """
+    Season/episode keyed store for the TVEpisode objects of a show.
+
+    Episodes are only weakly referenced here, what keeps them alive is the shared RecentEpisodes. An
+    episode that dropped out of it but is still referenced elsewhere is handed out again instead of
+    creating a second object for the same episode.
+    """
+
+    def __init__(self, recent=None):
+        if recent is None:
+            recent = recent_episodes
+        self.recent = recent
+
+        # season -> {episode: TVEpisode}, the season keys stay around even if all their episodes are gone
+        self._seasons = {}
+
+    def __contains__(self, season):
+        return season in self._seasons
+
+    def __getitem__(self, season):
+        return self._seasons[season]
+
+    def __iter__(self):
+        return iter(self._seasons.keys())
+
+    def __len__(self):
+        return sum([len(x) for x in self._seasons.values()])
+
+    def iteritems(self):
+        return self._seasons.items().__iter__()
+
+    def get(self, season, episode):
+        """
+        Returns the episode object for season/episode if there is one, None otherwise
+        """
+
+        if season not in self._seasons:
+            return None
+
+        ep = self._seasons[season].get(episode)
+        if ep is not None:
+            self.recent.touch(ep)
+
+        return ep
+
+    def add(self, season, episode, ep):
+
+        if season not in self._seasons:
+            self._seasons[season] = weakref.WeakValueDictionary()
+
+        self._seasons[season][episode] = ep
+        self.recent.touch(ep)
+
+    def remove(self, season, episode):
+
+        if season not in self._seasons:
+            return
+
+        ep = self._seasons[season].get(episode)
+        if ep is not None:
+            del self._seasons[season][episode]
+            self.recent.forget(ep)
+
+    def clear(self):
+
+        for episodes in self._seasons.values():
+            for ep in episodes.values():
+                self.recent.forget(ep)
+
+        self._seasons = {}
+
 
 class TVShow(object):
 
-    def __init__(self, tvdbid, lang=""):
+    def __init__(self, tvdbid, lang="", sqlShow=None):
 
         self.tvdbid = tvdbid
 
@@ -76,13 +207,17 @@ class TVShow(object):
         self.lock = threading.Lock()
         self._isDirGood = False
 
-        self.episodes = {}
+        self.episodes = EpisodeCache()
 
         otherShow = helpers.findCertainShow(sickbeard.showList, self.tvdbid)
         if otherShow is not None:
             raise exceptions.MultipleShowObjectsException("Can't create a show if it already exists")
 
-        self.loadFromDB()
+        # a row from a bulk tv_shows select saves us a query per show
+        if sqlShow is not None:
+            self.loadFromDBResult(sqlShow)
+        else:
+            self.loadFromDB()
 
     def _getLocation(self):
         # no dir check needed if missing show dirs are created during post-processing
@@ -113,11 +248,7 @@ class TVShow(object):
     # delete references to anything that's not in the internal lists
     def flushEpisodes(self):
 
-        for curSeason in self.episodes:
-            for curEp in self.episodes[curSeason]:
-                myEp = self.episodes[curSeason][curEp]
-                self.episodes[curSeason][curEp] = None
-                del myEp
+        self.episodes.clear()
 
     def getAllEpisodes(self, season=None, has_location=False):
 
@@ -159,12 +290,9 @@ class TVShow(object):
 
     def getEpisode(self, season, episode, file=None, noCreate=False):
 
-        if not season in self.episodes:
-            self.episodes[season] = {}
-
-        ep = None
+        ep = self.episodes.get(season, episode)
 
-        if not episode in self.episodes[season] or self.episodes[season][episode] is None:
+        if ep is None:
             if noCreate:
                 return None
 
@@ -176,9 +304,9 @@ class TVShow(object):
                 ep = TVEpisode(self, season, episode)
 
             if ep is not None:
-                self.episodes[season][episode] = ep
+                self.episodes.add(season, episode, ep)
 
-        return self.episodes[season][episode]
+        return ep
 
     def should_update(self, update_date=datetime.date.today()):
 
@@ -262,7 +390,11 @@ class TVShow(object):
             curEp.createMetaFiles()
 
     # find all media files in the show folder and create episodes for as many as possible
-    def loadEpisodesFromDir(self):
+    def loadEpisodesFromDir(self, full_scan=False):
+        """
+        Creates or updates episodes for the media files in the show dir. Files which have the same size and
+        mtime as during the last scan and still belong to an episode are skipped unless full_scan is True.
+        """
 
         if not ek.ek(os.path.isdir, self._location):
             logger.log(str(self.tvdbid) + u": Show dir doesn't exist, not loading episodes from disk")
@@ -273,9 +405,38 @@ class TVShow(object):
         # get file list
         mediaFiles = helpers.listMediaFiles(self._location)
 
+        # path -> (size, mtime) of the files we handled last time
+        cacheDB = db.DBConnection('cache.db')
+        if full_scan:
+            known_files = {}
+            linked_files = set()
+        else:
+            sql_results = cacheDB.select("SELECT path, size, mtime FROM show_files WHERE showid = ?", [self.tvdbid])
+            known_files = dict((x["path"], (x["size"], x["mtime"])) for x in sql_results)
+
+            # an unchanged file still has to be linked again if its episode was deleted or renumbered since
+            sql_results = db.DBConnection().select("SELECT location FROM tv_episodes WHERE showid = ? AND location != ''", [self.tvdbid])
+            linked_files = set(x["location"] for x in sql_results)
+
+        # (path, size, mtime) of every file that's been handled, to compare against next time
+        scanned_files = []
+        num_unchanged = 0
+
         # create TVEpisodes from each media file (if possible)
         for mediaFile in mediaFiles:
 
+            try:
+                file_stat = ek.ek(os.stat, mediaFile)
+            except OSError:
+                continue
+
+            file_info = (file_stat.st_size, int(file_stat.st_mtime))
+
+            if known_files.get(mediaFile) == file_info and mediaFile in linked_files:
+                scanned_files.append((mediaFile,) + file_info)
+                num_unchanged += 1
+                continue
+
             curEpisode = None
 
             logger.log(str(self.tvdbid) + u": Creating episode from " + mediaFile, logger.DEBUG)
@@ -308,6 +469,12 @@ class TVShow(object):
             # store the reference in the show
             if curEpisode is not None:
                 curEpisode.saveToDB()
+                scanned_files.append((mediaFile,) + file_info)
+
+        logger.log(str(self.tvdbid) + u": Skipped " + str(num_unchanged) + u" of " + str(len(mediaFiles)) + u" files which didn't change since the last scan", logger.DEBUG)
+
+        cacheDB.mass_action([["DELETE FROM show_files WHERE showid = ?", [self.tvdbid]]] +
+                            [["INSERT INTO show_files (showid, path, size, mtime) VALUES (?,?,?,?)", [self.tvdbid] + list(x)] for x in scanned_files])
 
     def loadEpisodesFromDB(self):
 
@@ -615,47 +782,56 @@ class TVShow(object):
             logger.log(str(self.tvdbid) + u": Unable to find the show in the database")
             return
         else:
-            if self.name == "":
-                self.name = sqlResults[0]["show_name"]
-            self.tvrname = sqlResults[0]["tvr_name"]
-            if self.network == "":
-                self.network = sqlResults[0]["network"]
-            if self.genre == "":
-                self.genre = sqlResults[0]["genre"]
+            self.loadFromDBResult(sqlResults[0])
 
-            self.runtime = sqlResults[0]["runtime"]
+    def loadFromDBResult(self, sqlShow):
+        """
+        Populates the show from an already fetched tv_shows row.
 
-            self.status = sqlResults[0]["status"]
-            if self.status is None:
-                self.status = ""
-            self.airs = sqlResults[0]["airs"]
-            if self.airs is None:
-                self.airs = ""
-            self.startyear = sqlResults[0]["startyear"]
-            if self.startyear is None:
-                self.startyear = 0
+        sqlShow: a row from the tv_shows table
+        """
 
-            self.air_by_date = sqlResults[0]["air_by_date"]
-            if self.air_by_date is None:
-                self.air_by_date = 0
+        if self.name == "":
+            self.name = sqlShow["show_name"]
+        self.tvrname = sqlShow["tvr_name"]
+        if self.network == "":
+            self.network = sqlShow["network"]
+        if self.genre == "":
+            self.genre = sqlShow["genre"]
 
-            self.quality = int(sqlResults[0]["quality"])
-            self.flatten_folders = int(sqlResults[0]["flatten_folders"])
-            self.paused = int(sqlResults[0]["paused"])
-            self.skip_notices = int(sqlResults[0]["skip_notices"])
+        self.runtime = sqlShow["runtime"]
 
-            self._location = sqlResults[0]["location"]
+        self.status = sqlShow["status"]
+        if self.status is None:
+            self.status = ""
+        self.airs = sqlShow["airs"]
+        if self.airs is None:
+            self.airs = ""
+        self.startyear = sqlShow["startyear"]
+        if self.startyear is None:
+            self.startyear = 0
+
+        self.air_by_date = sqlShow["air_by_date"]
+        if self.air_by_date is None:
+            self.air_by_date = 0
+
+        self.quality = int(sqlShow["quality"])
+        self.flatten_folders = int(sqlShow["flatten_folders"])
+        self.paused = int(sqlShow["paused"])
+        self.skip_notices = int(sqlShow["skip_notices"])
 
-            if self.tvrid == 0:
-                self.tvrid = int(sqlResults[0]["tvr_id"])
+        self._location = sqlShow["location"]
 
-            if self.lang == "":
-                self.lang = sqlResults[0]["lang"]
+        if self.tvrid == 0:
+            self.tvrid = int(sqlShow["tvr_id"])
 
-            self.last_update_tvdb = sqlResults[0]["last_update_tvdb"]
+        if self.lang == "":
+            self.lang = sqlShow["lang"]
 
-            self.rls_ignore_words = sqlResults[0]["rls_ignore_words"]
-            self.rls_require_words = sqlResults[0]["rls_require_words"]
+        self.last_update_tvdb = sqlShow["last_update_tvdb"]
+
+        self.rls_ignore_words = sqlShow["rls_ignore_words"]
+        self.rls_require_words = sqlShow["rls_require_words"]
 
     def loadFromTVDB(self, cache=True, tvapi=None, cachedSeason=None):
 
@@ -739,6 +915,10 @@ class TVShow(object):
         myDB = db.DBConnection()
         myDB.action("DELETE FROM tv_episodes WHERE showid = ?", [self.tvdbid])
         myDB.action("DELETE FROM tv_shows WHERE tvdb_id = ?", [self.tvdbid])
+        show_location_cache.clearCache()
+
+        cacheDB = db.DBConnection('cache.db')
+        cacheDB.action("DELETE FROM show_files WHERE showid = ?", [self.tvdbid])
 
         # remove self from show list
         sickbeard.showList = [x for x in sickbeard.showList if x.tvdbid != self.tvdbid]
@@ -755,14 +935,14 @@ class TVShow(object):
         logger.log(u"Checking & filling cache for show " + self.name)
         cache_inst.fill_cache(self)
 
-    def refreshDir(self):
+    def refreshDir(self, full_scan=False):
 
         # make sure the show dir is where we think it is unless dirs are created on the fly
         if not ek.ek(os.path.isdir, self._location) and not sickbeard.CREATE_MISSING_SHOW_DIRS:
             return False
 
         # load from dir
-        self.loadEpisodesFromDir()
+        self.loadEpisodesFromDir(full_scan)
 
         # run through all locations from DB, check that they exist
         logger.log(str(self.tvdbid) + u": Loading all episodes with a location from the database")
@@ -825,6 +1005,9 @@ class TVShow(object):
 
         myDB.upsert("tv_shows", newValueDict, controlValueDict)
 
+        # the location might have changed
+        show_location_cache.clearCache()
+
     def __str__(self):
         toReturn = ""
         toReturn += "name: " + self.name + "\n"
@@ -844,11 +1027,11 @@ class TVShow(object):
 
     def wantEpisode(self, season, episode, quality, manualSearch=False):
 
-        logger.log(u"Checking if found episode " + str(season) + "x" + str(episode) + " is wanted at quality " + Quality.qualityStrings[quality], logger.DEBUG)
+        logger.log(u"Checking if found episode %sx%s is wanted at quality %s", logger.DEBUG, season, episode, Quality.qualityStrings[quality])
 
         # if the quality isn't one we want under any circumstances then just say no
         anyQualities, bestQualities = Quality.splitQuality(self.quality)
-        logger.log(u"any,best = " + str(anyQualities) + " " + str(bestQualities) + " and found " + str(quality), logger.DEBUG)
+        logger.log(u"any,best = %s %s and found %s", logger.DEBUG, anyQualities, bestQualities, quality)
 
         if quality not in anyQualities + bestQualities:
             logger.log(u"Don't want this quality, ignoring found episode", logger.DEBUG)
@@ -864,7 +1047,7 @@ class TVShow(object):
         epStatus = int(sqlResults[0]["status"])
         epStatus_text = statusStrings[epStatus]
 
-        logger.log(u"Existing episode status: " + str(epStatus) + " (" + epStatus_text + ")", logger.DEBUG)
+        logger.log(u"Existing episode status: %s (%s)", logger.DEBUG, epStatus, epStatus_text)
 
         # if we know we don't want it then just say no
         if epStatus in (SKIPPED, IGNORED, ARCHIVED) and not manualSearch:
@@ -937,6 +1120,11 @@ def dirty_setter(attr_name):
 
 class TVEpisode(object):
 
+    # there can be hundreds of thousands of these so don't give each one a __dict__
+    __slots__ = ('_name', '_season', '_episode', '_description', '_airdate', '_hasnfo', '_hastbn', '_status',
+                 '_tvdbid', '_file_size', '_release_name', '_location', 'dirty', 'show', 'lock', 'relatedEps',
+                 '__weakref__')
+
     def __init__(self, show, season, episode, file=""):
 
         self._name = ""
@@ -1330,7 +1518,7 @@ class TVEpisode(object):
         # remove myself from the show dictionary
         if self.show.getEpisode(self.season, self.episode, noCreate=True) == self:
             logger.log(u"Removing myself from my show's list", logger.DEBUG)
-            del self.show.episodes[self.season][self.episode]
+            self.show.episodes.remove(self.season, self.episode)
 
         # delete myself from the DB
         logger.log(u"Deleting myself from the database", logger.DEBUG)
@@ -19,6 +19,12 @@
 import time
 import datetime
 import sqlite3
+import urllib2
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
 
 import sickbeard
 
@@ -28,7 +34,7 @@ from sickbeard.common import Quality
 
 from sickbeard import helpers, show_name_helpers
 from sickbeard import name_cache
-from sickbeard.exceptions import ex, AuthException
+from sickbeard.exceptions import ex, AuthException, FeedUnchangedException
 
 try:
     import xml.etree.cElementTree as etree
@@ -72,6 +78,14 @@ class TVCache():
         self.providerID = self.provider.getID()
         self.minTime = 10
 
+        # how many updates were skipped because the feed hadn't changed and roughly how much that saved downloading
+        self.skippedUpdates = 0
+        self.savedBytes = 0
+
+        # feed_state rows to save once the update they came from has been loaded into the cache
+        self._newFeedState = []
+        self._unchangedBytes = 0
+
     def _getDB(self):
 
         return CacheDBConnection(self.providerID)
@@ -88,6 +102,89 @@ class TVCache():
 
         return data
 
+    def _getFeed(self, url, conditional=True):
+        """
+        Loads url, asking the server to only send it if it's changed since the last update. Raises
+        FeedUnchangedException if it hasn't changed (also if the server sent the exact same data again)
+        and returns None if it couldn't be loaded.
+
+        url: The feed URL
+        conditional: False to always load the feed
+        """
+
+        myDB = self._getDB()
+        sqlResults = myDB.select("SELECT * FROM feed_state WHERE provider = ? AND url = ?", [self.providerID, url])
+        if conditional and sqlResults:
+            lastState = sqlResults[0]
+        else:
+            lastState = None
+
+        headers = {}
+        if lastState and lastState["etag"]:
+            headers['If-None-Match'] = lastState["etag"]
+        if lastState and lastState["last_modified"]:
+            headers['If-Modified-Since'] = lastState["last_modified"]
+
+        if not self.provider.health.available():
+            logger.log(u"" + self.provider.name + " isn't responding at the moment, not loading " + url, logger.DEBUG)
+            return None
+
+        start_time = time.time()
+
+        try:
+            response = helpers.getURLFileLike(urllib2.Request(url, headers=headers), throw_exc=True)
+
+        except urllib2.HTTPError, e:
+            e.close()
+            if e.code == 304 and lastState:
+                self.provider.health.success(time.time() - start_time)
+                self._unchangedBytes += int(lastState["size"] or 0)
+                raise FeedUnchangedException(u"The server says " + url + " hasn't changed")
+
+            # a 4xx means the provider answered, it just didn't like the request (eg. a wrong API key)
+            if e.code >= 500:
+                self.provider.health.failure(time.time() - start_time)
+            else:
+                self.provider.health.success(time.time() - start_time)
+            logger.log(u"Error loading " + self.provider.name + " URL: " + url, logger.ERROR)
+            return None
+
+        except Exception:
+            self.provider.health.failure(time.time() - start_time)
+            logger.log(u"Error loading " + self.provider.name + " URL: " + url, logger.ERROR)
+            return None
+
+        self.provider.health.success(time.time() - start_time)
+
+        etag = response.info().get('ETag')
+        last_modified = response.info().get('Last-Modified')
+
+        data = helpers.readURLFileLike(response)
+        data_hash = md5(data).hexdigest()
+
+        newState = {'etag': etag, 'last_modified': last_modified, 'hash': data_hash, 'size': len(data)}
+
+        # some servers don't do conditional requests, there's no point in parsing the same data again though
+        if lastState and lastState["hash"] == data_hash:
+            myDB.upsert("feed_state", newState, {'provider': self.providerID, 'url': url})
+            raise FeedUnchangedException(u"The data from " + url + " is the same as last time")
+
+        self._newFeedState.append((url, newState))
+
+        return data
+
+    def _saveFeedState(self):
+        """
+        Remembers the feeds loaded during this update so the next update can ask if they've changed
+        """
+
+        myDB = self._getDB()
+
+        for url, newState in self._newFeedState:
+            myDB.upsert("feed_state", newState, {'provider': self.providerID, 'url': url})
+
+        self._newFeedState = []
+
     def _checkAuth(self, parsedXML):
         return True
 
@@ -101,7 +198,18 @@ class TVCache():
 
         if self._checkAuth(None):
 
-            data = self._getRSSData()
+            self._newFeedState = []
+            self._unchangedBytes = 0
+
+            try:
+                data = self._getRSSData()
+
+            except FeedUnchangedException, e:
+                self.skippedUpdates += 1
+                self.savedBytes += self._unchangedBytes
+                logger.log(u"Keeping the old " + self.provider.name + " cache: " + ex(e) + " (skipped " + str(self.skippedUpdates) + " updates and " + str(self.savedBytes) + " bytes so far)", logger.DEBUG)
+                self.setLastUpdate()
+                return []
 
             # as long as the http request worked we count this as an update
             if data:
@@ -131,6 +239,8 @@ class TVCache():
                 for item in items:
                     self._parseItem(item)
 
+                self._saveFeedState()
+
             else:
                 raise AuthException(u"Your authentication credentials for " + self.provider.name + " are incorrect, check your config")
 
@@ -153,11 +263,11 @@ class TVCache():
             title = self._translateTitle(title)
             url = self._translateLinkURL(url)
 
-            logger.log(u"Adding item from RSS to cache: " + title, logger.DEBUG)
+            logger.log(u"Adding item from RSS to cache: %s", logger.DEBUG, title)
             self._addCacheEntry(title, url)
 
         else:
-            logger.log(u"The XML returned from the " + self.provider.name + " feed is incomplete, this result is unusable", logger.DEBUG)
+            logger.log(u"The XML returned from the %s feed is incomplete, this result is unusable", logger.DEBUG, self.provider.name)
             return
 
     def _getLastUpdate(self):
@@ -189,7 +299,7 @@ class TVCache():
     def shouldUpdate(self):
         # if we've updated recently then skip the update
         if datetime.datetime.today() - self.lastUpdate < datetime.timedelta(minutes=self.minTime):
-            logger.log(u"Last update was too soon, using old cache: today()-" + str(self.lastUpdate) + "<" + str(datetime.timedelta(minutes=self.minTime)), logger.DEBUG)
+            logger.log(u"Last update was too soon, using old cache: today()-%s<%s", logger.DEBUG, self.lastUpdate, datetime.timedelta(minutes=self.minTime))
             return False
 
         return True
@@ -206,15 +316,15 @@ class TVCache():
                 myParser = NameParser()
                 parse_result = myParser.parse(curName)
             except InvalidNameException:
-                logger.log(u"Unable to parse the filename " + curName + " into a valid episode", logger.DEBUG)
+                logger.log(u"Unable to parse the filename %s into a valid episode", logger.DEBUG, curName)
                 continue
 
         if not parse_result:
-            logger.log(u"Giving up because I'm unable to parse this name: " + name, logger.DEBUG)
+            logger.log(u"Giving up because I'm unable to parse this name: %s", logger.DEBUG, name)
             return False
 
         if not parse_result.series_name:
-            logger.log(u"No series name retrieved from " + name + ", unable to cache it", logger.DEBUG)
+            logger.log(u"No series name retrieved from %s, unable to cache it", logger.DEBUG, name)
             return False
 
         tvdb_lang = None
@@ -229,7 +339,7 @@ class TVCache():
                     tvrage_id = showObj.tvrid
                     tvdb_lang = showObj.lang
                 else:
-                    logger.log(u"We were given a TVDB id " + str(tvdb_id) + " but it doesn't match a show we have in our list, so leaving tvrage_id empty", logger.DEBUG)
+                    logger.log(u"We were given a TVDB id %s but it doesn't match a show we have in our list, so leaving tvrage_id empty", logger.DEBUG, tvdb_id)
                     tvrage_id = 0
 
             # if we have only a tvrage_id then use the database
@@ -239,14 +349,14 @@ class TVCache():
                     tvdb_id = showObj.tvdbid
                     tvdb_lang = showObj.lang
                 else:
-                    logger.log(u"We were given a TVRage id " + str(tvrage_id) + " but it doesn't match a show we have in our list, so leaving tvdb_id empty", logger.DEBUG)
+                    logger.log(u"We were given a TVRage id %s but it doesn't match a show we have in our list, so leaving tvdb_id empty", logger.DEBUG, tvrage_id)
                     tvdb_id = 0
 
             # if they're both empty then fill out as much info as possible by searching the show name
             else:
 
                 # check the name cache and see if we already know what show this is
-                logger.log(u"Checking the cache to see if we already know the tvdb id of " + parse_result.series_name, logger.DEBUG)
+                logger.log(u"Checking the cache to see if we already know the tvdb id of %s", logger.DEBUG, parse_result.series_name)
                 tvdb_id = name_cache.retrieveNameFromCache(parse_result.series_name)
 
                 # remember if the cache lookup worked or not so we know whether we should bother updating it later
@@ -254,7 +364,7 @@ class TVCache():
                     logger.log(u"No cache results returned, continuing on with the search", logger.DEBUG)
                     from_cache = False
                 else:
-                    logger.log(u"Cache lookup found " + repr(tvdb_id) + ", using that", logger.DEBUG)
+                    logger.log(u"Cache lookup found %r, using that", logger.DEBUG, tvdb_id)
                     from_cache = True
 
                 # if the cache failed, try looking up the show name in the database
@@ -262,7 +372,7 @@ class TVCache():
                     logger.log(u"Trying to look the show up in the show database", logger.DEBUG)
                     showResult = helpers.searchDBForShow(parse_result.series_name)
                     if showResult:
-                        logger.log(u"" + parse_result.series_name + " was found to be show " + showResult[1] + " (" + str(showResult[0]) + ") in our DB.", logger.DEBUG)
+                        logger.log(u"%s was found to be show %s (%s) in our DB.", logger.DEBUG, parse_result.series_name, showResult[1], showResult[0])
                         tvdb_id = showResult[0]
 
                 # if the DB lookup fails then do a comprehensive regex search
@@ -270,7 +380,7 @@ class TVCache():
                     logger.log(u"Couldn't figure out a show name straight from the DB, trying a regex search instead", logger.DEBUG)
                     for curShow in sickbeard.showList:
                         if show_name_helpers.isGoodResult(name, curShow, False):
-                            logger.log(u"Successfully matched " + name + " to " + curShow.name + " with regex", logger.DEBUG)
+                            logger.log(u"Successfully matched %s to %s with regex", logger.DEBUG, name, curShow.name)
                             tvdb_id = curShow.tvdbid
                             tvdb_lang = curShow.lang
                             break
@@ -381,7 +491,7 @@ class TVCache():
 
             # if the show says we want that episode then add it to the list
             if not showObj.wantEpisode(curSeason, curEp, curQuality, manualSearch):
-                logger.log(u"Skipping " + curResult["name"] + " because we don't want an episode that's " + Quality.qualityStrings[curQuality], logger.DEBUG)
+                logger.log(u"Skipping %s because we don't want an episode that's %s", logger.DEBUG, curResult["name"], Quality.qualityStrings[curQuality])
 
             else:
 
@@ -394,7 +504,7 @@ class TVCache():
                 title = curResult["name"]
                 url = curResult["url"]
 
-                logger.log(u"Found result " + title + " at " + url)
+                logger.log(u"Found result %s at %s", logger.MESSAGE, title, url)
 
                 result = self.provider.getResult([epObj])
                 result.url = url
@@ -1156,44 +1156,7 @@ class CMD_Logs(ApiCall):
         # 10 = Debug / 20 = Info / 30 = Warning / 40 = Error
         minLevel = logger.reverseNames[str(self.min_level).upper()]
 
-        data = []
-        if os.path.isfile(logger.sb_log_instance.log_file_path):
-            with ek.ek(open, logger.sb_log_instance.log_file_path) as f:
-                data = f.readlines()
-
-        regex = "^(\d\d\d\d)\-(\d\d)\-(\d\d)\s*(\d\d)\:(\d\d):(\d\d)\s*([A-Z]+)\s*(.+?)\s*\:\:\s*(.*)$"
-
-        finalData = []
-
-        numLines = 0
-        lastLine = False
-        numToShow = min(50, len(data))
-
-        for x in reversed(data):
-
-            x = x.decode('utf-8')
-            match = re.match(regex, x)
-
-            if match:
-                level = match.group(7)
-                if level not in logger.reverseNames:
-                    lastLine = False
-                    continue
-
-                if logger.reverseNames[level] >= minLevel:
-                    lastLine = True
-                    finalData.append(x.rstrip("\n"))
-                else:
-                    lastLine = False
-                    continue
-
-            elif lastLine:
-                finalData.append("AA" + x)
-
-            numLines += 1
-
-            if numLines >= numToShow:
-                break
+        finalData = [x.rstrip("\n") for x in logger.read_log_lines(minLevel, 50)[0]]
 
         return _responds(RESULT_SUCCESS, finalData)
 
@@ -1490,6 +1453,28 @@ class CMD_SickBeardPing(ApiCall):
             return _responds(RESULT_SUCCESS, msg="Pong")
 
 
+class CMD_SickBeardProviders(ApiCall):
+    _help = {"desc": "get the search providers and how well they've been responding"}
+
+    def __init__(self, args, kwargs):
+        # required
+        # optional
+        # super, missing, help
+        ApiCall.__init__(self, args, kwargs)
+
+    def run(self):
+        """ get the search providers and their health """
+        providerList = []
+        for curProvider in sickbeard.providers.sortedProviderList():
+            curProviderDict = curProvider.health.getStats()
+            curProviderDict["id"] = curProvider.getID()
+            curProviderDict["name"] = curProvider.name
+            curProviderDict["enabled"] = int(curProvider.isActive())
+            providerList.append(curProviderDict)
+
+        return _responds(RESULT_SUCCESS, providerList)
+
+
 class CMD_SickBeardRestart(ApiCall):
     _help = {"desc": "restart sickbeard"}
 
@@ -2101,7 +2086,7 @@ class CMD_ShowRefresh(ApiCall):
             return _responds(RESULT_FAILURE, msg="Show not found")
 
         try:
-            sickbeard.showQueueScheduler.action.refreshShow(showObj)  # @UndefinedVariable
+            sickbeard.showQueueScheduler.action.refreshShow(showObj, full_scan=True)  # @UndefinedVariable
             return _responds(RESULT_SUCCESS, msg=u"" + showObj.name + " has queued to be refreshed")
         except exceptions.CantRefreshException, e:
             logger.log(u"API:: Unable to refresh " + showObj.name + ". " + str(ex(e)), logger.ERROR)
@@ -2515,6 +2500,7 @@ _functionMaper = {"help": CMD_Help,
                   "sb.getrootdirs": CMD_SickBeardGetRootDirs,
                   "sb.pausebacklog": CMD_SickBeardPauseBacklog,
                   "sb.ping": CMD_SickBeardPing,
+                  "sb.providers": CMD_SickBeardProviders,
                   "sb.restart": CMD_SickBeardRestart,
                   "sb.searchtvdb": CMD_SickBeardSearchTVDB,
                   "sb.setdefaults": CMD_SickBeardSetDefaults,
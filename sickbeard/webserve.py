@@ -61,6 +61,9 @@ except ImportError:
 
 from sickbeard import browser
 
+# how many folders are looked at at the same time when adding existing shows, mostly waiting on (network) disks
+MASS_ADD_SCAN_THREADS = 8
+
 
 class PageTemplate (Template):
     def __init__(self, *args, **KWs):
@@ -838,7 +841,7 @@ class ConfigPostProcessing:
     @cherrypy.expose
     def savePostProcessing(self, naming_pattern=None, naming_multi_ep=None,
                     xbmc_data=None, xbmc_12plus_data=None, mediabrowser_data=None, sony_ps3_data=None, wdtv_data=None, tivo_data=None, mede8er_data=None,
-                    keep_processed_dir=None, process_automatically=None, rename_episodes=None,
+                    keep_processed_dir=None, process_method=None, process_automatically=None, rename_episodes=None,
                     move_associated_files=None, filter_associated_files=None, tv_download_dir=None, naming_custom_abd=None, naming_abd_pattern=None):
 
         results = []
@@ -848,6 +851,8 @@ class ConfigPostProcessing:
             results += ["Unable to create directory " + os.path.normpath(tv_download_dir) + ", dir not changed."]
 
         sickbeard.KEEP_PROCESSED_DIR = config.checkbox_to_value(keep_processed_dir)
+        if process_method in ('copy', 'hardlink'):
+            sickbeard.PROCESS_METHOD = process_method
         sickbeard.MOVE_ASSOCIATED_FILES = config.checkbox_to_value(move_associated_files)
         sickbeard.FILTER_ASSOCIATED_FILES = filter_associated_files
         sickbeard.RENAME_EPISODES = config.checkbox_to_value(rename_episodes)
@@ -1286,12 +1291,14 @@ class ConfigHidden:
         return _munge(t)
 
     @cherrypy.expose
-    def saveHidden(self, anon_redirect=None, display_all_seasons=None, git_path=None, extra_scripts=None, create_missing_show_dirs=None, add_shows_wo_dir=None):
+    def saveHidden(self, anon_redirect=None, display_all_seasons=None, git_path=None, extra_scripts=None, create_missing_show_dirs=None, add_shows_wo_dir=None, debug_logging=None):
 
         results = []
 
         sickbeard.ANON_REDIRECT = anon_redirect
         sickbeard.DISPLAY_ALL_SEASONS = config.checkbox_to_value(display_all_seasons)
+        sickbeard.DEBUG_LOGGING = bool(config.checkbox_to_value(debug_logging))
+        logger.set_level(logger.DEBUG if sickbeard.DEBUG_LOGGING else logger.MESSAGE)
         sickbeard.GIT_PATH = git_path
         sickbeard.EXTRA_SCRIPTS = [x.strip() for x in extra_scripts.split('|') if x.strip()]
         sickbeard.CREATE_MISSING_SHOW_DIRS = config.checkbox_to_value(create_missing_show_dirs)
@@ -1553,7 +1560,7 @@ class NewHomeAddShows:
                 root_dirs.remove(tmp)
                 root_dirs = [tmp] + root_dirs
 
-        dir_list = []
+        path_list = []
 
         for root_dir in root_dirs:
             try:
@@ -1562,41 +1569,45 @@ class NewHomeAddShows:
                 continue
 
             for cur_file in file_list:
+                path_list.append(ek.ek(os.path.normpath, ek.ek(os.path.join, root_dir, cur_file)))
 
-                cur_path = ek.ek(os.path.normpath, ek.ek(os.path.join, root_dir, cur_file))
-                if not ek.ek(os.path.isdir, cur_path):
-                    continue
+        # see if the folders are in the DB already
+        added_locations = set([x["location"] for x in myDB.select("SELECT location FROM tv_shows")])
 
-                cur_dir = {
-                           'dir': cur_path,
-                           'display_dir': '<b>' + ek.ek(os.path.dirname, cur_path) + os.sep + '</b>' + ek.ek(os.path.basename, cur_path),
-                           }
+        # the folders are independent so look at several of them at once, the order of the list is kept
+        dir_list = helpers.map_in_threads(lambda x: self._scanShowDir(x, added_locations), path_list, MASS_ADD_SCAN_THREADS)
 
-                # see if the folder is in XBMC already
-                dirResults = myDB.select("SELECT * FROM tv_shows WHERE location = ?", [cur_path])
+        t.dirList = [x for x in dir_list if x]
 
-                if dirResults:
-                    cur_dir['added_already'] = True
-                else:
-                    cur_dir['added_already'] = False
+        return _munge(t)
+
+    def _scanShowDir(self, cur_path, added_locations):
+        """
+        Looks for existing show metadata in a folder for massAddTable. Returns None if cur_path isn't a folder.
+        """
 
-                dir_list.append(cur_dir)
+        if not ek.ek(os.path.isdir, cur_path):
+            return None
 
-                tvdb_id = ''
-                show_name = ''
-                for cur_provider in sickbeard.metadata_provider_dict.values():
-                    (tvdb_id, show_name) = cur_provider.retrieveShowMetadata(cur_path)
-                    if tvdb_id and show_name:
-                        break
+        cur_dir = {
+                   'dir': cur_path,
+                   'display_dir': '<b>' + ek.ek(os.path.dirname, cur_path) + os.sep + '</b>' + ek.ek(os.path.basename, cur_path),
+                   'added_already': cur_path in added_locations,
+                   }
 
-                cur_dir['existing_info'] = (tvdb_id, show_name)
+        tvdb_id = ''
+        show_name = ''
+        for cur_provider in sickbeard.metadata_provider_dict.values():
+            (tvdb_id, show_name) = cur_provider.retrieveShowMetadata(cur_path)
+            if tvdb_id and show_name:
+                break
 
-                if tvdb_id and helpers.findCertainShow(sickbeard.showList, tvdb_id):
-                    cur_dir['added_already'] = True
+        cur_dir['existing_info'] = (tvdb_id, show_name)
 
-        t.dirList = dir_list
+        if tvdb_id and helpers.findCertainShow(sickbeard.showList, tvdb_id):
+            cur_dir['added_already'] = True
 
-        return _munge(t)
+        return cur_dir
 
     @cherrypy.expose
     def newShow(self, show_to_add=None, other_shows=None):
@@ -1822,56 +1833,24 @@ class ErrorLogs:
         redirect("/errorlogs/")
 
     @cherrypy.expose
-    def viewlog(self, minLevel=logger.MESSAGE, maxLines=500):
+    def viewlog(self, minLevel=logger.MESSAGE, maxLines=500, offset=None):
 
         t = PageTemplate(file="viewlogs.tmpl")
         t.submenu = ErrorLogsMenu
 
         minLevel = int(minLevel)
+        maxLines = int(maxLines)
+        if offset is not None:
+            offset = int(offset)
 
-        data = []
-        if os.path.isfile(logger.sb_log_instance.log_file_path):
-            with ek.ek(open, logger.sb_log_instance.log_file_path) as f:
-                data = f.readlines()
-
-        regex = "^(\d\d\d\d)\-(\d\d)\-(\d\d)\s*(\d\d)\:(\d\d):(\d\d)\s*([A-Z]+)\s*(.+?)\s*\:\:\s*(.*)$"
-
-        finalData = []
-
-        numLines = 0
-        lastLine = False
-        numToShow = min(maxLines, len(data))
-
-        for x in reversed(data):
-
-            x = x.decode('utf-8')
-            match = re.match(regex, x)
-
-            if match:
-                level = match.group(7)
-                if level not in logger.reverseNames:
-                    lastLine = False
-                    continue
-
-                if logger.reverseNames[level] >= minLevel:
-                    lastLine = True
-                    finalData.append(x)
-                else:
-                    lastLine = False
-                    continue
-
-            elif lastLine:
-                finalData.append("AA" + x)
-
-            numLines += 1
-
-            if numLines >= numToShow:
-                break
+        finalData, nextOffset = logger.read_log_lines(minLevel, maxLines, offset)
 
         result = "".join(finalData)
 
         t.logLines = result
         t.minLevel = minLevel
+        t.maxLines = maxLines
+        t.nextOffset = nextOffset
 
         return _munge(t)
 
@@ -2449,7 +2428,7 @@ class Home:
 
         # force the update from the DB
         try:
-            sickbeard.showQueueScheduler.action.refreshShow(showObj)  # @UndefinedVariable
+            sickbeard.showQueueScheduler.action.refreshShow(showObj, full_scan=True)  # @UndefinedVariable
         except exceptions.CantRefreshException, e:
             ui.notifications.error("Unable to refresh this show.", ex(e))
 
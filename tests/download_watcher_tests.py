@@ -0,0 +1,142 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+import test_lib as test
+
+import datetime
+import os
+import shutil
+import tempfile
+
+import sickbeard
+from sickbeard import downloadWatcher, processTV
+
+
+class FakeScheduler:
+
+    def __init__(self, minutes):
+        self.cycleTime = datetime.timedelta(minutes=minutes)
+
+
+class DownloadWatcherTests(unittest.TestCase):
+
+    def run(self, result=None):
+        # there's nothing to test without inotify
+        try:
+            downloadWatcher.Inotify().close()
+        except OSError:
+            return
+        unittest.TestCase.run(self, result)
+
+    def setUp(self):
+        self.download_dir = tempfile.mkdtemp()
+        self.processed = []
+
+        self.old_settings = (sickbeard.TV_DOWNLOAD_DIR, sickbeard.PROCESS_AUTOMATICALLY, sickbeard.POSTPROCESS_FREQUENCY)
+        sickbeard.TV_DOWNLOAD_DIR = self.download_dir
+        sickbeard.PROCESS_AUTOMATICALLY = True
+        sickbeard.POSTPROCESS_FREQUENCY = 10
+
+        self.old_processDir = processTV.processDir
+        processTV.processDir = lambda dirName, method=None: self.processed.append(dirName)
+
+        self.old_scheduler = sickbeard.autoPostProcesserScheduler
+        sickbeard.autoPostProcesserScheduler = FakeScheduler(10)
+
+        self.watcher = downloadWatcher.DownloadDirWatcher()
+        self.watcher.run()
+
+    def tearDown(self):
+        self.watcher._stop()
+        processTV.processDir = self.old_processDir
+        sickbeard.autoPostProcesserScheduler = self.old_scheduler
+        (sickbeard.TV_DOWNLOAD_DIR, sickbeard.PROCESS_AUTOMATICALLY, sickbeard.POSTPROCESS_FREQUENCY) = self.old_settings
+        shutil.rmtree(self.download_dir)
+
+    def _write(self, *path):
+        f = open(os.path.join(self.download_dir, *path), 'w')
+        f.write('data')
+        f.close()
+
+    def _settle(self):
+        for cur_folder in self.watcher.pending:
+            self.watcher.pending[cur_folder] -= downloadWatcher.SETTLE_TIME
+
+    def test_settled_folder_is_processed(self):
+        os.mkdir(os.path.join(self.download_dir, 'Show.S01E01'))
+        self.watcher.run()
+        self._write('Show.S01E01', 'show.s01e01.mkv')
+        self.watcher.run()
+        self.assertEqual(self.processed, [])
+
+        self._settle()
+        self.watcher.run()
+        self.assertEqual(self.processed, [os.path.join(self.download_dir, 'Show.S01E01')])
+
+    def test_unpacking_folder_is_ignored(self):
+        os.mkdir(os.path.join(self.download_dir, '_UNPACK_Show.S01E01'))
+        self.watcher.run()
+        self._write('_UNPACK_Show.S01E01', 'show.s01e01.mkv')
+        self.watcher.run()
+        self.assertEqual(self.watcher.pending, {})
+
+        os.rename(os.path.join(self.download_dir, '_UNPACK_Show.S01E01'), os.path.join(self.download_dir, 'Show.S01E01'))
+        self.watcher.run()
+        self._settle()
+        self.watcher.run()
+        self.assertEqual(self.processed, [os.path.join(self.download_dir, 'Show.S01E01')])
+
+    def test_file_still_being_written(self):
+        os.mkdir(os.path.join(self.download_dir, 'Show.S01E01'))
+        f = open(os.path.join(self.download_dir, 'Show.S01E01', 'show.s01e01.mkv'), 'w')
+        try:
+            f.write('data')
+            f.flush()
+            self.watcher.run()
+
+            self._settle()
+            f.write('more data')
+            f.flush()
+            self.watcher.run()
+            self.assertEqual(self.processed, [])
+        finally:
+            f.close()
+
+    def test_scan_frequency(self):
+        watched_cycle = datetime.timedelta(minutes=downloadWatcher.WATCHED_POSTPROCESS_FREQUENCY)
+        self.assertEqual(sickbeard.autoPostProcesserScheduler.cycleTime, watched_cycle)
+
+        # eg. the config being saved
+        sickbeard.autoPostProcesserScheduler.cycleTime = datetime.timedelta(minutes=10)
+        self.watcher.run()
+        self.assertEqual(sickbeard.autoPostProcesserScheduler.cycleTime, watched_cycle)
+
+        sickbeard.TV_DOWNLOAD_DIR = ''
+        self.watcher.run()
+        self.assertEqual(sickbeard.autoPostProcesserScheduler.cycleTime, datetime.timedelta(minutes=10))
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - DOWNLOAD WATCHER TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(DownloadWatcherTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
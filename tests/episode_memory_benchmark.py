@@ -0,0 +1,104 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measures the RSS of touching every episode of a synthetic library, once with the
+bounded episode cache and once keeping every episode object like we used to.
+
+Usage: python episode_memory_benchmark.py [num_shows] [episodes_per_show]
+"""
+
+import os
+import subprocess
+import sys
+
+NUM_SHOWS = 1000
+EPISODES_PER_SHOW = 200
+SEASON_LENGTH = 20
+
+
+def rss_kb():
+    """
+    Returns the current resident set size in kB
+    """
+    try:
+        for line in open('/proc/self/status'):
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    except IOError:
+        pass
+
+    # no /proc, peak RSS is the best we can do (bytes on OS X, kB everywhere else)
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        max_rss /= 1024
+    return max_rss
+
+
+def run(num_shows, episodes_per_show, bounded):
+
+    import test_lib as test  # @UnusedImport - sets up the sickbeard globals
+
+    import sickbeard
+    from sickbeard import tv
+
+    # pretend every episode came out of the DB clean, like they do after loadFromDB
+    def _fake_specifyEP(self, season, episode):
+        self.dirty = False
+
+    tv.TVEpisode.specifyEpisode = _fake_specifyEP
+    tv.TVShow.loadFromDB = lambda self, skipNFO=False: None
+
+    sickbeard.showList = []
+    sickbeard.metadata_provider_dict = {}
+
+    if not bounded:
+        tv.recent_episodes.max_size = None
+
+    before = rss_kb()
+
+    for show_num in range(num_shows):
+        show = tv.TVShow(show_num + 1)
+        sickbeard.showList.append(show)
+
+        for ep_num in range(episodes_per_show):
+            show.getEpisode(ep_num / SEASON_LENGTH + 1, ep_num % SEASON_LENGTH + 1)
+
+    after = rss_kb()
+    live_eps = sum([len(x.episodes) for x in sickbeard.showList])
+
+    print "%-10s %8d episodes touched, %8d alive, RSS %7d kB -> %7d kB (+%d kB)" % \
+          ("bounded" if bounded else "unbounded", num_shows * episodes_per_show, live_eps, before, after, after - before)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+
+    if args and args[0] in ('--bounded', '--unbounded'):
+        run(int(args[1]), int(args[2]), args[0] == '--bounded')
+        sys.exit(0)
+
+    num_shows = NUM_SHOWS
+    episodes_per_show = EPISODES_PER_SHOW
+    if len(args) >= 2:
+        num_shows, episodes_per_show = int(args[0]), int(args[1])
+
+    # each mode gets its own process, freed memory isn't reliably handed back to the OS
+    for mode in ('--unbounded', '--bounded'):
+        subprocess.call([sys.executable, os.path.abspath(__file__), mode, str(num_shows), str(episodes_per_show)])
@@ -0,0 +1,246 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import with_statement
+
+import unittest
+import test_lib as test
+
+import errno
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from sickbeard import helpers
+
+RSS = '''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:newznab="http://www.newznab.com/DTD/2010/feeds/attributes/">
+<channel>
+<title>example</title>
+<newznab:response offset="0" total="3"/>
+<item><title>Show.Name.S01E01.HDTV.x264-GROUP</title><link>http://example.com/1</link></item>
+<item><title>Show.Name.S01E02.HDTV.x264-GROUP</title><link>http://example.com/2</link></item>
+<item><title>Show.Name.S01E03.HDTV.x264-GROUP</title><link>http://example.com/3</link></item>
+</channel>
+</rss>'''
+
+
+class IterparseXMLTests(unittest.TestCase):
+
+    def test_items(self):
+        elements = helpers.iterparse_xml(RSS, ('item', 'response'))
+
+        root = elements.next()
+        self.assertEqual(root.tag, 'rss')
+
+        response = elements.next()
+        self.assertEqual(response.tag.split('}')[-1], 'response')
+        self.assertEqual(response.get('total'), '3')
+
+        titles = []
+        for item in elements:
+            titles.append(item.find('title').text)
+
+        self.assertEqual(titles, ['Show.Name.S01E0' + str(x) + '.HDTV.x264-GROUP' for x in (1, 2, 3)])
+        # the items don't stay in the tree once they've been yielded
+        self.assertEqual(root.find('channel').findall('item'), [])
+
+    def test_invalid(self):
+        self.assertRaises(SyntaxError, list, helpers.iterparse_xml('<rss><item></rss>', ('item',)))
+
+
+class RateLimiterTests(unittest.TestCase):
+
+    def test_spaced_out(self):
+        limiter = helpers.RateLimiter(0.1)
+        times = []
+
+        def call():
+            limiter.wait()
+            times.append(time.time())
+
+        threads = [threading.Thread(target=call) for x in range(3)]
+        for cur_thread in threads:
+            cur_thread.start()
+        for cur_thread in threads:
+            cur_thread.join()
+
+        times.sort()
+        for i in range(1, len(times)):
+            self.assertTrue(times[i] - times[i - 1] >= 0.09)
+
+
+class MapInThreadsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.threads = []
+
+    def _work(self, x):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.threads.append(threading.currentThread())
+
+        time.sleep(x)
+
+        with self.lock:
+            self.running -= 1
+
+        if x == 0.03:
+            raise ValueError('first')
+        elif x == 0.1:
+            raise ValueError('second')
+        return x * 10
+
+    def test_order(self):
+        items = [0.05, 0.01, 0.04, 0.02]
+        self.assertEqual(helpers.map_in_threads(self._work, items, 4), [x * 10 for x in items])
+        self.assertEqual(self.max_running, 4)
+
+    def test_max_threads(self):
+        items = [0.02] * 10
+        self.assertEqual(len(helpers.map_in_threads(self._work, items, 3, 'TEST')), 10)
+        self.assertEqual(self.max_running, 3)
+        self.assertEqual(sorted(set([x.getName() for x in self.threads])), ['TEST-1', 'TEST-2', 'TEST-3'])
+
+    def test_exception(self):
+        items = [0.1, 0.03, 0.01, 0.02, 0.01]
+        try:
+            helpers.map_in_threads(self._work, items, 2)
+        except ValueError, e:
+            self.assertEqual(str(e), 'first')
+        else:
+            self.fail("the exception wasn't raised")
+
+        # the others still get done
+        self.assertEqual(len(self.threads), 5)
+        self.assertEqual(self.running, 0)
+
+    def test_inline(self):
+        self.assertEqual(helpers.map_in_threads(self._work, [0.01, 0.02], 1), [0.1, 0.2])
+        self.assertEqual(helpers.map_in_threads(self._work, [0.01], 4), [0.1])
+        self.assertEqual(helpers.map_in_threads(self._work, [], 4), [])
+        self.assertEqual(set(self.threads), set([threading.currentThread()]))
+
+
+class FakeFcntl:
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def ioctl(self, fd, request, arg):
+        self.calls.append(request)
+        if self.error:
+            raise self.error
+
+
+class FileOperationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.src = os.path.join(self.folder, 'src.mkv')
+        self.dest = os.path.join(self.folder, 'dest.mkv')
+
+        # bigger than one copy buffer so it takes more than one read
+        self.data = os.urandom(1024) * (helpers.COPY_BUFFER_SIZE / 1024 + 3)
+        f = open(self.src, 'wb')
+        f.write(self.data)
+        f.close()
+        os.utime(self.src, (1300000000, 1300000000))
+
+        self.old_fcntl = helpers.fcntl
+        self.old_link = os.link
+
+    def tearDown(self):
+        helpers.fcntl = self.old_fcntl
+        os.link = self.old_link
+        shutil.rmtree(self.folder)
+
+    def _check_copy(self):
+        f = open(self.dest, 'rb')
+        try:
+            self.assertEqual(f.read(), self.data)
+        finally:
+            f.close()
+        self.assertEqual(int(os.path.getmtime(self.dest)), 1300000000)
+
+    def test_copy(self):
+        helpers.copyFile(self.src, self.dest)
+        self._check_copy()
+        self.assertNotEqual(os.stat(self.src).st_ino, os.stat(self.dest).st_ino)
+
+    def test_copy_same_file(self):
+        self.assertRaises(shutil.Error, helpers.copyFile, self.src, self.src)
+
+    def test_clone_not_supported(self):
+        helpers.fcntl = FakeFcntl(IOError(errno.EOPNOTSUPP, 'Operation not supported'))
+
+        src_file = open(self.src, 'rb')
+        dest_file = open(self.dest, 'wb')
+        try:
+            self.assertFalse(helpers._cloneFile(src_file, dest_file))
+        finally:
+            src_file.close()
+            dest_file.close()
+
+        helpers.copyFile(self.src, self.dest)
+        self._check_copy()
+        self.assertEqual(helpers.fcntl.calls, [helpers.FICLONE, helpers.FICLONE])
+
+    def test_clone_no_fcntl(self):
+        helpers.fcntl = None
+
+        helpers.copyFile(self.src, self.dest)
+        self._check_copy()
+
+    def test_hardlink(self):
+        helpers.hardlinkFile(self.src, self.dest)
+
+        self.assertEqual(os.stat(self.src).st_ino, os.stat(self.dest).st_ino)
+
+    def test_hardlink_falls_back_to_copy(self):
+
+        def cross_device_link(src, dest):
+            raise OSError(errno.EXDEV, 'Invalid cross-device link')
+        os.link = cross_device_link
+
+        helpers.hardlinkFile(self.src, self.dest)
+
+        self._check_copy()
+        self.assertNotEqual(os.stat(self.src).st_ino, os.stat(self.dest).st_ino)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - HELPERS TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(IterparseXMLTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    suite = unittest.TestLoader().loadTestsFromTestCase(RateLimiterTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    suite = unittest.TestLoader().loadTestsFromTestCase(MapInThreadsTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    suite = unittest.TestLoader().loadTestsFromTestCase(FileOperationTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
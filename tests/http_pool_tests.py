@@ -0,0 +1,126 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import test_lib as test
+
+import BaseHTTPServer
+import SocketServer
+import threading
+import urllib2
+
+from sickbeard import helpers, http_pool
+
+
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+
+        body = 'response for ' + self.path
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        self.server.posts.append(self.rfile.read(int(self.headers['Content-Length'])))
+
+        # hang up without answering, like a server that dies halfway through a request
+        if self.path == '/drop':
+            self.close_connection = 1
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write('ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadedHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+
+class HTTPPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        http_pool.close_all()
+
+        self.server = ThreadedHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        self.server.connections = set()
+        self.server.posts = []
+        self.url = 'http://127.0.0.1:%d/' % self.server.server_port
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        http_pool.close_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused(self):
+        host = '127.0.0.1:%d' % self.server.server_port
+
+        self.assertEqual(helpers.getURL(self.url + 'one'), 'response for /one')
+        self.assertEqual(helpers.getURL(self.url + 'two'), 'response for /two')
+
+        self.assertEqual(len(self.server.connections), 1)
+
+        stats = http_pool.get_host_stats()[host]
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['failed'], 0)
+
+    def test_reconnects_after_server_closes(self):
+        self.assertEqual(helpers.getURL(self.url + 'one'), 'response for /one')
+
+        # break the pooled connection like a server dropping it would
+        for idle in http_pool._idle_connections.values():
+            for conn, idle_since in idle:
+                conn.sock.shutdown(2)
+
+        self.assertEqual(helpers.getURL(self.url + 'two'), 'response for /two')
+
+    def test_post_not_resent(self):
+        self.assertEqual(helpers.getURL(self.url + 'one'), 'response for /one')
+
+        # a POST goes over a new connection so it's not retried when that fails
+        self.assertEqual(helpers.getURL(urllib2.Request(self.url + 'drop', 'nzb data')), None)
+        self.assertEqual(self.server.posts, ['nzb data'])
+        self.assertEqual(len(self.server.connections), 2)
+
+        self.assertEqual(helpers.getURL(urllib2.Request(self.url + 'upload', 'nzb data')), 'ok')
+        self.assertEqual(self.server.posts, ['nzb data', 'nzb data'])
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - HTTP POOL TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(HTTPPoolTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
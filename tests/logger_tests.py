@@ -0,0 +1,237 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import with_statement
+
+import unittest
+import test_lib as test
+
+import logging
+import os
+import Queue
+import shutil
+import tempfile
+
+from sickbeard import logger
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class Unprintable(object):
+
+    def __str__(self):
+        raise AssertionError("formatted a message that shouldn't be logged")
+
+
+class LoggerTests(unittest.TestCase):
+
+    def setUp(self):
+        logger.flush()
+        self.handler = ListHandler()
+        logging.getLogger('sickbeard').addHandler(self.handler)
+        self.log_instances = []
+
+    def tearDown(self):
+        for log_instance, log_dir in self.log_instances:
+            log_instance.stop_writer()
+            log_instance.close_log()
+            shutil.rmtree(log_dir)
+
+        logging.getLogger('sickbeard').removeHandler(self.handler)
+        logger.set_level(logger.DEBUG)
+
+    def test_format_args(self):
+        logger.log(u"Found %s at %s", logger.DEBUG, "name", 5)
+        logger.flush()
+        self.assertTrue(self.handler.messages[-1].endswith(u":: Found name at 5"))
+
+    def test_plain_message(self):
+        logger.log(u"100% done")
+        logger.flush()
+        self.assertTrue(self.handler.messages[-1].endswith(u":: 100% done"))
+
+    def test_below_level_is_not_formatted(self):
+        logger.set_level(logger.MESSAGE)
+        logger.log(u"Found %s", logger.DEBUG, Unprintable())
+        logger.flush()
+        self.assertEqual(self.handler.messages, [])
+        self.assertFalse(logger.is_enabled_for(logger.DEBUG))
+        self.assertTrue(logger.is_enabled_for(logger.WARNING))
+
+    def test_level_switch(self):
+        logger.set_level(logger.MESSAGE)
+        logger.log(u"hidden", logger.DEBUG)
+        logger.set_level(logger.DEBUG)
+        logger.log(u"shown", logger.DEBUG)
+        logger.flush()
+        self.assertEqual(len(self.handler.messages), 1)
+        self.assertTrue(self.handler.messages[0].endswith(u":: shown"))
+
+    def test_full_queue_drops_messages(self):
+        log_instance = logger.SBRotatingLogHandler('sickbeard.log', logger.NUM_LOGS, logger.LOG_SIZE)
+        log_instance.log_queue = Queue.Queue(5)
+
+        # keep the writer busy so the queue fills up
+        with log_instance.writer_lock:
+            for i in range(20):
+                log_instance.log(u"message %d", logger.MESSAGE, i)
+            dropped = log_instance.dropped
+            self.assertTrue(dropped > 0)
+
+        log_instance.stop_writer()
+        self.assertTrue([x for x in self.handler.messages if x.endswith(u"Log queue was full, dropped " + str(dropped) + u" messages")])
+        self.assertEqual(log_instance.dropped, 0)
+
+    def test_rotation(self):
+        log_instance = self._log_instance()
+        old_size = logger.LOG_SIZE
+        logger.LOG_SIZE = 1
+
+        try:
+            log_instance.log(u"rotate me")
+            log_instance.flush()
+        finally:
+            logger.LOG_SIZE = old_size
+
+        self.assertTrue(os.path.isfile(log_instance.log_file_path + '.1'))
+        self.assertEqual(log_instance.cur_handler.bytes_written, 0)
+
+    def test_dead_writer_restarted(self):
+        log_instance = self._log_instance()
+        log_instance.log(u"before")
+        log_instance.flush()
+
+        # stop the thread but leave it in place, like one that died
+        log_instance.log_queue.put(None)
+        log_instance.writer_thread.join()
+
+        log_instance.log(u"after")
+        log_instance.flush()
+        self.assertTrue(u":: after" in self._read(log_instance))
+
+    def test_writer_after_fork(self):
+        log_instance = self._log_instance()
+        log_instance.log(u"parent")
+        log_instance.flush()
+
+        pid = os.fork()
+        if not pid:
+            try:
+                log_instance.log(u"child")
+                log_instance.stop_writer()
+            finally:
+                os._exit(0)
+
+        os.waitpid(pid, 0)
+        self.assertTrue(u":: child" in self._read(log_instance))
+
+    def _log_instance(self):
+        """
+        Makes a log handler that writes to its own folder so the real test log isn't touched
+        """
+        log_dir = tempfile.mkdtemp()
+        log_instance = logger.SBRotatingLogHandler('sickbeard.log', logger.NUM_LOGS, logger.LOG_SIZE)
+        log_instance.log_file_path = os.path.join(log_dir, log_instance.log_file)
+        log_instance.cur_handler = log_instance._config_handler()
+        logging.getLogger('sickbeard').addHandler(log_instance.cur_handler)
+
+        self.log_instances.append((log_instance, log_dir))
+        return log_instance
+
+    def _read(self, log_instance):
+        f = open(log_instance.log_file_path)
+        try:
+            return f.read().decode('utf-8')
+        finally:
+            f.close()
+
+
+class ReverseReadTests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def _write(self, data):
+        f = open(self.file_path, 'wb')
+        f.write(data)
+        f.close()
+
+    def test_reverse_readlines(self):
+        data = ''.join(['line %d %s\n' % (i, 'x' * (i % 7)) for i in range(100)])
+        self._write(data)
+
+        for block_size in (1, 5, 16, 1024):
+            result = list(logger.reverse_readlines(self.file_path, block_size=block_size))
+            self.assertEqual([x[1] for x in result], list(reversed(data.splitlines(True))))
+            for offset, line in result:
+                self.assertEqual(data[offset:offset + len(line)], line)
+
+    def test_reverse_readlines_offset(self):
+        self._write('one\ntwo\nthree')
+
+        result = list(logger.reverse_readlines(self.file_path, block_size=2))
+        self.assertEqual(result, [(8, 'three\n'), (4, 'two\n'), (0, 'one\n')])
+
+        result = list(logger.reverse_readlines(self.file_path, end_offset=4, block_size=2))
+        self.assertEqual(result, [(0, 'one\n')])
+
+    def test_read_log_lines_paging(self):
+        lines = []
+        for i in range(30):
+            level = ('DEBUG', 'INFO')[i % 2]
+            lines.append('2013-01-01 10:00:%02d %-8s MAIN :: message %d\n' % (i, level, i))
+        lines.insert(6, 'Traceback line\n')
+        self._write(''.join(lines))
+
+        old_path = logger.sb_log_instance.log_file_path
+        logger.sb_log_instance.log_file_path = self.file_path
+        try:
+            page, offset = logger.read_log_lines(logger.MESSAGE, 5)
+            self.assertEqual([x.split(':: ')[1].strip() for x in page], ['message 29', 'message 27', 'message 25', 'message 23', 'message 21'])
+            self.assertNotEqual(offset, None)
+
+            page, offset = logger.read_log_lines(logger.MESSAGE, 100, offset)
+            self.assertEqual(len(page), 10)
+            self.assertEqual(page[-1].split(':: ')[1].strip(), 'message 1')
+            self.assertEqual(offset, None)
+        finally:
+            logger.sb_log_instance.log_file_path = old_path
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - LOGGER TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(LoggerTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ReverseReadTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,83 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Times a simulated RSS cache cycle (parse, name lookup, cache insert and wanted check for
+every item) with debug logging on and off.
+
+Usage: python logging_benchmark.py [num_items]
+"""
+
+import sys
+import time
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import logger
+
+try:
+    import xml.etree.cElementTree as etree
+except ImportError:
+    import elementtree.ElementTree as etree
+
+NUM_ITEMS = 1000
+
+
+def make_items(num_items):
+    items = []
+    for i in range(num_items):
+        item = etree.Element('item')
+        etree.SubElement(item, 'title').text = 'Show.Name.%d.S%02dE%02d.720p.HDTV.x264-GRP' % (i % 50, i % 10 + 1, i % 24 + 1)
+        etree.SubElement(item, 'link').text = 'http://example.com/getnzb/%d.nzb&amp;i=1' % i
+        items.append(item)
+    return items
+
+
+def run_cycle(cache, items):
+    start = time.time()
+
+    cache._clearCache()
+    for item in items:
+        cache._parseItem(item)
+    cache.findNeededEpisodes()
+
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    num_items = NUM_ITEMS
+    if len(sys.argv) > 1:
+        num_items = int(sys.argv[1])
+
+    test.setUp_test_db()
+
+    provider = sickbeard.providerList[0]
+    cache = provider.cache
+    items = make_items(num_items)
+
+    # warm up the name parser and sqlite
+    run_cycle(cache, items[:50])
+
+    for level, label in ((logger.DEBUG, 'debug on'), (logger.MESSAGE, 'debug off')):
+        logger.set_level(level)
+        duration = run_cycle(cache, items)
+        print "%-10s %6d items in %6.2f s (%.2f ms/item)" % (label, num_items, duration, duration * 1000 / num_items)
+
+    logger.set_level(logger.DEBUG)
+    test.tearDown_test_db()
@@ -0,0 +1,119 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import with_statement
+
+import unittest
+import test_lib as test
+
+import BaseHTTPServer
+import SocketServer
+import cgi
+import threading
+import urlparse
+
+from sickbeard import http_pool
+from sickbeard.providers import newznab
+
+ITEM = '<item><title>Show.Name.S01E01.HDTV.x264-GROUP%d</title><link>http://example.com/%d.nzb</link></item>'
+
+
+class SearchHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        query = cgi.parse_qs(urlparse.urlparse(self.path).query)
+        offset = int(query['offset'][0])
+
+        with self.server.lock:
+            self.server.offsets.append(offset)
+
+        items = ''.join([ITEM % (x, x) for x in range(offset, min(offset + 100, self.server.total))])
+        data = '<?xml version="1.0"?><rss xmlns:newznab="http://www.newznab.com/DTD/2010/feeds/attributes/"><channel>' \
+               '<newznab:response offset="%d" total="%d"/>%s</channel></rss>' % (offset, self.server.total, items)
+
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SearchServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+
+class SearchPagesTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(SearchPagesTests, self).setUp()
+
+        self.server = SearchServer(('127.0.0.1', 0), SearchHandler)
+        self.server.lock = threading.Lock()
+        self.server.offsets = []
+        self.server.total = 250
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.provider = newznab.NewznabProvider('Fake', 'http://127.0.0.1:%d/' % self.server.server_port, '0')
+
+    def tearDown(self):
+        http_pool.close_all()
+        self.server.shutdown()
+        self.server.server_close()
+        super(SearchPagesTests, self).tearDown()
+
+    def _titles(self, results):
+        return [item.find('title').text for item in results]
+
+    def test_all_pages(self):
+        results = self.provider._doSearch({'q': 'Show Name'})
+
+        self.assertEqual(sorted(self.server.offsets), [0, 100, 200])
+        self.assertEqual(self._titles(results), ['Show.Name.S01E01.HDTV.x264-GROUP%d' % x for x in range(250)])
+
+    def test_page_limit(self):
+        self.server.total = 1000
+
+        results = self.provider._doSearch({'q': 'Show Name'})
+
+        self.assertEqual(sorted(self.server.offsets), [0, 100, 200, 300])
+        self.assertEqual(len(results), 400)
+
+    def test_one_page(self):
+        self.server.total = 50
+
+        results = self.provider._doSearch({'q': 'Show Name'})
+
+        self.assertEqual(self.server.offsets, [0])
+        self.assertEqual(len(results), 50)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - NEWZNAB TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(SearchPagesTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,167 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import test_lib as test
+
+import threading
+import time
+
+from sickbeard import notifiers
+
+
+class FakeNotifier:
+
+    coalesce_library_updates = True
+
+    def __init__(self):
+        self.calls = []
+        self.release = None
+
+    def notify_download(self, ep_name):
+        if self.release:
+            self.release.wait()
+        self.calls.append(ep_name)
+
+    def update_library(self, ep_obj=None):
+        self.calls.append(ep_obj)
+
+
+class FakeShow:
+    pass
+
+
+class FakeEpisode:
+
+    def __init__(self, show, episode):
+        self.show = show
+        self.episode = episode
+
+    def prettyName(self):
+        return 'Show Name - 1x%02d' % self.episode
+
+
+class NotifierQueueTests(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = notifiers.NotifierQueue()
+        self.notifier = FakeNotifier()
+
+    def tearDown(self):
+        notifiers.NOTIFIER_TIMEOUT = 60
+        if self.notifier.release:
+            self.notifier.release.set()
+
+    def _join(self):
+        for cur_thread, cur_job, cur_start in self.queue.running:  # @UnusedVariable
+            cur_thread.join()
+
+    def test_library_updates_combined(self):
+        show = FakeShow()
+        other_show = FakeShow()
+
+        episodes = [FakeEpisode(show, 1), FakeEpisode(other_show, 1), FakeEpisode(show, 2)]
+        for cur_ep in episodes:
+            self.queue.add_library_update(self.notifier, cur_ep)
+
+        self.assertEqual(len(self.queue.queue), 2)
+
+        # they're held back for a while in case more episodes come along
+        self.queue.run()
+        self.assertEqual(len(self.queue.queue), 2)
+
+        for cur_job in self.queue.queue:
+            cur_job.due = 0
+
+        # one notifier only gets one job at a time
+        self.queue.run()
+        self._join()
+        self.assertEqual(self.notifier.calls, [episodes[2]])
+
+        self.queue.run()
+        self._join()
+        self.assertEqual(self.notifier.calls, [episodes[2], episodes[1]])
+        self.assertEqual(self.queue.queue, [])
+
+    def test_busy_notifier(self):
+        self.notifier.release = threading.Event()
+        other_notifier = FakeNotifier()
+
+        self.queue.add_job(notifiers.NotifierJob(self.notifier, 'notify_download', ('Show Name - 1x01',)))
+        self.queue.add_job(notifiers.NotifierJob(self.notifier, 'notify_download', ('Show Name - 1x02',)))
+        self.queue.add_job(notifiers.NotifierJob(other_notifier, 'notify_download', ('Show Name - 1x01',)))
+
+        self.queue.run()
+        self.assertEqual(len(self.queue.running), 2)
+        self.assertEqual([x.args for x in self.queue.queue], [('Show Name - 1x02',)])
+
+        self.notifier.release.set()
+        self.queue.flush()
+
+        self.assertEqual(self.notifier.calls, ['Show Name - 1x01', 'Show Name - 1x02'])
+        self.assertEqual(other_notifier.calls, ['Show Name - 1x01'])
+
+    def test_stuck_notifier(self):
+        notifiers.NOTIFIER_TIMEOUT = 0.05
+        self.notifier.release = threading.Event()
+        other_notifier = FakeNotifier()
+
+        self.queue.add_job(notifiers.NotifierJob(self.notifier, 'notify_download', ('Show Name - 1x01',)))
+        self.queue.run()
+        stuck_thread = self.queue.running[0][0]
+
+        time.sleep(0.1)
+        self.queue.add_job(notifiers.NotifierJob(self.notifier, 'notify_download', ('Show Name - 1x02',)))
+        self.queue.add_job(notifiers.NotifierJob(other_notifier, 'notify_download', ('Show Name - 1x01',)))
+
+        # the other notifier gets its turn but the stuck one doesn't get a second call
+        for i in range(3):
+            self.queue.run()
+            self._join()
+            self.assertEqual([x[0] for x in self.queue.abandoned], [stuck_thread])
+            self.assertEqual([x.args for x in self.queue.queue], [('Show Name - 1x02',)])
+        self.assertEqual(other_notifier.calls, ['Show Name - 1x01'])
+
+        self.notifier.release.set()
+        stuck_thread.join()
+        self.queue.run()
+        self._join()
+
+        self.assertEqual(self.queue.abandoned, [])
+        self.assertEqual(self.notifier.calls, ['Show Name - 1x01', 'Show Name - 1x02'])
+
+    def test_not_running(self):
+        old_notifiers = notifiers.notifiers
+        notifiers.notifiers = [self.notifier]
+        try:
+            notifiers.notify_download('Show Name - 1x01')
+        finally:
+            notifiers.notifiers = old_notifiers
+
+        # without the scheduler there's nothing to wait for
+        self.assertEqual(self.notifier.calls, ['Show Name - 1x01'])
+        self.assertEqual(notifiers.notifier_queue.queue, [])
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - NOTIFIERS TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(NotifierQueueTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
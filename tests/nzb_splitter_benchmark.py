@@ -0,0 +1,145 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Splits a generated season NZB, once by loading the whole thing into a tree like we used to
+and once with the streaming splitter, and compares the time and peak RSS of both.
+
+Usage: python nzb_splitter_benchmark.py [episodes] [files_per_episode] [segments_per_file]
+"""
+
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+EPISODES = 24
+FILES_PER_EPISODE = 50
+SEGMENTS_PER_FILE = 100
+
+XMLNS = 'http://www.newzbin.com/DTD/2003/nzb'
+NAME = 'Show.Name.S01.720p.HDTV.x264-GROUP'
+
+
+def peak_rss_kb():
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        max_rss /= 1024
+    return max_rss
+
+
+def write_nzb(path, episodes, files_per_episode, segments_per_file):
+
+    nzb = open(path, 'w')
+    nzb.write('<?xml version="1.0" encoding="utf-8"?>\n<nzb xmlns="' + XMLNS + '">\n')
+
+    for ep_num in range(1, episodes + 1):
+        ep_name = 'Show.Name.S01E%02d.720p.HDTV.x264-GROUP' % ep_num
+        for file_num in range(1, files_per_episode + 1):
+            nzb.write('<file poster="poster@example.com" date="1300000000" subject="[%d/%d] - &quot;%s.part%02d.rar&quot; yEnc (1/%d)">\n'
+                      % (file_num, files_per_episode, ep_name, file_num, segments_per_file))
+            nzb.write('<groups><group>alt.binaries.teevee</group></groups>\n<segments>\n')
+            for segment_num in range(1, segments_per_file + 1):
+                nzb.write('<segment bytes="768000" number="%d">part%dof%d.%s@example.com</segment>\n'
+                          % (segment_num, segment_num, segments_per_file, ep_name))
+            nzb.write('</segments>\n</file>\n')
+
+    nzb.write('</nzb>\n')
+    nzb.close()
+
+
+def split_tree(path):
+    """
+    What getSeasonNZBs and createNZBString used to do
+    """
+
+    import xml.etree.cElementTree as etree
+    import xml.etree.ElementTree
+
+    from sickbeard import nzbSplitter
+
+    nzbElement = etree.XML(open(path).read())
+
+    regex = '(Show\\.Name\\.S01(?:[E0-9]+)\\.[\\w\\._]+\\-\\w+)'
+
+    epFiles = {}
+    for curFile in nzbElement.getchildren():
+        match = re.search(regex, curFile.get("subject"), re.I)
+        if match:
+            epFiles.setdefault(match.group(1), []).append(curFile)
+
+    epNZBs = {}
+    for curEp in epFiles:
+        rootElement = etree.Element("nzb")
+        rootElement.set("xmlns", XMLNS)
+        for curFile in epFiles[curEp]:
+            rootElement.append(nzbSplitter.stripNS(curFile, XMLNS))
+        epNZBs[curEp] = xml.etree.ElementTree.tostring(rootElement, 'utf-8')
+
+    return epNZBs
+
+
+def split_stream(path):
+
+    from sickbeard import nzbSplitter
+
+    return nzbSplitter.getSeasonNZBs(NAME, open(path), 1)[0]
+
+
+def run(path, mode):
+
+    import test_lib as test  # @UnusedImport - sets up the sickbeard globals
+
+    before = peak_rss_kb()
+    start = time.time()
+
+    if mode == '--tree':
+        epNZBs = split_tree(path)
+    else:
+        epNZBs = split_stream(path)
+
+    print "%-8s %3d episodes, %8d bytes of NZBs in %.2fs, peak RSS %7d kB -> %7d kB" % \
+          (mode[2:], len(epNZBs), sum([len(x) for x in epNZBs.values()]), time.time() - start, before, peak_rss_kb())
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+
+    if args and args[0] in ('--tree', '--stream'):
+        run(args[1], args[0])
+        sys.exit(0)
+
+    sizes = [EPISODES, FILES_PER_EPISODE, SEGMENTS_PER_FILE]
+    for i in range(min(len(args), 3)):
+        sizes[i] = int(args[i])
+
+    (fd, path) = tempfile.mkstemp(suffix='.nzb')
+    os.close(fd)
+
+    try:
+        write_nzb(path, *sizes)
+        print "Generated a %d byte NZB" % os.path.getsize(path)
+
+        # each mode gets its own process so the peak RSS of one doesn't hide the other
+        for mode in ('--tree', '--stream'):
+            subprocess.call([sys.executable, os.path.abspath(__file__), mode, path])
+    finally:
+        os.remove(path)
@@ -0,0 +1,96 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import test_lib as test
+
+import cStringIO
+import gzip
+import mimetools
+import xml.etree.cElementTree as etree
+
+from sickbeard import helpers, nzbSplitter
+
+XMLNS = 'http://www.newzbin.com/DTD/2003/nzb'
+
+FILE = '''<file poster="poster@example.com" date="1300000000" subject="[1/2] - &quot;%s.part01.rar&quot; yEnc (1/3)">
+<groups><group>alt.binaries.teevee</group></groups>
+<segments><segment bytes="1000" number="1">%s-1@example.com</segment></segments>
+</file>
+'''
+
+
+def make_nzb(names):
+    return '<?xml version="1.0" encoding="utf-8"?>\n<nzb xmlns="' + XMLNS + '">\n<head><meta type="title">Season</meta></head>\n' + \
+           ''.join([FILE % (x, x) for x in names]) + '</nzb>'
+
+
+class FakeURLFileLike:
+
+    def __init__(self, data, encoding):
+        self.data = cStringIO.StringIO(data)
+        self.headers = mimetools.Message(cStringIO.StringIO('Content-Encoding: ' + encoding + '\r\n\r\n'))
+
+    def info(self):
+        return self.headers
+
+    def read(self, size=-1):
+        return self.data.read(size)
+
+    def close(self):
+        pass
+
+
+class SplitterTests(unittest.TestCase):
+
+    NAMES = ['Show.Name.S02E01.720p.HDTV.x264-GROUP', 'Show.Name.S02E02.720p.HDTV.x264-GROUP', 'Show.Name.S02E01.720p.HDTV.x264-GROUP', 'Something.Else']
+
+    def _check(self, split):
+        epNZBs, xmlns = split
+
+        self.assertEqual(xmlns, XMLNS)
+        self.assertEqual(sorted(epNZBs.keys()), ['Show.Name.S02E01.720p.HDTV.x264-GROUP', 'Show.Name.S02E02.720p.HDTV.x264-GROUP'])
+
+        nzb = etree.XML(epNZBs['Show.Name.S02E01.720p.HDTV.x264-GROUP'])
+        files = nzb.findall('{' + XMLNS + '}file')
+        self.assertEqual(len(files), 2)
+        self.assertEqual(files[0].find('{' + XMLNS + '}segments')[0].text, 'Show.Name.S02E01.720p.HDTV.x264-GROUP-1@example.com')
+
+    def test_split(self):
+        self._check(nzbSplitter.getSeasonNZBs('Show.Name.S02.720p.HDTV.x264-GROUP', make_nzb(self.NAMES), 2))
+
+    def test_gzip(self):
+        data = cStringIO.StringIO()
+        gzip_file = gzip.GzipFile(fileobj=data, mode='wb')
+        gzip_file.write(make_nzb(self.NAMES))
+        gzip_file.close()
+
+        nzbFile = helpers.DecodedURLFileLike(FakeURLFileLike(data.getvalue(), 'gzip'))
+        self._check(nzbSplitter.getSeasonNZBs('Show.Name.S02.720p.HDTV.x264-GROUP', nzbFile, 2))
+
+    def test_invalid(self):
+        self.assertEqual(nzbSplitter.getSeasonNZBs('Show.Name.S02.720p.HDTV.x264-GROUP', make_nzb(self.NAMES)[:-10], 2), ({}, ''))
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - NZB SPLITTER TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(SplitterTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
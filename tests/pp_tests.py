@@ -17,15 +17,22 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import random
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 
 import test_lib as test
 
 import sys, os.path
 
-from sickbeard.postProcessor import PostProcessor
+from sickbeard.postProcessor import PostProcessor, get_show_lock
 import sickbeard
+from sickbeard import helpers, history, show_location_cache, processTV
 from sickbeard.tv import TVEpisode, TVShow
 
 
@@ -41,6 +48,181 @@ class PPInitTests(unittest.TestCase):
         self.assertEqual(self.pp.folder_name, test.SHOWNAME)
 
 
+class PPShowLockTests(unittest.TestCase):
+
+    def test_show_lock(self):
+        self.assertTrue(get_show_lock(3) is get_show_lock(3))
+        self.assertFalse(get_show_lock(3) is get_show_lock(4))
+
+
+class FakePostProcessor(object):
+    """
+    Stands in for PostProcessor, the show is the first part of the file name and bigger files take longer
+    """
+
+    lock = threading.Lock()
+    running = []
+    started = []
+    finished = []
+    max_running = 0
+    show_overlap = False
+
+    def __init__(self, file_path, nzb_name=None, pp_options={}):
+        self.file_path = file_path
+        self.log = u"processed " + os.path.basename(file_path) + u"\n"
+
+    def process(self):
+        cls = FakePostProcessor
+        show = 'pp test ' + os.path.basename(self.file_path).split('.')[0]
+
+        # same as the real process()
+        with get_show_lock(show):
+            with cls.lock:
+                if show in cls.running:
+                    cls.show_overlap = True
+                cls.running.append(show)
+                cls.started.append(os.path.basename(self.file_path))
+                cls.max_running = max(cls.max_running, len(cls.running))
+
+            time.sleep(os.path.getsize(self.file_path) / 1000.0)
+
+            with cls.lock:
+                cls.running.remove(show)
+                cls.finished.append(os.path.basename(self.file_path))
+
+        return True
+
+
+class PPProcessFilesTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(PPProcessFilesTests, self).setUp()
+        self.folder = tempfile.mkdtemp()
+
+        FakePostProcessor.running = []
+        FakePostProcessor.started = []
+        FakePostProcessor.finished = []
+        FakePostProcessor.max_running = 0
+        FakePostProcessor.show_overlap = False
+
+        self.old_processor = processTV.postProcessor.PostProcessor
+        processTV.postProcessor.PostProcessor = FakePostProcessor
+        self.old_keep = sickbeard.KEEP_PROCESSED_DIR
+        sickbeard.KEEP_PROCESSED_DIR = True
+
+    def tearDown(self):
+        processTV.postProcessor.PostProcessor = self.old_processor
+        sickbeard.KEEP_PROCESSED_DIR = self.old_keep
+        shutil.rmtree(self.folder)
+        super(PPProcessFilesTests, self).tearDown()
+
+    def _make_file(self, name, size):
+        file_path = os.path.join(self.folder, name)
+        f = open(file_path, 'wb')
+        f.write('x' * size)
+        f.close()
+        return file_path
+
+    def test_concurrent(self):
+        file_paths = [self._make_file(x + '.s01e01.mkv', 100) for x in ('showa', 'showb', 'showc')]
+
+        results = processTV._process_files(file_paths)
+
+        self.assertEqual([x[0] for x in results], [True] * 3)
+        self.assertEqual(FakePostProcessor.max_running, 3)
+
+    def test_same_show_takes_turns(self):
+        file_paths = [self._make_file('showa.s01e0' + str(x) + '.mkv', 50) for x in range(1, 4)]
+        file_paths.append(self._make_file('showb.s01e01.mkv', 50))
+
+        processTV._process_files(file_paths)
+
+        self.assertFalse(FakePostProcessor.show_overlap)
+        self.assertEqual(FakePostProcessor.max_running, 2)
+        self.assertEqual(len(FakePostProcessor.finished), 4)
+
+    def test_same_show_biggest_first(self):
+        for x in range(5):
+            FakePostProcessor.started = []
+            file_paths = [self._make_file('showa.s01e01.mkv', 20), self._make_file('showa.s01e01.avi', 10)]
+
+            processTV._process_files(file_paths)
+
+            self.assertEqual(FakePostProcessor.started, ['showa.s01e01.mkv', 'showa.s01e01.avi'])
+
+    def test_output_in_file_order(self):
+        for name, size in (('showa.s01e01.mkv', 100), ('showb.s01e01.mkv', 300), ('showc.s01e01.mkv', 200)):
+            self._make_file(name, size)
+
+        result = processTV.processDir(self.folder)
+
+        # the smallest one finished first but the biggest one is processed (and reported) first
+        self.assertEqual(FakePostProcessor.finished[0], 'showa.s01e01.mkv')
+        lines = [x for x in result.splitlines() if x.startswith(u"processed ")]
+        self.assertEqual(lines, [u"processed showb.s01e01.mkv", u"processed showc.s01e01.mkv", u"processed showa.s01e01.mkv"])
+
+
+class PPAssociatedFilesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for name in ('show.s01e01.mkv', 'show.s01e01.srt', 'show.s01e01.nfo', 'show.s01e01-extra.txt', 'show.s01e02.mkv', '.show.s01e01.srt'):
+            open(os.path.join(self.folder, name), 'w').close()
+        os.mkdir(os.path.join(self.folder, 'show.s01e01.subs'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_folder_listing_matches_glob(self):
+        file_path = os.path.join(self.folder, 'show.s01e01.mkv')
+        folder_listing = helpers.FolderListing()
+
+        for kwargs in ({}, {'base_name_only': True}, {'filter_ext': 'srt, nfo'}):
+            self.assertEqual(sorted(helpers.list_associated_files(file_path, folder_listing=folder_listing, **kwargs)),
+                             sorted(helpers.list_associated_files(file_path, **kwargs)))
+
+        os.remove(os.path.join(self.folder, 'show.s01e01.srt'))
+        folder_listing.removed(os.path.join(self.folder, 'show.s01e01.srt'))
+        self.assertEqual(helpers.list_associated_files(file_path, folder_listing=folder_listing),
+                         [os.path.join(self.folder, 'show.s01e01.nfo')])
+
+
+class PPFileOperationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.dest_folder = os.path.join(self.folder, 'Show Name')
+        os.mkdir(self.dest_folder)
+        for name in ('show.s01e01.mkv', 'show.s01e01.srt'):
+            f = open(os.path.join(self.folder, name), 'w')
+            f.write(name)
+            f.close()
+        self.file_path = os.path.join(self.folder, 'show.s01e01.mkv')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _check(self):
+        for name in ('Show Name - 1x01.mkv', 'Show Name - 1x01.srt'):
+            self.assertTrue(os.path.isfile(os.path.join(self.dest_folder, name)))
+
+        # the originals are left for the downloader
+        self.assertTrue(os.path.isfile(self.file_path))
+        self.assertTrue(os.path.isfile(os.path.join(self.folder, 'show.s01e01.srt')))
+
+    def test_hardlink(self):
+        PostProcessor(self.file_path)._hardlink(self.file_path, self.dest_folder, 'Show Name - 1x01', True)
+
+        self._check()
+        self.assertEqual(os.stat(self.file_path).st_ino, os.stat(os.path.join(self.dest_folder, 'Show Name - 1x01.mkv')).st_ino)
+
+    def test_copy(self):
+        PostProcessor(self.file_path)._copy(self.file_path, self.dest_folder, 'Show Name - 1x01', True)
+
+        self._check()
+        self.assertNotEqual(os.stat(self.file_path).st_ino, os.stat(os.path.join(self.dest_folder, 'Show Name - 1x01.mkv')).st_ino)
+
+
 class PPBasicTests(test.SickbeardTestDBCase):
 
     def test_process(self):
@@ -57,6 +239,35 @@ class PPBasicTests(test.SickbeardTestDBCase):
         pp = PostProcessor(test.FILEPATH)
         self.assertTrue(pp.process())
 
+    def test_show_dir_check(self):
+        show_location_cache.clearCache()
+        self.assertEqual(show_location_cache.findShowDir(test.SHOWDIR), None)
+
+        show = TVShow(3)
+        show.name = test.SHOWNAME
+        show.location = test.SHOWDIR
+        show.saveToDB()
+
+        show_dir = os.path.realpath(test.SHOWDIR)
+        self.assertEqual(show_location_cache.findShowDir(show_dir), show_dir)
+        self.assertEqual(show_location_cache.findShowDir(os.path.join(show_dir, 'Season 1')), show_dir)
+        self.assertEqual(show_location_cache.findShowDir(show_dir + 'x'), None)
+        self.assertEqual(show_location_cache.findShowDir(os.path.dirname(show_dir)), None)
+
+        test.db.DBConnection().action("DELETE FROM tv_shows")
+        show_location_cache.clearCache()
+        self.assertEqual(show_location_cache.findShowDir(show_dir), None)
+
+    def test_processed_file_ledger(self):
+        self.assertFalse(history.wasProcessed(test.FILEPATH))
+
+        history.logProcessedFile(test.FILEPATH, os.stat(test.FILEPATH), 3)
+        self.assertTrue(history.wasProcessed(test.FILEPATH))
+
+        # a changed file gets processed again
+        os.utime(test.FILEPATH, (0, 0))
+        self.assertFalse(history.wasProcessed(test.FILEPATH))
+
 
 if __name__ == '__main__':
     print "=================="
@@ -69,5 +280,11 @@ if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromTestCase(PPPrivateTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
     print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(PPProcessFilesTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(PPFileOperationTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
     suite = unittest.TestLoader().loadTestsFromTestCase(PPBasicTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,280 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import test_lib as test
+
+import BaseHTTPServer
+import threading
+import time
+
+import sickbeard
+from sickbeard import http_pool, provider_health
+from sickbeard.providers import generic
+
+
+class FakeProvider(generic.NZBProvider):
+
+    def __init__(self):
+        generic.NZBProvider.__init__(self, 'Fake')
+        self.searches = []
+        self.results = ['result']
+        self.release = None
+
+    def _doSearch(self, search_params, show=None):
+        self.searches.append(search_params)
+        if self.release:
+            self.release.wait()
+        return list(self.results)
+
+
+class FakeShow:
+
+    air_by_date = 0
+    tvdbid = 1
+
+    def wantEpisode(self, season, episode, quality, manualSearch=False):
+        return True
+
+
+class FakeEpisode:
+
+    show = FakeShow()
+    season = 1
+    episode = 2
+
+    def prettyName(self):
+        return 'Show Name - 1x02'
+
+
+class FakeCache:
+
+    def updateCache(self):
+        pass
+
+    def searchCache(self, episode, manualSearch=False):
+        return []
+
+
+class FakeEpisodeProvider(FakeProvider):
+
+    def __init__(self):
+        FakeProvider.__init__(self)
+        self.cache = FakeCache()
+        self.results = [('Show.Name.S01E02.720p.HDTV.x264-GROUP', 'http://example.com/1.nzb')]
+
+    def _get_episode_search_strings(self, ep_obj):
+        return ['Show Name S01E02', 'Show Name 1x02']
+
+    def _get_title_and_url(self, item):
+        return item
+
+
+class SearchCacheTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(SearchCacheTests, self).setUp()
+        self.provider = FakeProvider()
+
+    def tearDown(self):
+        sickbeard.SEARCH_CACHE_TTL = 15
+        generic.SEARCH_CACHE_SIZE = 100
+        super(SearchCacheTests, self).tearDown()
+
+    def test_cached(self):
+        self.assertEqual(self.provider._cachedSearch({'q': 'Show Name', 'season': 1}), ['result'])
+        self.assertEqual(self.provider._cachedSearch({'season': 1, 'q': 'Show Name '}), ['result'])
+        self.assertEqual(self.provider._cachedSearch({'q': 'Show Name', 'season': 2}), ['result'])
+
+        self.assertEqual(len(self.provider.searches), 2)
+        self.assertEqual((self.provider.searchCacheHits, self.provider.searchCacheMisses), (1, 2))
+
+    def test_empty_not_cached(self):
+        self.provider.results = []
+
+        self.provider._cachedSearch('Show Name S01E01')
+        self.provider._cachedSearch('Show Name S01E01')
+
+        self.assertEqual(len(self.provider.searches), 2)
+
+    def test_disabled(self):
+        for ttl in (0, -1):
+            sickbeard.SEARCH_CACHE_TTL = ttl
+            self.provider.searches = []
+
+            self.provider._cachedSearch('Show Name S01E01')
+            self.provider._cachedSearch('Show Name S01E01')
+
+            self.assertEqual(len(self.provider.searches), 2)
+            self.assertEqual(self.provider._searchCache, {})
+            self.assertEqual((self.provider.searchCacheHits, self.provider.searchCacheMisses), (0, 0))
+
+    def test_size_limit(self):
+        generic.SEARCH_CACHE_SIZE = 2
+
+        for cur_search in ('Show Name S01E01', 'Show Name S01E02', 'Show Name S01E03'):
+            self.provider._cachedSearch(cur_search)
+            time.sleep(0.01)
+
+        self.assertEqual(len(self.provider._searchCache), 2)
+
+        # the oldest one was forgotten, the newer ones weren't
+        self.provider._cachedSearch('Show Name S01E03')
+        self.provider._cachedSearch('Show Name S01E01')
+        self.assertEqual(self.provider.searches, ['Show Name S01E01', 'Show Name S01E02', 'Show Name S01E03', 'Show Name S01E01'])
+
+    def test_in_progress(self):
+        self.provider.release = threading.Event()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.provider._cachedSearch('Show Name S01E01'))) for x in range(3)]
+        for cur_thread in threads:
+            cur_thread.start()
+
+        self.provider.release.set()
+        for cur_thread in threads:
+            cur_thread.join()
+
+        self.assertEqual(len(self.provider.searches), 1)
+        self.assertEqual(results, [['result']] * 3)
+
+
+class EpisodeResultsTests(test.SickbeardTestDBCase):
+
+    def test_stop_early(self):
+        provider = FakeEpisodeProvider()
+
+        results = provider.iterEpisodeResults(FakeEpisode(), manualSearch=True)
+        self.assertEqual(results.next().name, 'Show.Name.S01E02.720p.HDTV.x264-GROUP')
+        self.assertEqual(provider.searches, ['Show Name S01E02'])
+
+        self.assertEqual(len(list(results)), 1)
+        self.assertEqual(provider.searches, ['Show Name S01E02', 'Show Name 1x02'])
+
+    def test_find_episode(self):
+        provider = FakeEpisodeProvider()
+
+        self.assertEqual(len(provider.findEpisode(FakeEpisode(), manualSearch=True)), 2)
+
+
+class ErrorHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ProviderHealthTests(unittest.TestCase):
+
+    def setUp(self):
+        self.provider = FakeProvider()
+        self.health = self.provider.health
+
+    def _fail(self, times):
+        for x in range(times):
+            self.health.failure(1)
+
+    def test_circuit(self):
+        self._fail(provider_health.FAILURE_THRESHOLD - 1)
+        self.assertTrue(self.health.available())
+        self.assertEqual(self.health.rank(), 1)
+
+        self._fail(1)
+        self.assertFalse(self.health.available())
+        self.assertEqual(self.health.rank(), 2)
+        self.assertEqual(self.health.backoff, provider_health.MIN_BACKOFF)
+
+        # requests that were already running don't make it any longer
+        self._fail(1)
+        self.assertEqual(self.health.backoff, provider_health.MIN_BACKOFF)
+
+        # the first one after the backoff fails too
+        self.health.openUntil = time.time() - 1
+        self.assertTrue(self.health.available())
+        self._fail(1)
+        self.assertFalse(self.health.available())
+        self.assertEqual(self.health.backoff, provider_health.MIN_BACKOFF * 2)
+
+        self.health.openUntil = time.time() - 1
+        self.health.success(1)
+        self.assertTrue(self.health.available())
+        self.assertEqual((self.health.rank(), self.health.backoff, self.health.consecutiveFailures), (0, 0, 0))
+
+    def test_stats(self):
+        self.health.success(0.2)
+        self.health.failure(1.2)
+
+        stats = self.health.getStats()
+        self.assertEqual((stats['requests'], stats['failures'], stats['consecutive_failures']), (2, 1, 1))
+        self.assertEqual(stats['latency'], 500)
+        self.assertEqual(stats['error_rate'], 0.3)
+
+    def test_skipped(self):
+        self._fail(provider_health.FAILURE_THRESHOLD)
+        self.assertEqual(self.provider.getURL('http://127.0.0.1:1/'), None)
+        self.assertEqual(self.health.requests, provider_health.FAILURE_THRESHOLD)
+
+    def _getErrors(self, status, times):
+        server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), ErrorHandler)
+        server.status = status
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            for x in range(times):
+                self.assertEqual(self.provider.getURL('http://127.0.0.1:%d/missing.nzb' % server.server_port), None)
+        finally:
+            http_pool.close_all()
+            server.shutdown()
+            server.server_close()
+
+    def test_http_error_not_failure(self):
+        self._getErrors(404, provider_health.FAILURE_THRESHOLD + 1)
+
+        self.assertTrue(self.health.available())
+        self.assertEqual((self.health.requests, self.health.failures), (provider_health.FAILURE_THRESHOLD + 1, 0))
+
+        # not being able to connect at all does count
+        self.provider.getURL('http://127.0.0.1:1/')
+        self.assertEqual(self.health.consecutiveFailures, 1)
+
+    def test_server_error_failure(self):
+        self._getErrors(503, provider_health.FAILURE_THRESHOLD)
+
+        self.assertFalse(self.health.available())
+        self.assertEqual(self.health.failures, provider_health.FAILURE_THRESHOLD)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - PROVIDER TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(SearchCacheTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    suite = unittest.TestLoader().loadTestsFromTestCase(EpisodeResultsTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    suite = unittest.TestLoader().loadTestsFromTestCase(ProviderHealthTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,107 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import test_lib as test
+
+import threading
+
+from sickbeard import generic_queue, show_queue
+
+
+class FakeShow(object):
+
+    def __init__(self, tvdbid):
+        self.tvdbid = tvdbid
+        self.name = str(tvdbid)
+
+
+class BlockingItem(show_queue.ShowQueueItem):
+
+    def __init__(self, show, started):
+        show_queue.ShowQueueItem.__init__(self, show_queue.ShowQueueActions.REFRESH, show)
+        self.started = started
+        self.done = threading.Event()
+
+    def execute(self):
+        show_queue.ShowQueueItem.execute(self)
+        self.started.append(self)
+        self.done.wait(10)
+
+
+class ShowQueueTests(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = show_queue.ShowQueue()
+        self.started = []
+
+    def tearDown(self):
+        for cur_item in self.queue.currentItems + self.queue.queue:
+            cur_item.done.set()
+        for cur_thread, cur_item in self.queue.running:
+            cur_thread.join(10)
+
+    def _add(self, show):
+        return self.queue.add_item(BlockingItem(show, self.started))
+
+    def _finish(self, item):
+        item.done.set()
+        for cur_thread, cur_item in self.queue.running:
+            if cur_item is item:
+                cur_thread.join(10)
+
+    def test_one_item_per_show(self):
+        show_a = FakeShow(1)
+        show_b = FakeShow(2)
+
+        first_a = self._add(show_a)
+        second_a = self._add(show_a)
+        first_b = self._add(show_b)
+
+        self.queue.run()
+        self.assertEqual(self.queue.currentItems, [first_a, first_b])
+        self.assertEqual(self.queue.queue, [second_a])
+
+        self._finish(first_a)
+        self.queue.run()
+        self.assertEqual(self.queue.currentItems, [first_b, second_a])
+        self.assertFalse(first_a.inProgress)
+
+    def test_thread_limit_and_priority(self):
+        scheduled = []
+        for i in range(show_queue.MAX_SHOW_QUEUE_THREADS + 1):
+            cur_item = self._add(FakeShow(i))
+            cur_item.priority = generic_queue.QueuePriorities.LOW
+            scheduled.append(cur_item)
+
+        user_item = self._add(FakeShow(100))
+        user_item.priority = generic_queue.QueuePriorities.HIGH
+
+        self.queue.run()
+        self.assertEqual(len(self.queue.running), show_queue.MAX_SHOW_QUEUE_THREADS)
+        self.assertTrue(user_item in self.queue.currentItems)
+        self.assertEqual(self.queue.queue, scheduled[-2:])
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - SHOW QUEUE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ShowQueueTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
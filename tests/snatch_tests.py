@@ -26,6 +26,7 @@ import sys, os.path
 
 import sickbeard.search as search
 import sickbeard
+from sickbeard import classes
 from sickbeard.tv import TVEpisode, TVShow
 import sickbeard.common as c
 
@@ -64,6 +65,36 @@ class SearchTest(test.SickbeardTestDBCase):
         super(SearchTest, self).__init__(something)
 
 
+class SnatchEpisodesTests(unittest.TestCase):
+
+    def setUp(self):
+        self._sendResult = search._sendResult
+        self._snatched = search._snatched
+        self.snatched = []
+
+        search._snatched = lambda result, endStatus: self.snatched.append(result)
+
+    def tearDown(self):
+        search._sendResult = self._sendResult
+        search._snatched = self._snatched
+
+    def test_snatch_episodes(self):
+        def fake_send(result):
+            if result.name == 'error':
+                raise Exception('downloader went away')
+            return result.name != 'fail'
+
+        search._sendResult = fake_send
+
+        results = []
+        for name in ('a', 'fail', 'error', 'b'):
+            results.append(classes.NZBSearchResult([]))
+            results[-1].name = name
+
+        self.assertEqual(search.snatchEpisodes(results), [True, False, False, True])
+        self.assertEqual([x.name for x in self.snatched], ['a', 'b'])
+
+
 def test_generator(tvdbdid, show_name, curData, forceSearch):
 
     def test(self):
@@ -20,8 +20,14 @@
 import unittest
 import test_lib as test
 
+import os
+import shutil
+import tempfile
+
 import sickbeard
-from sickbeard.tv import TVEpisode, TVShow
+from sickbeard import db, helpers
+from sickbeard.metadata import generic, xbmc_12plus
+from sickbeard.tv import EpisodeCache, RecentEpisodes, TVEpisode, TVShow
 
 
 class TVShowTests(test.SickbeardTestDBCase):
@@ -61,6 +67,56 @@ class TVShowTests(test.SickbeardTestDBCase):
         show.loadFromDB(skipNFO=True)
         self.assertEqual(show.name, "newName")
 
+    def test_init_from_db_row(self):
+        show = TVShow(0001, "en")
+        show.name = "show name"
+        show.network = "cbs"
+        show.quality = 8
+        show.saveToDB()
+
+        sqlShow = test.db.DBConnection().select("SELECT * FROM tv_shows WHERE tvdb_id = ?", [0001])[0]
+        rowShow = TVShow(0001, sqlShow=sqlShow)
+        self.assertEqual(rowShow.name, "show name")
+        self.assertEqual(rowShow.network, "cbs")
+        self.assertEqual(rowShow.quality, 8)
+        self.assertEqual(rowShow.lang, "en")
+        self.assertEqual(len(rowShow.episodes), 0)
+
+    def test_incremental_dir_scan(self):
+        show = TVShow(0001, "en")
+        show.location = test.SHOWDIR
+        show.saveToDB()
+
+        ep_file = os.path.join(test.SHOWDIR, test.FILENAME)
+        f = open(ep_file, 'w')
+        f.write('episode')
+        f.close()
+
+        parsed = []
+
+        def makeEpFromFile(file):
+            parsed.append(file)
+            ep = TVEpisode(show, test.SEASON, test.EPISODE)
+            ep.location = file
+            return ep
+
+        show.makeEpFromFile = makeEpFromFile
+        show.loadEpisodesFromDir()
+        show.loadEpisodesFromDir()
+        self.assertEqual(parsed, [ep_file])
+
+        show.loadEpisodesFromDir(full_scan=True)
+        self.assertEqual(parsed, [ep_file, ep_file])
+
+        os.utime(ep_file, (0, 0))
+        show.loadEpisodesFromDir()
+        self.assertEqual(parsed, [ep_file, ep_file, ep_file])
+
+        # the file isn't linked to an episode anymore
+        db.DBConnection().action("UPDATE tv_episodes SET location = '' WHERE showid = ?", [show.tvdbid])
+        show.loadEpisodesFromDir()
+        self.assertEqual(parsed, [ep_file, ep_file, ep_file, ep_file])
+
 
 class TVEpisodeTests(test.SickbeardTestDBCase):
 
@@ -76,6 +132,108 @@ class TVEpisodeTests(test.SickbeardTestDBCase):
         ep.loadFromDB(1, 1)
         self.assertEqual(ep.name, "asdasdasdajkaj")
 
+    def test_meta_files_folder_listing(self):
+        show = TVShow(0001, "en")
+        ep = TVEpisode(show, test.SEASON, test.EPISODE)
+        ep.location = test.FILEPATH
+
+        provider = xbmc_12plus.metadata_class(episode_metadata=True)
+        old_providers = sickbeard.metadata_provider_dict
+        sickbeard.metadata_provider_dict = {provider.name: provider}
+
+        nfo_path = provider.get_episode_file_path(ep)
+        old_listing = generic.use_folder_listing(helpers.FolderListing())
+        try:
+            ep.checkForMetaFiles()
+            self.assertFalse(ep.hasnfo)
+
+            # the folder was already listed so files only show up once they're reported
+            open(nfo_path, 'w').close()
+            ep.checkForMetaFiles()
+            self.assertFalse(ep.hasnfo)
+
+            generic.file_written(nfo_path)
+            ep.checkForMetaFiles()
+            self.assertTrue(ep.hasnfo)
+        finally:
+            generic.use_folder_listing(old_listing)
+            sickbeard.metadata_provider_dict = old_providers
+            os.remove(nfo_path)
+
+
+class MetadataFileExistsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        open(os.path.join(self.folder, 'Folder.jpg'), 'w').close()
+        os.mkdir(os.path.join(self.folder, 'tvshow.nfo'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_same_as_isfile(self):
+        old_listing = generic.use_folder_listing(helpers.FolderListing())
+        try:
+            for name in ('Folder.jpg', 'folder.jpg', 'FOLDER.JPG', 'tvshow.nfo', 'banner.jpg'):
+                file_path = os.path.join(self.folder, name)
+                self.assertEqual(generic.file_exists(file_path), os.path.isfile(file_path))
+        finally:
+            generic.use_folder_listing(old_listing)
+
+
+class EpisodeCacheTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(EpisodeCacheTests, self).setUp()
+        sickbeard.showList = []
+        self.show = TVShow(0001, "en")
+
+    def _make_ep(self, season, episode, dirty=False):
+        ep = TVEpisode(self.show, season, episode)
+        ep.dirty = dirty
+        return ep
+
+    def test_evicts_clean_episodes(self):
+        cache = EpisodeCache(RecentEpisodes(10))
+        for i in range(1, 21):
+            cache.add(1, i, self._make_ep(1, i))
+
+        self.assertTrue(len(cache.recent) <= 10)
+        self.assertTrue(len(cache) <= 10)
+        self.assertEqual(cache.get(1, 1), None)
+        self.assertNotEqual(cache.get(1, 20), None)
+
+    def test_keeps_dirty_episodes(self):
+        cache = EpisodeCache(RecentEpisodes(10))
+        for i in range(1, 21):
+            cache.add(1, i, self._make_ep(1, i, dirty=True))
+
+        self.assertEqual(len(cache), 20)
+
+    def test_referenced_episode_is_reused(self):
+        cache = EpisodeCache(RecentEpisodes(10))
+        first_ep = self._make_ep(1, 1)
+        cache.add(1, 1, first_ep)
+        for i in range(2, 21):
+            cache.add(1, i, self._make_ep(1, i))
+
+        self.assertTrue(cache.get(1, 1) is first_ep)
+
+    def test_seasons_survive_eviction(self):
+        cache = EpisodeCache(RecentEpisodes(10))
+        for i in range(1, 21):
+            cache.add(i, 1, self._make_ep(i, 1))
+
+        self.assertEqual(sorted([season for season, episodes in cache.iteritems()]), range(1, 21))
+
+    def test_remove(self):
+        cache = EpisodeCache(RecentEpisodes(10))
+        ep = self._make_ep(1, 1)
+        cache.add(1, 1, ep)
+        cache.remove(1, 1)
+
+        self.assertEqual(cache.get(1, 1), None)
+
 
 class TVTests(test.SickbeardTestDBCase):
 
@@ -109,5 +267,11 @@ if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromTestCase(TVEpisodeTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
     print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(MetadataFileExistsTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(EpisodeCacheTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
     suite = unittest.TestLoader().loadTestsFromTestCase(TVTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
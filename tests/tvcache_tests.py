@@ -0,0 +1,161 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import test_lib as test
+
+import BaseHTTPServer
+import datetime
+import threading
+
+from sickbeard import http_pool, provider_health, tvcache
+
+FEED = '<?xml version="1.0"?><rss><channel><item><title>Show.Name.S01E01.720p.HDTV.x264-GROUP</title><link>http://example.com/1.nzb</link></item></channel></rss>'
+
+
+class FeedHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.server.status != 200:
+            self.send_response(self.server.status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if self.server.etag and self.headers.get('If-None-Match') == self.server.etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        if self.server.etag:
+            self.send_header('ETag', self.server.etag)
+        self.send_header('Content-Length', str(len(self.server.feed)))
+        self.end_headers()
+        self.wfile.write(self.server.feed)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeProvider:
+
+    name = 'Fake'
+
+    def __init__(self):
+        self.health = provider_health.ProviderHealth(self)
+
+    def getID(self):
+        return 'fake'
+
+
+class FakeCache(tvcache.TVCache):
+
+    def __init__(self, url):
+        tvcache.TVCache.__init__(self, FakeProvider())
+        self.url = url
+        self.parsed = 0
+
+    def _getRSSData(self):
+        return self._getFeed(self.url)
+
+    def _parseItem(self, item):
+        self.parsed += 1
+
+
+class ConditionalFeedTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(ConditionalFeedTests, self).setUp()
+
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), FeedHandler)
+        self.server.etag = '"1"'
+        self.server.feed = FEED
+        self.server.status = 200
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.cache = FakeCache('http://127.0.0.1:%d/rss' % self.server.server_port)
+
+    def tearDown(self):
+        http_pool.close_all()
+        self.server.shutdown()
+        self.server.server_close()
+        super(ConditionalFeedTests, self).tearDown()
+
+    def _update(self):
+        self.cache.setLastUpdate(datetime.datetime.today() - datetime.timedelta(days=1))
+        self.cache.updateCache()
+
+    def test_not_modified(self):
+        self._update()
+        self.assertEqual(self.cache.parsed, 1)
+
+        self._update()
+        self.assertEqual(self.cache.parsed, 1)
+        self.assertEqual(self.cache.skippedUpdates, 1)
+        self.assertEqual(self.cache.savedBytes, len(FEED))
+
+        self.server.etag = '"2"'
+        self.server.feed = FEED.replace('S01E01', 'S01E02')
+        self._update()
+        self.assertEqual(self.cache.parsed, 2)
+
+    def test_same_data(self):
+        self.server.etag = None
+
+        self._update()
+        self._update()
+        self.assertEqual(self.cache.parsed, 1)
+        self.assertEqual(self.cache.skippedUpdates, 1)
+
+        self.server.feed = FEED.replace('S01E01', 'S01E02')
+        self._update()
+        self.assertEqual(self.cache.parsed, 2)
+
+    def test_http_error_not_failure(self):
+        self.server.status = 403
+
+        for x in range(provider_health.FAILURE_THRESHOLD + 1):
+            self.assertEqual(self.cache._getFeed(self.cache.url), None)
+
+        # the provider answered so it's still up, it's the request that's wrong
+        self.assertTrue(self.cache.provider.health.available())
+        self.assertEqual(self.cache.provider.health.consecutiveFailures, 0)
+
+    def test_server_error_failure(self):
+        self.server.status = 503
+
+        for x in range(provider_health.FAILURE_THRESHOLD):
+            self.assertEqual(self.cache._getFeed(self.cache.url), None)
+
+        self.assertFalse(self.cache.provider.health.available())
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - TV CACHE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ConditionalFeedTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,99 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import test_lib as test
+
+import os
+import shutil
+import tempfile
+
+import sickbeard
+from sickbeard import webserve
+
+
+class FakeMetadataProvider:
+
+    def __init__(self, shows):
+        self.shows = shows
+
+    def retrieveShowMetadata(self, dir):
+        return self.shows.get(os.path.basename(dir), (None, None))
+
+
+class FakeShow:
+
+    def __init__(self, tvdbid):
+        self.tvdbid = tvdbid
+
+
+class ScanShowDirTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(ScanShowDirTests, self).setUp()
+
+        self.folder = tempfile.mkdtemp()
+        for name in ('Show A', 'Show B', 'Show C'):
+            os.mkdir(os.path.join(self.folder, name))
+        open(os.path.join(self.folder, 'file.txt'), 'w').close()
+
+        self.old_providers = sickbeard.metadata_provider_dict
+        sickbeard.metadata_provider_dict = {'first': FakeMetadataProvider({'Show A': (1, 'Show A')}),
+                                            'second': FakeMetadataProvider({'Show B': (2, 'Show B')})}
+        sickbeard.showList = [FakeShow(2)]
+
+        self.page = webserve.NewHomeAddShows()
+
+    def tearDown(self):
+        sickbeard.metadata_provider_dict = self.old_providers
+        sickbeard.showList = []
+        shutil.rmtree(self.folder)
+        super(ScanShowDirTests, self).tearDown()
+
+    def _scan(self, name, added_locations=[]):
+        return self.page._scanShowDir(os.path.join(self.folder, name), added_locations)
+
+    def test_not_a_folder(self):
+        self.assertEqual(self._scan('file.txt'), None)
+        self.assertEqual(self._scan('missing'), None)
+
+    def test_metadata(self):
+        cur_dir = self._scan('Show C')
+        self.assertEqual(cur_dir['dir'], os.path.join(self.folder, 'Show C'))
+        self.assertFalse(cur_dir['added_already'])
+        self.assertFalse(cur_dir['existing_info'][0])
+
+        self.assertEqual(self._scan('Show A')['existing_info'], (1, 'Show A'))
+
+    def test_added_already(self):
+        # by the show's tvdb id
+        cur_dir = self._scan('Show B')
+        self.assertEqual(cur_dir['existing_info'], (2, 'Show B'))
+        self.assertTrue(cur_dir['added_already'])
+
+        # by the show's location
+        self.assertTrue(self._scan('Show C', [os.path.join(self.folder, 'Show C')])['added_already'])
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - WEBSERVE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ScanShowDirTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)